@@ -0,0 +1,77 @@
+"""
+Compare the structured chunker with the legacy clean_text/chunk_text pipeline on synthetic
+documents: chunk counts, chunk sizes and throughput, at growing document sizes so a
+super-linear slowdown shows up as falling MB/s.
+
+    python benchmarks/bench_chunking.py --pages 50 200 800
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# The synthetic documents are shared with the test suite
+for folder in ("src", "tests"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+from config.settings import Settings  # noqa: E402
+from core.chunking import chunking_options, chunk_document_pages, count_tokens  # noqa: E402
+from core.summarizer import clean_text, chunk_text  # noqa: E402
+from fixtures import make_page  # noqa: E402
+
+
+def run_legacy(pages: list, settings: Settings) -> list:
+    return chunk_text(clean_text("\n".join(pages)), settings.get_max_chunk_length())
+
+
+def run_structured(pages: list, settings: Settings) -> list:
+    return chunk_document_pages(iter(pages), chunking_options(settings))
+
+
+def measure(name: str, function, pages: list, settings: Settings, repeat: int) -> dict:
+    size_mb = sum(len(page) for page in pages) / 1e6
+    best = None
+    chunks = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = function(pages, settings)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tokens = [count_tokens(chunk) for chunk in chunks]
+    return {
+        "name": name,
+        "chunks": len(chunks),
+        "mean_tokens": sum(tokens) / max(1, len(tokens)),
+        "max_tokens": max(tokens, default=0),
+        "paragraph_breaks": sum(chunk.count("\n\n") for chunk in chunks),
+        "seconds": best,
+        "mb_per_s": size_mb / best if best else float("inf"),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    settings = Settings()
+    print(f"{'pages':>6} {'chunker':<11} {'chunks':>7} {'mean tok':>9} {'max tok':>8} "
+          f"{'para brk':>9} {'seconds':>8} {'MB/s':>7}")
+    for page_count in args.pages:
+        rng = random.Random(args.seed)
+        pages = [make_page(rng, number) for number in range(1, page_count + 1)]
+        for name, function in (("legacy", run_legacy), ("structured", run_structured)):
+            result = measure(name, function, pages, settings, args.repeat)
+            print(f"{page_count:>6} {result['name']:<11} {result['chunks']:>7} {result['mean_tokens']:>9.1f} "
+                  f"{result['max_tokens']:>8} {result['paragraph_breaks']:>9} {result['seconds']:>8.3f} "
+                  f"{result['mb_per_s']:>7.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Benchmark the summarization stages on synthetic documents, fully offline: read_file (PDF
+and TXT), clean_text, chunk_text, embed_chunks, retrieve_relevant_chunks and end-to-end
+rag_summarize against a stub Ollama server, with a hashing embedder unless --embedder
+names a real model. Reports the best time, throughput and peak traced memory per stage,
+and can save the results as a baseline or compare against one.
+
+    python benchmarks/bench_pipeline.py --pages 10 100 --save baseline.json
+    python benchmarks/bench_pipeline.py --pages 10 100 --compare baseline.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# The offline fixtures (hashing embedder, stub Ollama) are shared with the test suite
+for folder in ("src", "tests"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+from config.settings import Settings  # noqa: E402
+from core.extraction import read_file  # noqa: E402
+from core.summarizer import (  # noqa: E402
+    chunk_text, clean_text, embed_chunks, rag_summarize, retrieve_relevant_chunks
+)
+from fixtures import FakeEmbedder, StubOllama, make_pages, write_pdf, write_txt  # noqa: E402
+
+QUERY = "What are the main findings about network performance and energy cost?"
+
+
+def measure(function, repeat: int) -> tuple:
+    """Best wall time over repeat calls, then peak traced memory of one more call"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    # Tracing slows allocation-heavy code down, so memory gets its own run
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+
+def run_size(page_count: int, folder: Path, embedder, settings: Settings, repeat: int, seed: int) -> list:
+    pages = make_pages(page_count, seed)
+    pdf_path = folder / f"doc_{page_count}.pdf"
+    txt_path = folder / f"doc_{page_count}.txt"
+    write_pdf(pdf_path, pages)
+    write_txt(txt_path, pages)
+
+    text, pdf_read, pdf_peak = measure(lambda: read_file(pdf_path), repeat)
+    _, txt_read, txt_peak = measure(lambda: read_file(txt_path), repeat)
+    mb = len(text) / 1e6
+    cleaned, clean_seconds, clean_peak = measure(lambda: clean_text(text), repeat)
+    chunks, chunk_seconds, chunk_peak = measure(
+        lambda: chunk_text(cleaned, settings.get_max_chunk_length()), repeat
+    )
+    batch_size = settings.get_embedding_batch_size()
+    embeddings, embed_seconds, embed_peak = measure(
+        lambda: embed_chunks(chunks, embedder, batch_size), repeat
+    )
+    top_k = settings.get_top_k_retrieval()
+    _, retrieve_seconds, retrieve_peak = measure(
+        lambda: retrieve_relevant_chunks(QUERY, chunks, embeddings, embedder, top_k), repeat
+    )
+    summary, rag_seconds, rag_peak = measure(lambda: rag_summarize(text, QUERY, embedder), repeat)
+    if summary.startswith("Error"):
+        raise RuntimeError(f"rag_summarize failed: {summary}")
+
+    rows = [
+        ("read_pdf", pdf_read, pdf_peak, mb, "MB"),
+        ("read_txt", txt_read, txt_peak, mb, "MB"),
+        ("clean_text", clean_seconds, clean_peak, mb, "MB"),
+        ("chunk_text", chunk_seconds, chunk_peak, len(cleaned) / 1e6, "MB"),
+        ("embed_chunks", embed_seconds, embed_peak, len(chunks), "chunks"),
+        ("retrieve", retrieve_seconds, retrieve_peak, len(chunks), "chunks"),
+        ("rag_summarize", rag_seconds, rag_peak, mb, "MB"),
+    ]
+    return [
+        {
+            "key": f"{stage}@{page_count}",
+            "stage": stage,
+            "pages": page_count,
+            "seconds": seconds,
+            "peak_mb": peak / 1e6,
+            "throughput": amount / seconds if seconds else float("inf"),
+            "unit": f"{unit}/s",
+        }
+        for stage, seconds, peak, amount, unit in rows
+    ]
+
+
+def compare(results: list, baseline: dict, time_tolerance: float, memory_tolerance: float,
+            noise_seconds: float) -> list:
+    """
+    Keys of results slower or hungrier than the baseline beyond the tolerances. A slowdown
+    smaller than noise_seconds is timer jitter on very fast stages, not a regression.
+    """
+    regressions = []
+    previous = baseline.get("results", {})
+    for result in results:
+        old = previous.get(result["key"])
+        if old is None:
+            result["change"] = "new"
+            continue
+        time_ratio = result["seconds"] / old["seconds"] if old["seconds"] else 1.0
+        memory_ratio = result["peak_mb"] / old["peak_mb"] if old["peak_mb"] else 1.0
+        result["change"] = f"{time_ratio - 1:+.0%} time, {memory_ratio - 1:+.0%} mem"
+        slower = time_ratio > 1 + time_tolerance and result["seconds"] - old["seconds"] > noise_seconds
+        if slower or memory_ratio > 1 + memory_tolerance:
+            result["change"] += "  REGRESSION"
+            regressions.append(result["key"])
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embedder", default="fake",
+                        help="'fake' for the hashing embedder, or a SentenceTransformer model name")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub Ollama seconds per request")
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="compare against a saved baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    parser.add_argument("--noise", type=float, default=0.005,
+                        help="slowdowns below this many seconds are ignored")
+    args = parser.parse_args(argv)
+
+    with StubOllama(latency=args.latency) as stub, tempfile.TemporaryDirectory() as folder:
+        # rag_summarize reads its own Settings, which take the host from the environment
+        os.environ["OLLAMA_HOST"] = stub.host
+        settings = Settings()
+        if args.embedder == "fake":
+            embedder = FakeEmbedder()
+        else:
+            from core.embedder import get_embedder
+            embedder = get_embedder(model_name=args.embedder, device="cpu")
+
+        results = []
+        for page_count in args.pages:
+            results.extend(run_size(page_count, Path(folder), embedder, settings, args.repeat, args.seed))
+
+    regressions = []
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance, args.noise)
+
+    print(f"{'stage':<15} {'pages':>6} {'seconds':>9} {'throughput':>18} {'peak MB':>8}  change")
+    for result in results:
+        throughput = f"{result['throughput']:.1f} {result['unit']}"
+        print(f"{result['stage']:<15} {result['pages']:>6} {result['seconds']:>9.4f} {throughput:>18} "
+              f"{result['peak_mb']:>8.2f}  {result.get('change', '')}")
+
+    if args.save:
+        baseline = {
+            "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                     "embedder": args.embedder, "repeat": args.repeat, "seed": args.seed},
+            "results": {
+                result["key"]: {"seconds": result["seconds"], "peak_mb": result["peak_mb"]}
+                for result in results
+            },
+        }
+        Path(args.save).write_text(json.dumps(baseline, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {args.save}")
+
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Measure import time of the application entry points in fresh interpreters and check that
+the GUI window module stays free of heavy libraries, which are loaded by the background
+warm-up instead. Exits with status 1 when the GUI imports a heavy module, or when an entry
+point is slower than a saved baseline allows.
+
+    python benchmarks/bench_startup.py --save startup.json
+    python benchmarks/bench_startup.py --compare startup.json --top 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# module -> whether it must import without any of HEAVY_MODULES
+TARGETS = {
+    "gui.main_window": True,
+    "cli": False,
+    "core.file_processor": False,
+}
+HEAVY_MODULES = [
+    "numpy", "pandas", "torch", "transformers", "sentence_transformers",
+    "ollama", "httpx", "requests", "PyPDF2", "openpyxl",
+]
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_once(module: str) -> dict:
+    code = CHILD.format(src=SRC, module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, count: int) -> list:
+    """(cumulative microseconds, module) of the slowest imports, from python -X importtime"""
+    code = f"import sys; sys.path.insert(0, {SRC!r}); import {module}"
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in output.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports per target")
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="compare against a saved baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.30)
+    parser.add_argument("--noise", type=float, default=0.02,
+                        help="slowdowns below this many seconds are ignored")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else {}
+    failures = []
+    results = {}
+    print(f"{'module':<22} {'median s':>9} {'min s':>7}  heavy modules loaded")
+    for module, must_be_light in TARGETS.items():
+        runs = [import_once(module) for _ in range(args.repeat)]
+        seconds = [run["seconds"] for run in runs]
+        heavy = runs[-1]["heavy"]
+        results[module] = {"seconds": statistics.median(seconds), "heavy": heavy}
+
+        notes = []
+        if must_be_light and heavy:
+            notes.append("MUST NOT LOAD HEAVY MODULES")
+            failures.append(module)
+        old = baseline.get("results", {}).get(module)
+        if old:
+            change = results[module]["seconds"] - old["seconds"]
+            notes.append(f"{change / old['seconds']:+.0%} vs baseline" if old["seconds"] else "")
+            if change > max(args.noise, old["seconds"] * args.time_tolerance):
+                notes.append("REGRESSION")
+                failures.append(module)
+        print(f"{module:<22} {results[module]['seconds']:>9.3f} {min(seconds):>7.3f}  "
+              f"{', '.join(heavy) or '-'}  {' '.join(notes)}")
+        for microseconds, name in slowest_imports(module, args.top) if args.top else []:
+            print(f"    {microseconds / 1e6:>8.3f}s  {name}")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({"python": sys.version.split()[0], "results": results},
+                                              indent=2), encoding="utf-8")
+        print(f"Baseline saved to {args.save}")
+
+    if failures:
+        print(f"{len(failures)} failures: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
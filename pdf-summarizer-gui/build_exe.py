@@ -113,9 +113,16 @@ def build_executable():
         "--hidden-import", "sklearn.neighbors.typedefs",
         "--hidden-import", "sklearn.neighbors.quad_tree",
         "--hidden-import", "sklearn.tree._utils",
+        # The window imports these lazily (by name in core/warmup.py), so list them explicitly
+        "--hidden-import", "core.warmup",
+        "--hidden-import", "core.file_processor",
+        "--hidden-import", "core.watcher",
+        "--hidden-import", "ollama",
+        "--hidden-import", "requests",
         # Collect data files
         "--collect-data", "sentence_transformers",
         "--collect-data", "transformers",
+        "--paths", "src",               # Resolve the lazily imported core/config packages
         "src/main.py"                   # Entry point
     ]
     
@@ -17,7 +17,6 @@ setup(
     install_requires=[
         "PyPDF2>=3.0.0",
         "numpy>=1.21.0",
-        "pandas>=1.3.0",
         "sentence-transformers>=2.2.0",
         "ollama>=0.1.0",
         "PyQt5>=5.15.0",
@@ -28,6 +27,9 @@ setup(
         'dev': [
             'pyinstaller>=5.0',
             'pytest>=6.0',
+        ],
+        'parquet': [
+            'pyarrow>=5.0',
         ]
     },
     classifiers=[
@@ -53,6 +55,7 @@ setup(
     entry_points={
         'console_scripts': [
             'pdf-summarizer=main:main',
+            'pdf-summarizer-cli=cli:main',
         ],
     },
     include_package_data=True,
@@ -0,0 +1,163 @@
+"""
+Headless command-line entry point. Runs the same core pipeline as the GUI without importing Qt,
+for large unattended batches on servers.
+
+    python src/cli.py /path/to/folder --recursive --workers 8
+"""
+
+import argparse
+import multiprocessing
+import signal
+import sys
+from config.settings import Settings
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pdf-summarizer-cli",
+        description="Summarize every PDF/TXT file in a folder with RAG and Ollama."
+    )
+    parser.add_argument("folder", help="folder containing PDF or text files")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="also process files in subfolders")
+    parser.add_argument("--include", action="append", metavar="PATTERN",
+                        help="only process files whose name or relative path matches; repeatable")
+    parser.add_argument("--exclude", action="append", metavar="PATTERN",
+                        help="skip files and folders whose name or relative path matches; repeatable")
+    parser.add_argument("--symlinks", choices=["skip", "files", "follow"],
+                        help="symbolic links: ignore them, follow links to files, or follow all")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="summarize files with identical contents separately")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="PDF extraction worker processes (0 extracts in-process)")
+    parser.add_argument("--max-inflight", type=int,
+                        help="concurrent Ollama requests (match OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--batch-files", type=int,
+                        help="files whose chunks are embedded together in one stage")
+    parser.add_argument("-q", "--query", action="append", dest="queries",
+                        help="question to answer per document; repeat for one column per query")
+    parser.add_argument("--queries-file", help="text file with one query per line")
+    parser.add_argument("--model", help="Ollama model used for generation")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore and do not update the summary cache")
+    parser.add_argument("--no-embedding-store", action="store_true",
+                        help="ignore and do not update stored chunk embeddings")
+    parser.add_argument("--format", nargs="+", dest="formats", metavar="FORMAT",
+                        choices=["xlsx", "csv", "jsonl", "parquet"],
+                        help="output files written as files finish: xlsx, csv, jsonl, parquet")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and summarize files as they arrive")
+    parser.add_argument("--profile", action="store_true",
+                        help="also save a cProfile dump of the run to output_rag/run_profile.prof")
+    parser.add_argument("--ask", metavar="QUESTION",
+                        help="search every processed document in the folder instead of summarizing")
+    parser.add_argument("-k", "--top-k", type=int,
+                        help="number of passages returned by --ask")
+    parser.add_argument("--index-mode", choices=["flat", "ivf"],
+                        help="corpus index search: exact (flat) or clustered (ivf)")
+    parser.add_argument("--quantize", action="store_true",
+                        help="keep the corpus index as int8 vectors")
+    return parser
+
+
+def settings_from_args(args) -> Settings:
+    """Apply command-line overrides on top of the default Settings"""
+    settings = Settings()
+    if args.recursive:
+        settings.recursive_discovery = True
+    if args.include:
+        settings.include_patterns = args.include
+    if args.exclude:
+        settings.exclude_patterns = args.exclude
+    if args.symlinks:
+        settings.symlink_policy = args.symlinks
+    if args.no_dedup:
+        settings.deduplicate_files = False
+    if args.workers is not None:
+        settings.extraction_workers = args.workers
+    if args.max_inflight is not None:
+        settings.max_inflight_generations = args.max_inflight
+    if args.batch_files is not None:
+        settings.pipeline_batch_files = args.batch_files
+    if args.queries:
+        settings.queries = args.queries
+    if args.queries_file:
+        settings.queries_file = args.queries_file
+    if args.model:
+        settings.llm_model = args.model
+    if args.no_cache:
+        settings.use_summary_cache = False
+    if args.no_embedding_store:
+        settings.use_embedding_store = False
+    if args.formats:
+        settings.output_formats = args.formats
+    if args.profile:
+        settings.profile_run = True
+    if args.index_mode:
+        settings.corpus_index_mode = args.index_mode
+    if args.quantize:
+        settings.corpus_index_quantize = True
+    return settings
+
+
+def ask(folder: str, question: str, settings: Settings, top_k: int = None) -> int:
+    """Print the passages across the folder that best match the question"""
+    from core.corpus_index import query_corpus
+    try:
+        hits = query_corpus(folder, question, top_k, settings)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    if not hits:
+        print("No indexed documents found; summarize the folder first.")
+        return 1
+    for rank, hit in enumerate(hits, start=1):
+        print(f"{rank}. [{hit.score:.3f}] {hit.location()}")
+        print(f"   {' '.join(hit.text.split())[:300]}")
+    return 0
+
+
+def main(argv=None) -> int:
+    multiprocessing.freeze_support()
+    args = build_parser().parse_args(argv)
+    settings = settings_from_args(args)
+
+    if args.ask:
+        return ask(args.folder, args.ask, settings, args.top_k)
+
+    if args.watch:
+        from core.watcher import watch_folder
+        try:
+            watch_folder(args.folder, settings=settings)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+        return 0
+
+    from core.file_processor import process_folder
+    from core.cancellation import CancellationToken
+    cancel_token = CancellationToken()
+
+    def on_interrupt(signum, frame):
+        # First Ctrl+C stops at the next safe point and keeps finished work; a second one aborts
+        print("\nCancelling after the current step (Ctrl+C again to abort)...")
+        cancel_token.cancel()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    previous_handler = signal.signal(signal.SIGINT, on_interrupt)
+    try:
+        success, message = process_folder(
+            args.folder, settings, cancel_token=cancel_token
+        )
+    except KeyboardInterrupt:
+        print("\nInterrupted.")
+        return 130
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+    print(f"\n{message}")
+    if cancel_token.cancelled:
+        return 130
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,120 @@
 import os
 
+
+def _env_positive_int(name: str, default: int) -> int:
+    """Integer environment variable of at least 1; unset or malformed values give default"""
+    value = os.environ.get(name, "").strip()
+    try:
+        return max(1, int(value)) if value else default
+    except ValueError:
+        print(f"Warning: Ignoring {name}={value!r}, expected a whole number")
+        return default
+
+
 class Settings:
     def __init__(self):
         self.default_query = "Summarize the key points of this document or the main argument."
+        # Multi-query mode: every query is answered per document and gets its own Excel column
+        self.queries = []
+        self.queries_file = None  # text file with one query per line; '#' starts a comment
+        # "structured" keeps page/paragraph/heading boundaries and sizes chunks in tokens;
+        # "legacy" is the original whitespace-collapsing chunker sized by max_chunk_length
+        self.chunker = "structured"
+        self.chunk_tokens = 256  # all-MiniLM-L6-v2 truncates its input at 256 word pieces
+        self.chunk_overlap_tokens = 32
         self.max_chunk_length = 2500
         self.top_k_retrieval = 3
+        self.retrieval_min_similarity = 0.1
+        # Maximal marginal relevance: 0 ranks by similarity alone, higher values favour chunks
+        # that add something new over near-duplicates of those already picked
+        self.mmr_diversity = 0.0
+        self.mmr_candidates = None  # chunks reranked by MMR; None means 4 * top_k_retrieval
         self.output_folder_name = "output_summaries"
         self.embedder_model = "all-MiniLM-L6-v2"
+        self.embedder_device = None  # None lets sentence-transformers pick cuda/mps/cpu
+        self.max_cached_embedders = 1
+        self.embedding_batch_size = 32
+        self.pipeline_batch_files = 16  # files chunked together before one shared embedding stage
+        # Which files a run picks up: subfolders too if recursive, names (or paths below the
+        # input folder) matching an include pattern and no exclude pattern, case-insensitive
+        self.recursive_discovery = False
+        self.include_patterns = ["*.pdf", "*.txt"]
+        self.exclude_patterns = []
+        self.symlink_policy = "files"  # "skip", "files" (not linked folders) or "follow"
+        self.deduplicate_files = True  # files with identical contents are summarized once
+        # Start the files with the most estimated work first and pass on whichever file is ready
+        # next, instead of working through the folder in name order
+        self.schedule_longest_first = True
         self.pdf_reader = "PyPDF2"
+        self.prompt_template = """Based on the following document content, please provide a comprehensive summary that addresses this question: {query}
+
+Document Content:
+{context}
+
+Please provide a clear, structured summary that:
+1. Captures the main points and key insights
+2. Is well-organized and easy to understand
+3. Focuses on the most important information
+4. Is concise but comprehensive
+
+Summary:"""
+        # Prompt budget: context window of the LLM (passed to Ollama as num_ctx) minus the
+        # tokens reserved for the answer. Models missing from model_context_windows use context_window.
+        self.context_window = 4096
+        self.model_context_windows = {}
+        self.response_tokens = 1024
+        # Hugging Face tokenizer per Ollama model for exact prompt token counts; others are estimated
+        self.prompt_tokenizers = {}
+        # "rag" answers from the top retrieved chunks, "map_reduce" summarizes every chunk group
+        # and combines the partial summaries; "auto" uses map-reduce from map_reduce_min_chunks chunks
+        self.summary_mode = "auto"
+        self.map_reduce_min_chunks = 24
+        self.map_reduce_fan_out = 8  # partial summaries combined per reduce call
+        self.map_reduce_depth = 2  # intermediate reduce levels before the final answer
+        self.map_summary_tokens = 256  # length limit for each partial summary
+        self.map_prompt_template = """Summarize this section of a longer document. Keep the facts, figures and conclusions relevant to: {query}
+
+Section:
+{context}
+
+Section summary:"""
+        self.reduce_prompt_template = """The following are summaries of consecutive parts of one document. Combine them into a single summary relevant to: {query}
+
+Partial summaries:
+{context}
+
+Combined summary:"""
+        self.use_summary_cache = True
+        self.use_embedding_store = True
+        # Files written to output_rag/ as rows stream in: any of "xlsx", "csv", "jsonl" and
+        # "parquet" (needs pyarrow); metadata adds status, page/chunk counts and stage timings
+        self.output_formats = ["xlsx"]
+        self.output_metadata_columns = True
+        # Xlsx and parquet only appear when the run ends; without a csv or jsonl output the rows
+        # also go to summaries.partial.csv, which is removed once the outputs are saved
+        self.output_partial_csv = True
+        # Journal finished files under output_rag/ so an interrupted run resumes where it stopped
+        self.use_job_journal = True
+        # Folder-wide index over the stored embeddings: "flat" is exact, "ivf" only scans
+        # the corpus_ivf_nprobe nearest k-means cells; quantize keeps vectors as int8
+        self.update_corpus_index = True
+        self.corpus_index_mode = "flat"
+        self.corpus_index_quantize = False
+        self.corpus_ivf_lists = None  # None uses sqrt(number of chunks)
+        self.corpus_ivf_nprobe = 8
+        self.corpus_top_k = 5
+        self.watch_poll_interval = 2.0  # seconds between scans of a watched folder
+        # Per-file stage timings saved as run_report.json/.csv; profile_run adds a cProfile dump
+        self.write_run_report = True
+        self.profile_run = False
+        self.extraction_workers = max(1, (os.cpu_count() or 2) - 1)  # 0 extracts in-process
+        self.extraction_timeout = 300  # seconds allowed per file
+        self.pdf_pages_per_task = 50
+        self.pdf_split_min_bytes = 5 * 1024 * 1024  # smaller PDFs are extracted by a single worker
+        self.llm_model = "gemma3:1b"
+        self.ollama_host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+        # Keep in step with the server's OLLAMA_NUM_PARALLEL so requests do not just queue there
+        self.max_inflight_generations = _env_positive_int("OLLAMA_NUM_PARALLEL", 1)
     
     def get_output_folder(self):
         return os.path.join(os.getcwd(), self.output_folder_name)
@@ -15,11 +122,167 @@ class Settings:
     def get_embedder_model(self):
         return self.embedder_model
 
+    def get_embedder_device(self):
+        return self.embedder_device
+
+    def get_max_cached_embedders(self):
+        return self.max_cached_embedders
+
+    def get_embedding_batch_size(self):
+        return self.embedding_batch_size
+
+    def get_pipeline_batch_files(self):
+        return self.pipeline_batch_files
+
+    def get_recursive_discovery(self):
+        return self.recursive_discovery
+
+    def get_include_patterns(self):
+        return self.include_patterns
+
+    def get_exclude_patterns(self):
+        return self.exclude_patterns
+
+    def get_symlink_policy(self):
+        return self.symlink_policy
+
+    def get_deduplicate_files(self):
+        return self.deduplicate_files
+
+    def get_schedule_longest_first(self):
+        return self.schedule_longest_first
+
+    def get_prompt_template(self):
+        return self.prompt_template
+
+    def get_context_window(self):
+        return self.model_context_windows.get(self.llm_model, self.context_window)
+
+    def get_response_tokens(self):
+        return self.response_tokens
+
+    def get_prompt_tokenizer(self):
+        return self.prompt_tokenizers.get(self.llm_model)
+
+    def get_summary_mode(self):
+        return self.summary_mode
+
+    def get_map_reduce_min_chunks(self):
+        return self.map_reduce_min_chunks
+
+    def get_map_reduce_fan_out(self):
+        return self.map_reduce_fan_out
+
+    def get_map_reduce_depth(self):
+        return self.map_reduce_depth
+
+    def get_map_summary_tokens(self):
+        return self.map_summary_tokens
+
+    def get_map_prompt_template(self):
+        return self.map_prompt_template
+
+    def get_reduce_prompt_template(self):
+        return self.reduce_prompt_template
+
+    def get_use_summary_cache(self):
+        return self.use_summary_cache
+
+    def get_use_embedding_store(self):
+        return self.use_embedding_store
+
+    def get_write_run_report(self):
+        return self.write_run_report
+
+    def get_profile_run(self):
+        return self.profile_run
+
+    def get_output_formats(self):
+        return self.output_formats
+
+    def get_output_metadata_columns(self):
+        return self.output_metadata_columns
+
+    def get_output_partial_csv(self):
+        return self.output_partial_csv
+
+    def get_use_job_journal(self):
+        return self.use_job_journal
+
+    def get_update_corpus_index(self):
+        return self.update_corpus_index
+
+    def get_corpus_index_mode(self):
+        return self.corpus_index_mode
+
+    def get_corpus_index_quantize(self):
+        return self.corpus_index_quantize
+
+    def get_corpus_ivf_lists(self):
+        return self.corpus_ivf_lists
+
+    def get_corpus_ivf_nprobe(self):
+        return self.corpus_ivf_nprobe
+
+    def get_corpus_top_k(self):
+        return self.corpus_top_k
+
+    def get_watch_poll_interval(self):
+        return self.watch_poll_interval
+
+    def get_extraction_workers(self):
+        return self.extraction_workers
+
+    def get_extraction_timeout(self):
+        return self.extraction_timeout
+
+    def get_pdf_pages_per_task(self):
+        return self.pdf_pages_per_task
+
+    def get_pdf_split_min_bytes(self):
+        return self.pdf_split_min_bytes
+
+    def get_llm_model(self):
+        return self.llm_model
+
+    def get_ollama_host(self):
+        return self.ollama_host
+
+    def get_max_inflight_generations(self):
+        return self.max_inflight_generations
+
     def get_max_chunk_length(self):
         return self.max_chunk_length
 
+    def get_chunker(self):
+        return self.chunker
+
+    def get_chunk_tokens(self):
+        return self.chunk_tokens
+
+    def get_chunk_overlap_tokens(self):
+        return self.chunk_overlap_tokens
+
     def get_top_k_retrieval(self):
         return self.top_k_retrieval
 
+    def get_retrieval_min_similarity(self):
+        return self.retrieval_min_similarity
+
+    def get_mmr_diversity(self):
+        return self.mmr_diversity
+
+    def get_mmr_candidates(self):
+        return self.mmr_candidates
+
     def get_default_query(self):
-        return self.default_query
\ No newline at end of file
+        return self.default_query
+
+    def get_queries(self):
+        """Queries to answer per document: from queries_file, else queries, else the default query"""
+        if self.queries_file:
+            with open(self.queries_file, encoding="utf-8") as f:
+                queries = [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+            if queries:
+                return queries
+        return list(self.queries) or [self.default_query]
\ No newline at end of file
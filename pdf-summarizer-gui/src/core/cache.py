@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from config.settings import Settings
+from .chunking import chunking_options
+
+
+def file_digest(file_path: Path, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with Path(file_path).open("rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunking_fingerprint(settings: Settings) -> str:
+    """Hash of the settings that decide how a document is split into chunks"""
+    relevant = chunking_options(settings)
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def settings_fingerprint(settings: Settings, query: str) -> str:
+    """Hash of every setting that changes the summary produced for a given file"""
+    relevant = {
+        "query": query,
+        "chunking": chunking_fingerprint(settings),
+        "top_k_retrieval": settings.get_top_k_retrieval(),
+        "retrieval": [settings.get_retrieval_min_similarity(), settings.get_mmr_diversity(),
+                      settings.get_mmr_candidates()],
+        "embedder_model": settings.get_embedder_model(),
+        "llm_model": settings.get_llm_model(),
+        "prompt_template": settings.get_prompt_template(),
+        "summary_mode": settings.get_summary_mode(),
+        "map_reduce": [
+            settings.get_map_reduce_min_chunks(), settings.get_map_reduce_fan_out(),
+            settings.get_map_reduce_depth(), settings.get_map_summary_tokens(),
+            settings.get_map_prompt_template(), settings.get_reduce_prompt_template(),
+        ],
+        "context_window": settings.get_context_window(),
+        # Both decide how much retrieved text pack_prompt fits into the prompt
+        "response_tokens": settings.get_response_tokens(),
+        "prompt_tokenizer": settings.get_prompt_tokenizer(),
+    }
+    encoded = json.dumps(relevant, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def write_json_atomic(path: Path, data):
+    """Write JSON through a temporary file so readers never see a half-written file"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+class SummaryCache:
+    """
+    Persistent summaries keyed by file content, query and the settings that shaped them,
+    stored as one JSON file per entry under output_rag/.summary_cache/.
+    """
+
+    def __init__(self, output_folder: Path, settings: Settings = None):
+        self.settings = settings or Settings()
+        self.cache_folder = Path(output_folder) / ".summary_cache"
+        self.cache_folder.mkdir(parents=True, exist_ok=True)
+        self._fingerprints = {}
+
+    def key_for(self, file_path: Path, query: str, digest: str = None) -> str:
+        """Cache key for the answer to one query about one file"""
+        if query not in self._fingerprints:
+            self._fingerprints[query] = settings_fingerprint(self.settings, query)
+        digest = digest or file_digest(file_path)
+        return hashlib.sha256((digest + self._fingerprints[query]).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_folder / f"{key}.json"
+
+    def get(self, key: str):
+        """Return the cached summary for key, or None"""
+        try:
+            entry = json.loads(self._entry_path(key).read_text(encoding="utf-8"))
+            return entry["summary"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, file_name: str, summary: str):
+        """Store a summary; failures are reported but never interrupt processing"""
+        try:
+            write_json_atomic(self._entry_path(key), {
+                "file": file_name,
+                "summary": summary,
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            })
+        except OSError as e:
+            print(f"Warning: Could not cache summary for {file_name}: {e}")
@@ -0,0 +1,62 @@
+"""
+Cooperative cancellation and pausing of a run. The GUI holds a CancellationToken and the
+pipeline stages check it between units of work (files, embedding batches, streamed tokens),
+so a run stops at a safe point instead of being killed mid-write or mid-request.
+"""
+
+import threading
+
+
+class RunCancelled(BaseException):
+    """
+    Raised inside the pipeline when the run has been cancelled. Like KeyboardInterrupt it is
+    not an Exception, so the per-file "except Exception" handlers let it through.
+    """
+
+
+class CancellationToken:
+    """
+    Shared between the thread controlling a run and the threads doing the work.
+    check() blocks while the run is paused and raises RunCancelled once it is cancelled.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # Wake anything waiting in a pause so it can see the cancellation
+        self._running.set()
+
+    def pause(self):
+        if not self._cancelled.is_set():
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def check(self):
+        """Wait out a pause, then raise RunCancelled if the run was cancelled"""
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise RunCancelled("Processing cancelled")
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to timeout seconds, waking early on cancellation; returns cancelled"""
+        return self._cancelled.wait(timeout)
+
+
+def check(token: CancellationToken = None):
+    """token.check() for code where the token is optional"""
+    if token is not None:
+        token.check()
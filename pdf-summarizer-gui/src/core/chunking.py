@@ -0,0 +1,294 @@
+"""
+Structure-preserving chunker. Pages are parsed line by line into headings and paragraphs,
+and paragraphs are packed sentence by sentence into chunks sized in tokens, with optional
+overlap between consecutive chunks of the same section. Everything is streamed and each
+piece of text is scanned a constant number of times, so the cost is linear in document size.
+"""
+
+import re
+from .streaming import chunk_pages, iter_chunks, iter_clean_text
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+")
+NUMBERED_HEADING_PATTERN = re.compile(r"^(\d+(\.\d+)*\.?|[IVXLC]+\.|[A-Z]\.)\s+\S")
+BIBLIOGRAPHY_HEADING_PATTERN = re.compile(
+    r"^(\d+(\.\d+)*\.?\s+)?(Bibliography|References|Works Cited)\s*:?$", re.IGNORECASE
+)
+PAGE_NUMBER_PATTERN = re.compile(r"^(page\s+)?\d{1,4}(\s+of\s+\d{1,4})?$", re.IGNORECASE)
+INLINE_WHITESPACE_PATTERN = re.compile(r"[ \t\f\v ]+")
+MAX_HEADING_WORDS = 12
+MAX_HEADING_LENGTH = 100
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count: words and punctuation marks"""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def is_heading(line: str) -> bool:
+    """Guess whether a stripped line is a section heading rather than running text"""
+    if len(line) > MAX_HEADING_LENGTH or line[-1] in ".,;:!?":
+        return False
+    words = line.split()
+    if len(words) > MAX_HEADING_WORDS:
+        return False
+    if NUMBERED_HEADING_PATTERN.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) >= 3 and all(c.isupper() for c in letters):
+        return True
+    capitalized = sum(1 for word in words if word[0].isupper())
+    return len(words) >= 2 and capitalized >= max(2, (len(words) * 2 + 2) // 3)
+
+
+class _Unit:
+    """A sentence (or a piece of an overlong sentence) with its token count and position"""
+
+    __slots__ = ("text", "tokens", "page", "paragraph")
+
+    def __init__(self, text: str, tokens: int, page, paragraph: int):
+        self.text = text
+        self.tokens = tokens
+        self.page = page
+        self.paragraph = paragraph
+
+
+class StructuredChunker:
+    """
+    Incremental chunker: feed pages with add_page() and collect chunks as they are completed,
+    then call finish(). Chunks are (text, page) tuples where page is the 1-based page the
+    chunk starts on, or None when the input has no page numbers.
+    """
+
+    def __init__(self, chunk_tokens: int = 256, overlap_tokens: int = 32, min_chunk_tokens: int = 8):
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.chunk_tokens // 2))
+        self.min_chunk_tokens = min_chunk_tokens
+        self.finished = False
+        self._paragraph_lines = []
+        self._page_marks = []  # (character offset in the paragraph, page) where a new page starts
+        self._paragraph_length = 0
+        self._paragraph_count = 0
+        self._units = []
+        self._unit_tokens = 0
+        self._carried = 0  # leading units of _units repeated from the previous chunk as overlap
+        self._output = []
+
+    # Parsing ---------------------------------------------------------------
+
+    def add_page(self, text: str, page=None) -> list:
+        """Parse one page (or block of text) and return any chunks completed by it"""
+        if self.finished:
+            return []
+        for raw_line in text.splitlines():
+            line = INLINE_WHITESPACE_PATTERN.sub(" ", raw_line).strip()
+            if not line:
+                self._end_paragraph()
+                continue
+            if PAGE_NUMBER_PATTERN.match(line):
+                continue
+            if BIBLIOGRAPHY_HEADING_PATTERN.match(line):
+                # Nothing after the reference list is summarized
+                self._end_paragraph()
+                self.finished = True
+                break
+            if is_heading(line) and not self._continues_sentence(line):
+                self._end_paragraph()
+                self._add_heading(line, page)
+                continue
+            self._add_line(line, page)
+        return self._take_output()
+
+    def finish(self) -> list:
+        """Flush the remaining text and return the last chunks"""
+        self._end_paragraph()
+        self._flush(keep_overlap=False)
+        self.finished = True
+        return self._take_output()
+
+    def _continues_sentence(self, line: str) -> bool:
+        # A capitalized line right after an unfinished sentence is usually wrapped text
+        return bool(self._paragraph_lines) and self._paragraph_lines[-1][-1] not in ".!?:"
+
+    def _add_line(self, line: str, page):
+        if not self._page_marks or self._page_marks[-1][1] != page:
+            self._page_marks.append((self._paragraph_length, page))
+        if self._paragraph_lines and self._paragraph_lines[-1].endswith("-") and line[0].islower():
+            # Re-join a word hyphenated across a line break
+            self._paragraph_lines[-1] = self._paragraph_lines[-1][:-1] + line
+            self._paragraph_length += len(line) - 1
+            return
+        self._paragraph_length += len(line) + (1 if self._paragraph_lines else 0)
+        self._paragraph_lines.append(line)
+
+    def _end_paragraph(self):
+        if not self._paragraph_lines:
+            return
+        paragraph = " ".join(self._paragraph_lines)
+        marks = self._page_marks
+        self._paragraph_lines = []
+        self._page_marks = []
+        self._paragraph_length = 0
+        self._paragraph_count += 1
+
+        # Lines are stripped and joined by single spaces, so every sentence boundary is one
+        # character wide and each sentence's offset (and so its page) can be tracked in step
+        offset = 0
+        mark = 0
+        for sentence in SENTENCE_BOUNDARY_PATTERN.split(paragraph):
+            while mark + 1 < len(marks) and marks[mark + 1][0] <= offset:
+                mark += 1
+            if sentence:
+                self._add_sentence(sentence, marks[mark][1])
+            offset += len(sentence) + 1
+
+    def _add_heading(self, heading: str, page):
+        # A heading starts a new chunk so sections are not mixed, unless the new text so far is
+        # tiny; then it stays with the heading, but the previous section's overlap does not
+        if self._fresh_tokens() >= self.min_chunk_tokens:
+            self._flush(keep_overlap=False)
+        else:
+            self._drop_overlap(0)
+        self._paragraph_count += 1
+        self._add_unit(_Unit(heading, count_tokens(heading), page, self._paragraph_count))
+        self._paragraph_count += 1
+
+    # Packing ---------------------------------------------------------------
+
+    def _add_sentence(self, sentence: str, page):
+        tokens = count_tokens(sentence)
+        if tokens <= self.chunk_tokens:
+            self._add_unit(_Unit(sentence, tokens, page, self._paragraph_count))
+            return
+        # Overlong sentence (tables, run-on text): cut it into word windows, the first one
+        # sized to fill the chunk in progress
+        room = self.chunk_tokens - self._unit_tokens
+        window = []
+        window_tokens = 0
+        for word in sentence.split():
+            word_tokens = count_tokens(word)
+            if window and window_tokens + word_tokens > room:
+                self._add_unit(_Unit(" ".join(window), window_tokens, page, self._paragraph_count))
+                window = []
+                window_tokens = 0
+                room = self.chunk_tokens
+            window.append(word)
+            window_tokens += word_tokens
+        if window:
+            self._add_unit(_Unit(" ".join(window), window_tokens, page, self._paragraph_count))
+
+    def _add_unit(self, unit: _Unit):
+        if self._units and self._unit_tokens + unit.tokens > self.chunk_tokens:
+            # New text too short to be a chunk of its own is carried into the next one, which
+            # may then exceed chunk_tokens by less than min_chunk_tokens
+            if self._fresh_tokens() >= self.min_chunk_tokens:
+                self._flush(keep_overlap=True)
+            self._drop_overlap(self.chunk_tokens - unit.tokens)
+        self._units.append(unit)
+        self._unit_tokens += unit.tokens
+
+    def _fresh_tokens(self) -> int:
+        """Tokens of the units not yet part of any emitted chunk"""
+        return sum(unit.tokens for unit in self._units[self._carried:])
+
+    def _drop_overlap(self, budget: int):
+        """Drop overlap units from the front until at most budget tokens are left or none remain"""
+        while self._carried and self._unit_tokens > budget:
+            self._unit_tokens -= self._units.pop(0).tokens
+            self._carried -= 1
+
+    def _flush(self, keep_overlap: bool):
+        # Only overlap left means everything was already emitted; at the end of the document
+        # any new text goes out, however short, so nothing is lost
+        if len(self._units) > self._carried:
+            self._output.append((self._render(self._units), self._units[0].page))
+
+        carried = []
+        carried_tokens = 0
+        if keep_overlap and self.overlap_tokens:
+            for unit in reversed(self._units):
+                if carried_tokens + unit.tokens > self.overlap_tokens:
+                    break
+                carried.insert(0, unit)
+                carried_tokens += unit.tokens
+        self._units = carried
+        self._unit_tokens = carried_tokens
+        self._carried = len(carried)
+
+    @staticmethod
+    def _render(units: list) -> str:
+        """Join sentences with spaces and paragraphs/headings with blank lines"""
+        parts = []
+        previous = None
+        for unit in units:
+            if previous is not None:
+                parts.append(" " if unit.paragraph == previous else "\n\n")
+            parts.append(unit.text)
+            previous = unit.paragraph
+        return "".join(parts)
+
+    def _take_output(self) -> list:
+        output, self._output = self._output, []
+        return output
+
+
+def iter_structured_chunks(pages, chunk_tokens: int = 256, overlap_tokens: int = 32, numbered: bool = True):
+    """Yield (text, page) chunks from a stream of page texts"""
+    chunker = StructuredChunker(chunk_tokens, overlap_tokens)
+    for page_number, page in enumerate(pages, start=1):
+        yield from chunker.add_page(page, page_number if numbered else None)
+        if chunker.finished:
+            break
+    yield from chunker.finish()
+
+
+def chunking_options(settings) -> dict:
+    """Picklable description of the configured chunker, passed to extraction workers"""
+    return {
+        "chunker": settings.get_chunker(),
+        "max_chunk_length": settings.get_max_chunk_length(),
+        "chunk_tokens": settings.get_chunk_tokens(),
+        "chunk_overlap_tokens": settings.get_chunk_overlap_tokens(),
+    }
+
+
+def iter_page_chunks(pages, options: dict, numbered: bool = True):
+    """Yield (text, page) chunks from a stream of pages with the configured chunker"""
+    if options["chunker"] == "legacy":
+        # The legacy chunker joins pages together, so its chunks carry no page number
+        for text in iter_chunks(iter_clean_text(pages), options["max_chunk_length"]):
+            yield text, None
+        return
+    yield from iter_structured_chunks(
+        pages, options["chunk_tokens"], options["chunk_overlap_tokens"], numbered
+    )
+
+
+def chunk_document_pages(pages, options: dict, numbered: bool = True, with_pages: bool = False):
+    """
+    Chunk a stream of pages with the configured chunker. Returns the chunks, or
+    (chunks, page numbers) with with_pages.
+    Raises ValueError when no readable text or no usable chunk remains.
+    """
+    if options["chunker"] == "legacy":
+        chunks = chunk_pages(pages, options["max_chunk_length"])
+        return (chunks, [None] * len(chunks)) if with_pages else chunks
+
+    seen_text = False
+
+    def checked():
+        nonlocal seen_text
+        for page in pages:
+            seen_text = seen_text or bool(page.strip())
+            yield page
+
+    chunks = []
+    page_numbers = []
+    for text, page in iter_page_chunks(checked(), options, numbered):
+        chunks.append(text)
+        page_numbers.append(page)
+    if not seen_text:
+        raise ValueError("No readable text found in the document.")
+    if not chunks:
+        raise ValueError("Document could not be processed into chunks.")
+    return (chunks, page_numbers) if with_pages else chunks
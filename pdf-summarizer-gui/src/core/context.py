@@ -0,0 +1,127 @@
+"""
+Token-budget context packing. Instead of cutting the joined chunks at a fixed number of
+characters, the prompt is built from the highest-scoring chunks that fit in the model's
+context window after the template, the query and the room reserved for the answer.
+"""
+
+import math
+import threading
+from config.settings import Settings
+from .chunking import SENTENCE_BOUNDARY_PATTERN, count_tokens
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+MIN_TRIMMED_TOKENS = 32  # a trimmed chunk shorter than this is not worth including
+ESTIMATE_FACTOR = 1.3  # subword tokenizers split words into ~1.3 tokens on average
+
+_tokenizers = {}
+_tokenizers_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokenizer-free estimate that errs on the high side"""
+    return math.ceil(count_tokens(text) * ESTIMATE_FACTOR)
+
+
+def get_token_counter(settings: Settings = None):
+    """
+    Return a function counting tokens for the configured LLM: its Hugging Face tokenizer
+    when one is configured and can be loaded, otherwise estimate_tokens.
+    """
+    settings = settings or Settings()
+    name = settings.get_prompt_tokenizer()
+    if not name:
+        return estimate_tokens
+
+    with _tokenizers_lock:
+        if name not in _tokenizers:
+            try:
+                # transformers is installed with sentence-transformers
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(name)
+                _tokenizers[name] = lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+            except Exception as e:
+                print(f"Warning: Could not load tokenizer '{name}', estimating token counts: {e}")
+                _tokenizers[name] = estimate_tokens
+        return _tokenizers[name]
+
+
+class PackedPrompt:
+    """A prompt built within the token budget, with an account of what went into it"""
+
+    def __init__(self, prompt: str, chunks: list, tokens_used: int, budget: int,
+                 dropped: int = 0, trimmed: bool = False):
+        self.prompt = prompt
+        self.chunks = chunks
+        self.tokens_used = tokens_used
+        self.budget = budget
+        self.dropped = dropped
+        self.trimmed = trimmed
+
+    def describe(self) -> str:
+        text = f"{self.tokens_used}/{self.budget} prompt tokens, {len(self.chunks)} chunks"
+        if self.dropped:
+            text += f", {self.dropped} dropped"
+        if self.trimmed:
+            text += ", last trimmed"
+        return text
+
+
+def _trim_to_budget(chunk: str, budget: int, count) -> str:
+    """Longest prefix of chunk ending on a sentence boundary that fits in budget tokens"""
+    kept = []
+    used = 0
+    for sentence in SENTENCE_BOUNDARY_PATTERN.split(chunk):
+        tokens = count(sentence + " ")
+        if used + tokens > budget:
+            break
+        kept.append(sentence)
+        used += tokens
+    return " ".join(kept)
+
+
+def prompt_budget(settings: Settings, template: str, query: str, count) -> int:
+    """Tokens left for context once the template, the query and the answer are accounted for"""
+    return (settings.get_context_window() - settings.get_response_tokens()
+            - count(template.format(query=query, context="")))
+
+
+def pack_prompt(query: str, ranked_chunks: list, settings: Settings = None, count=None,
+                template: str = None) -> PackedPrompt:
+    """
+    Build the prompt from chunks ordered best first, adding whole chunks while they fit.
+    When the next chunk does not fit it is trimmed at a sentence boundary to fill the
+    remaining room, and any lower-ranked chunks are dropped.
+    template defaults to the configured summary prompt template.
+    """
+    settings = settings or Settings()
+    count = count or get_token_counter(settings)
+    template = template or settings.get_prompt_template()
+
+    budget = settings.get_context_window() - settings.get_response_tokens()
+    used = count(template.format(query=query, context=""))
+    separator_tokens = count(CONTEXT_SEPARATOR)
+
+    packed = []
+    trimmed = False
+    for index, chunk in enumerate(ranked_chunks):
+        cost = count(chunk) + (separator_tokens if packed else 0)
+        if used + cost <= budget:
+            packed.append(chunk)
+            used += cost
+            continue
+
+        dropped = len(ranked_chunks) - index
+        room = budget - used - (separator_tokens if packed else 0)
+        if room >= MIN_TRIMMED_TOKENS:
+            partial = _trim_to_budget(chunk, room, count)
+            if partial:
+                used += count(partial) + (separator_tokens if packed else 0)
+                packed.append(partial)
+                trimmed = True
+                dropped -= 1
+        break
+    else:
+        dropped = 0
+
+    prompt = template.format(query=query, context=CONTEXT_SEPARATOR.join(packed))
+    return PackedPrompt(prompt, packed, used, budget, dropped, trimmed)
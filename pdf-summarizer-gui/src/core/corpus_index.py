@@ -0,0 +1,392 @@
+"""
+Folder-wide vector index over the chunk embeddings kept in the EmbeddingStore, for asking
+one question across every processed document without encoding anything again.
+
+The index lives in output_rag/.corpus_index/<model>/ as append-only segment files plus a
+manifest mapping each document to its rows. Syncing adds documents whose store entry is
+new or has changed and forgets documents that were removed; their rows are dropped when
+a segment is compacted. Search is exact over every row ("flat") or restricted to the
+nearest k-means cells ("ivf"), and vectors can be kept as int8 with a per-row scale to
+cut memory use by four.
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+import numpy as np
+from config.settings import Settings
+from .cache import write_json_atomic
+from .embedding_store import EmbeddingStore, _model_folder_name
+from .retrieval import normalize_embeddings, top_k_indices
+
+MANIFEST_VERSION = 1
+SEARCH_BLOCK_ROWS = 65536  # rows dequantized/scored at a time
+COMPACT_DEAD_FRACTION = 0.25
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_ROWS = 50000
+
+
+class CorpusHit:
+    """One chunk returned by a corpus search"""
+
+    def __init__(self, score: float, doc_id: str, source: str, path: str, page, chunk_index: int, text: str):
+        self.score = score
+        self.doc_id = doc_id
+        self.source = source
+        self.path = path
+        self.page = page
+        self.chunk_index = chunk_index
+        self.text = text
+
+    def location(self) -> str:
+        return f"{self.source}, page {self.page}" if self.page else self.source
+
+
+def quantize_rows(vectors: np.ndarray):
+    """Symmetric int8 quantization with one scale per row; returns (int8 rows, float32 scales)"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def spherical_kmeans(vectors: np.ndarray, clusters: int, iterations: int = KMEANS_ITERATIONS,
+                     seed: int = 0) -> np.ndarray:
+    """Unit-length centroids of normalized vectors, clustered by cosine similarity"""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > KMEANS_SAMPLE_ROWS:
+        vectors = vectors[rng.choice(len(vectors), KMEANS_SAMPLE_ROWS, replace=False)]
+    clusters = max(1, min(clusters, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        empty = ~np.any(sums, axis=1)
+        # Re-seed empty cells with random rows so every centroid stays in use
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize_embeddings(sums)
+    return centroids
+
+
+class CorpusIndex:
+    """Persistent index over all documents of one embedding model under an output folder"""
+
+    def __init__(self, output_folder: Path, settings: Settings = None, model_name: str = None):
+        self.settings = settings or Settings()
+        self.model_name = model_name or self.settings.get_embedder_model()
+        self.output_folder = Path(output_folder)
+        self.mode = self.settings.get_corpus_index_mode()
+        self.quantize = self.settings.get_corpus_index_quantize()
+        # float32 and int8 indexes are kept side by side so switching does not rebuild either
+        folder_name = _model_folder_name(self.model_name) + ("-int8" if self.quantize else "")
+        self.folder = self.output_folder / ".corpus_index" / folder_name
+        self.manifest = None
+        self._vectors = None
+        self._scales = None
+        self._row_owner = None   # index into self._doc_ids per row, -1 for dead rows
+        self._row_chunk = None   # chunk index within its document per row
+        self._doc_ids = []
+        self._centroids = None
+        self._lists = None       # (row order sorted by cell, cell offsets)
+
+    # Persistence -------------------------------------------------------------
+
+    def _manifest_path(self) -> Path:
+        return self.folder / "manifest.json"
+
+    def _empty_manifest(self) -> dict:
+        return {"version": MANIFEST_VERSION, "model": self.model_name, "quantized": self.quantize,
+                "segments": [], "documents": {}, "trained_rows": 0}
+
+    def load(self):
+        """Read the manifest and every segment into memory"""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        try:
+            manifest = json.loads(self._manifest_path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            manifest = None
+        if (manifest is None or manifest.get("version") != MANIFEST_VERSION
+                or manifest.get("model") != self.model_name or manifest.get("quantized") != self.quantize):
+            # Missing, outdated or built with other options: start over
+            self._clear_segments()
+            manifest = self._empty_manifest()
+        self.manifest = manifest
+        self._rebuild_arrays()
+        return self
+
+    def _clear_segments(self):
+        for path in self.folder.glob("seg-*.npy"):
+            path.unlink()
+        try:
+            (self.folder / "centroids.npy").unlink()
+        except FileNotFoundError:
+            pass
+
+    def _segment_arrays(self, name: str):
+        vectors = np.load(self.folder / f"{name}.npy")
+        scales = np.load(self.folder / f"{name}.scales.npy") if self.quantize else None
+        return vectors, scales
+
+    def _rebuild_arrays(self):
+        """Concatenate the segments and work out which document owns each row"""
+        vectors, scales, offsets = [], [], {}
+        total = 0
+        for segment in self.manifest["segments"]:
+            segment_vectors, segment_scales = self._segment_arrays(segment["name"])
+            offsets[segment["name"]] = total
+            total += len(segment_vectors)
+            vectors.append(segment_vectors)
+            if segment_scales is not None:
+                scales.append(segment_scales)
+
+        self._doc_ids = sorted(self.manifest["documents"])
+        self._row_owner = np.full(total, -1, dtype=np.int32)
+        self._row_chunk = np.zeros(total, dtype=np.int32)
+        for owner, doc_id in enumerate(self._doc_ids):
+            entry = self.manifest["documents"][doc_id]
+            start = offsets[entry["segment"]] + entry["start"]
+            self._row_owner[start:start + entry["count"]] = owner
+            self._row_chunk[start:start + entry["count"]] = np.arange(entry["count"])
+
+        dtype = np.int8 if self.quantize else np.float32
+        self._vectors = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=dtype)
+        self._scales = np.concatenate(scales) if scales else None
+        self._centroids = None
+        self._lists = None
+
+    def _write_segment(self, vectors: np.ndarray, scales: np.ndarray = None) -> str:
+        """Save a new segment; int8 rows that come with their scales are stored unchanged"""
+        name = f"seg-{uuid.uuid4().hex[:12]}"
+        if self.quantize:
+            if scales is None:
+                quantized, scales = quantize_rows(vectors)
+            else:
+                quantized = vectors
+            np.save(self.folder / f"{name}.scales.npy", scales)
+            np.save(self.folder / f"{name}.npy", quantized)
+        else:
+            np.save(self.folder / f"{name}.npy", np.ascontiguousarray(vectors, dtype=np.float32))
+        return name
+
+    def _delete_segment(self, name: str):
+        for path in (self.folder / f"{name}.npy", self.folder / f"{name}.scales.npy"):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _save_manifest(self):
+        write_json_atomic(self._manifest_path(), self.manifest)
+
+    # Updates -----------------------------------------------------------------
+
+    def sync(self, store: EmbeddingStore = None, prune_missing: bool = True) -> tuple:
+        """
+        Bring the index up to date with the embedding store: add new or re-saved documents,
+        drop documents no longer stored (or whose source file is gone, with prune_missing).
+        Returns (documents added, documents removed).
+        """
+        if self.manifest is None:
+            self.load()
+        store = store or EmbeddingStore(self.output_folder, self.model_name)
+        documents = self.manifest["documents"]
+        stored_ids = set(store.document_ids())
+
+        removed = [doc_id for doc_id in documents if doc_id not in stored_ids]
+        changed = []
+        for doc_id in sorted(stored_ids):
+            signature = store.signature(doc_id)
+            if signature is not None and documents.get(doc_id, {}).get("signature") != signature:
+                changed.append((doc_id, signature))
+
+        blocks = []
+        added_entries = {}
+        row = 0
+        for doc_id, signature in changed:
+            metadata, embeddings = store.load(doc_id)
+            if metadata is None:
+                continue
+            path = metadata.get("path")
+            if prune_missing and path and not os.path.exists(path):
+                if doc_id in documents:
+                    removed.append(doc_id)
+                continue
+            blocks.append(normalize_embeddings(embeddings))
+            added_entries[doc_id] = {
+                "signature": signature,
+                "source": metadata.get("source") or doc_id,
+                "path": path,
+                "start": row,
+                "count": len(embeddings),
+            }
+            row += len(embeddings)
+
+        if prune_missing:
+            for doc_id, entry in documents.items():
+                if doc_id not in added_entries and entry.get("path") and not os.path.exists(entry["path"]):
+                    removed.append(doc_id)
+
+        for doc_id in set(removed) | set(added_entries):
+            documents.pop(doc_id, None)
+        if blocks:
+            name = self._write_segment(np.concatenate(blocks))
+            self.manifest["segments"].append({"name": name, "rows": row})
+            for entry in added_entries.values():
+                entry["segment"] = name
+            documents.update(added_entries)
+
+        if added_entries or removed:
+            self._compact_if_needed()
+            self._save_manifest()
+            self._rebuild_arrays()
+        return len(added_entries), len(set(removed))
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Forget one document; its rows are reclaimed on the next compaction"""
+        if self.manifest is None:
+            self.load()
+        if self.manifest["documents"].pop(doc_id, None) is None:
+            return False
+        self._compact_if_needed()
+        self._save_manifest()
+        self._rebuild_arrays()
+        return True
+
+    def _compact_if_needed(self):
+        """Rewrite live rows into one segment once enough rows belong to removed documents"""
+        live = sum(entry["count"] for entry in self.manifest["documents"].values())
+        total = sum(segment["rows"] for segment in self.manifest["segments"])
+        if total == 0 or (total - live) / total < COMPACT_DEAD_FRACTION:
+            return
+
+        blocks, scale_blocks = [], []
+        row = 0
+        for doc_id in sorted(self.manifest["documents"]):
+            entry = self.manifest["documents"][doc_id]
+            vectors, scales = self._segment_arrays(entry["segment"])
+            rows = slice(entry["start"], entry["start"] + entry["count"])
+            # Quantized rows are copied with their scales; requantizing them would drift
+            blocks.append(vectors[rows])
+            if scales is not None:
+                scale_blocks.append(scales[rows])
+            entry["start"] = row
+            row += entry["count"]
+
+        old_segments = self.manifest["segments"]
+        self.manifest["segments"] = []
+        if blocks:
+            name = self._write_segment(
+                np.concatenate(blocks), np.concatenate(scale_blocks) if scale_blocks else None
+            )
+            self.manifest["segments"] = [{"name": name, "rows": row}]
+            for entry in self.manifest["documents"].values():
+                entry["segment"] = name
+        self.manifest["trained_rows"] = 0  # cells are retrained on the compacted rows
+        for segment in old_segments:
+            self._delete_segment(segment["name"])
+
+    # Search ------------------------------------------------------------------
+
+    def __len__(self):
+        return int(np.count_nonzero(self._row_owner >= 0)) if self._row_owner is not None else 0
+
+    def _ensure_cells(self):
+        """Train (or reuse) the IVF centroids and group the rows by nearest centroid"""
+        if self._lists is not None:
+            return
+        live = np.flatnonzero(self._row_owner >= 0)
+        centroids_path = self.folder / "centroids.npy"
+        trained_rows = self.manifest.get("trained_rows", 0)
+        centroids = None
+        if trained_rows and len(live) <= 2 * trained_rows:
+            try:
+                centroids = np.load(centroids_path)
+            except (OSError, ValueError):
+                centroids = None
+        if centroids is None:
+            cells = self.settings.get_corpus_ivf_lists() or int(np.sqrt(len(live))) or 1
+            centroids = spherical_kmeans(self._dense_rows(live), cells)
+            np.save(centroids_path, centroids)
+            self.manifest["trained_rows"] = len(live)
+            self._save_manifest()
+
+        assignments = np.empty(len(live), dtype=np.int32)
+        for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+            block = live[start:start + SEARCH_BLOCK_ROWS]
+            assignments[start:start + len(block)] = np.argmax(self._dense_rows(block) @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+        self._centroids = centroids
+        self._lists = (live[order], offsets)
+
+    def _dense_rows(self, rows: np.ndarray) -> np.ndarray:
+        vectors = self._vectors[rows]
+        if self._scales is not None:
+            return vectors.astype(np.float32) * self._scales[rows, None]
+        return vectors
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray:
+        if self.mode != "ivf":
+            return np.flatnonzero(self._row_owner >= 0)
+        self._ensure_cells()
+        rows, offsets = self._lists
+        probes = top_k_indices(self._centroids @ query, self.settings.get_corpus_ivf_nprobe())
+        return np.concatenate([rows[offsets[cell]:offsets[cell + 1]] for cell in probes])
+
+    def search(self, query_embedding, top_k: int = None) -> list:
+        """Best chunks across the corpus for one query vector, as CorpusHit objects, best first"""
+        if self.manifest is None:
+            self.load()
+        top_k = top_k or self.settings.get_corpus_top_k()
+        if not len(self):
+            return []
+        query = normalize_embeddings(query_embedding)[0]
+
+        candidates = self._candidate_rows(query)
+        scores = np.empty(len(candidates), dtype=np.float32)
+        for start in range(0, len(candidates), SEARCH_BLOCK_ROWS):
+            block = candidates[start:start + SEARCH_BLOCK_ROWS]
+            scores[start:start + len(block)] = self._dense_rows(block) @ query
+        best = top_k_indices(scores, top_k)
+        return self._hits(candidates[best], scores[best])
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> list:
+        store = EmbeddingStore(self.output_folder, self.model_name)
+        metadata_cache = {}
+        hits = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            doc_id = self._doc_ids[self._row_owner[row]]
+            chunk_index = int(self._row_chunk[row])
+            if doc_id not in metadata_cache:
+                metadata_cache[doc_id] = store.load(doc_id)[0] or {}
+            metadata = metadata_cache[doc_id]
+            chunks = metadata.get("chunks") or []
+            pages = metadata.get("pages") or []
+            entry = self.manifest["documents"][doc_id]
+            hits.append(CorpusHit(
+                score=score, doc_id=doc_id, source=entry["source"], path=entry.get("path"),
+                page=pages[chunk_index] if chunk_index < len(pages) else None,
+                chunk_index=chunk_index,
+                text=chunks[chunk_index] if chunk_index < len(chunks) else "",
+            ))
+        return hits
+
+
+def query_corpus(folder_path: str, question: str, top_k: int = None, settings: Settings = None,
+                 embedder=None) -> list:
+    """
+    Answer-finding across a processed folder: sync the corpus index with output_rag/ and
+    return the best matching chunks for the question
+    """
+    settings = settings or Settings()
+    output_folder = Path(folder_path) / "output_rag"
+    if not output_folder.exists():
+        raise Exception(f"No processed documents found in {folder_path}; summarize the folder first.")
+    index = CorpusIndex(output_folder, settings)
+    index.sync()
+    if embedder is None:
+        from .embedder import get_embedder
+        embedder = get_embedder(settings=settings)
+    return index.search(embedder.encode([question]), top_k)
@@ -0,0 +1,154 @@
+"""
+Discovery of the files to summarize. The input folder is walked with os.scandir, optionally
+recursively, and supported files are yielded as soon as they are found, so processing starts
+before a large tree has been walked. Include/exclude patterns and a symlink policy decide
+what is visited; a file reached twice (hard links, symlinks) or with the same contents as a
+file already found is yielded only once.
+"""
+
+import fnmatch
+import os
+from pathlib import Path
+from config.settings import Settings
+from .cache import file_digest
+
+SUPPORTED_SUFFIXES = (".pdf", ".txt")
+OUTPUT_FOLDER_NAME = "output_rag"
+SYMLINK_POLICIES = ("skip", "files", "follow")
+
+
+def _matches(patterns: list, name: str, relative: str) -> bool:
+    """Case-insensitive match of the entry name or its path below the input folder"""
+    name, relative = name.lower(), relative.lower()
+    return any(fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(relative, pattern)
+               for pattern in patterns)
+
+
+class FileDiscovery:
+    """
+    Iterate over the supported files below a folder, depth first and sorted by name within
+    each directory. Our own output_rag folders are never entered. found counts the files
+    yielded so far and duplicates lists (duplicate, file kept) pairs of skipped files.
+
+    symlink_policy "skip" ignores symbolic links, "files" follows links to files but not
+    to directories, and "follow" also walks linked directories, each directory at most once.
+    """
+
+    def __init__(self, folder: Path, settings: Settings = None, recursive: bool = None,
+                 digests: dict = None):
+        settings = settings or Settings()
+        self.folder = Path(folder)
+        self.recursive = settings.get_recursive_discovery() if recursive is None else recursive
+        self.include = [pattern.lower() for pattern in settings.get_include_patterns()]
+        self.exclude = [pattern.lower() for pattern in settings.get_exclude_patterns()]
+        self.symlink_policy = settings.get_symlink_policy()
+        if self.symlink_policy not in SYMLINK_POLICIES:
+            print(f"Warning: Unknown symlink policy '{self.symlink_policy}', using 'files'")
+            self.symlink_policy = "files"
+        self.deduplicate = settings.get_deduplicate_files()
+        self.found = 0
+        self.duplicates = []
+        self._seen_files = set()    # (st_dev, st_ino) of every file yielded
+        self._seen_folders = set()  # (st_dev, st_ino) of every directory walked
+        self._by_size = {}          # size -> [[path, digest or None]] for content comparison
+        # (path, size, mtime_ns) -> content digest; pass the same dict to later walks of the
+        # folder (as the watcher does) so unchanged files are not hashed again
+        self.digests = {} if digests is None else digests
+
+    def __iter__(self):
+        folders = [(self.folder, "")]
+        while folders:
+            folder, relative = folders.pop()
+            subfolders = []
+            for entry in self._entries(folder):
+                entry_relative = f"{relative}{entry.name}"
+                if entry.is_symlink() and self.symlink_policy == "skip":
+                    continue
+                if self.exclude and _matches(self.exclude, entry.name, entry_relative):
+                    continue
+                try:
+                    if entry.is_dir():
+                        if self.recursive and entry.name != OUTPUT_FOLDER_NAME:
+                            if entry.is_symlink() and self.symlink_policy != "follow":
+                                continue
+                            subfolders.append((Path(entry.path), f"{entry_relative}/"))
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                file_path = self._accept(entry, entry_relative)
+                if file_path is not None:
+                    self.found += 1
+                    yield file_path
+            # Reversed so the stack walks subfolders in name order
+            folders.extend(reversed(subfolders))
+
+    def _entries(self, folder: Path) -> list:
+        """Entries of a directory sorted by name; empty if it was already walked or cannot be read"""
+        try:
+            stat = folder.stat()
+            key = (stat.st_dev, stat.st_ino)
+            if key in self._seen_folders:
+                return []
+            self._seen_folders.add(key)
+            with os.scandir(folder) as entries:
+                return sorted(entries, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Warning: Could not scan {folder}: {e}")
+            return []
+
+    def _accept(self, entry, relative: str):
+        """The file's path, or None when it is unsupported, not included or a duplicate"""
+        if not entry.name.lower().endswith(SUPPORTED_SUFFIXES):
+            return None
+        if not _matches(self.include, entry.name, relative):
+            return None
+        try:
+            stat = entry.stat()
+            if not stat.st_ino:
+                # DirEntry.stat() leaves the inode number at 0 on Windows
+                stat = os.stat(entry.path)
+        except OSError:
+            return None
+        key = (stat.st_dev, stat.st_ino)
+        if key in self._seen_files:
+            return None
+        self._seen_files.add(key)
+
+        file_path = Path(entry.path)
+        if self.deduplicate:
+            original = self._same_contents(file_path, stat.st_size)
+            if original is not None:
+                self.duplicates.append((file_path, original))
+                return None
+        return file_path
+
+    def _same_contents(self, file_path: Path, size: int):
+        """
+        A file found earlier with identical contents, or None. Files are only hashed once
+        another file of the same size turns up, so most files are never read here.
+        """
+        group = self._by_size.setdefault(size, [])
+        if not group:
+            group.append([file_path, None])
+            return None
+        try:
+            digest = self._digest(file_path)
+            for member in group:
+                if member[1] is None:
+                    member[1] = self._digest(member[0])
+                if member[1] == digest:
+                    return member[0]
+        except OSError:
+            # Let extraction report unreadable files
+            return None
+        group.append([file_path, digest])
+        return None
+
+    def _digest(self, file_path: Path) -> str:
+        stat = file_path.stat()
+        key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+        if key not in self.digests:
+            self.digests[key] = file_digest(file_path)
+        return self.digests[key]
@@ -0,0 +1,101 @@
+import gc
+import threading
+from collections import OrderedDict
+from config.settings import Settings
+
+
+# Loaded SentenceTransformer instances keyed by (model_name, device), most recently used last
+_embedders = OrderedDict()
+_lock = threading.RLock()
+
+
+def _resolve(model_name: str = None, device: str = None, settings: Settings = None):
+    """Fill in model name and device from Settings when not given explicitly"""
+    if model_name is None or device is None:
+        settings = settings or Settings()
+        if model_name is None:
+            model_name = settings.get_embedder_model()
+        if device is None:
+            device = settings.get_embedder_device()
+    return model_name, device
+
+
+def _load_embedder(model_name: str, device: str):
+    """Load a SentenceTransformer model; imported lazily because torch is slow to import"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device=device)
+
+
+def _release_memory():
+    """Give freed model weights back to the allocator"""
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
+
+
+def get_embedder(model_name: str = None, device: str = None, settings: Settings = None):
+    """
+    Return a shared embedder for (model_name, device), loading it on first use.
+    Least recently used models are unloaded once more than the configured number are cached.
+    """
+    settings = settings or Settings()
+    model_name, device = _resolve(model_name, device, settings)
+    key = (model_name, device)
+
+    with _lock:
+        embedder = _embedders.get(key)
+        if embedder is not None:
+            _embedders.move_to_end(key)
+            return embedder
+
+        try:
+            embedder = _load_embedder(model_name, device)
+        except Exception as e:
+            raise Exception(f"Could not load embedding model {model_name}: {str(e)}")
+
+        _embedders[key] = embedder
+        evicted = False
+        while len(_embedders) > max(1, settings.get_max_cached_embedders()):
+            old_key, _ = _embedders.popitem(last=False)
+            print(f"Unloading embedding model {old_key[0]} ({old_key[1]})")
+            evicted = True
+        if evicted:
+            _release_memory()
+        return embedder
+
+
+def warm_up_embedder(settings: Settings = None) -> bool:
+    """Load the configured embedder ahead of the first document and run a tiny encode"""
+    try:
+        embedder = get_embedder(settings=settings)
+        embedder.encode(["warm-up"])
+        return True
+    except Exception as e:
+        print(f"Warning: Embedder warm-up failed: {e}")
+        return False
+
+
+def sync_embedders(settings: Settings = None):
+    """Unload every cached model that no longer matches the model configured in Settings"""
+    model_name, device = _resolve(settings=settings)
+    unload_embedders(keep=(model_name, device))
+
+
+def unload_embedders(keep=None):
+    """Unload cached embedders, optionally keeping a single (model_name, device) entry"""
+    with _lock:
+        removed = [key for key in _embedders if key != keep]
+        for key in removed:
+            del _embedders[key]
+    if removed:
+        _release_memory()
+
+
+def cached_embedders() -> list:
+    """List the (model_name, device) keys currently loaded"""
+    with _lock:
+        return list(_embedders.keys())
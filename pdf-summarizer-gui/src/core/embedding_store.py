@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+import numpy as np
+from .cache import write_json_atomic
+
+
+def chunk_hash(chunk: str) -> str:
+    """Stable identifier for a chunk's text"""
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def _model_folder_name(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+
+
+class EmbeddingStore:
+    """
+    Persistent chunk embeddings for one embedding model, stored per document as a float32
+    .npy matrix (opened memory-mapped) next to a JSON sidecar holding the chunk texts
+    and their hashes. Rows are matched by chunk hash, so only new or edited chunks
+    need to be encoded again.
+
+    Each save writes a new versioned .npy and then switches the sidecar to it, so a
+    matrix that is still memory-mapped is never overwritten (Windows refuses to replace
+    a mapped file); superseded versions are deleted once nothing maps them.
+    """
+
+    def __init__(self, root_folder: Path, model_name: str):
+        self.model_name = model_name
+        self.folder = Path(root_folder) / ".embeddings" / _model_folder_name(model_name)
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def document_id(source: str) -> str:
+        """Store key for a document, derived from its path or another stable name"""
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+
+    def _sidecar_path(self, doc_id: str) -> Path:
+        return self.folder / f"{doc_id}.json"
+
+    def _vectors_path(self, doc_id: str, metadata: dict) -> Path:
+        # Sidecars written before versioning name no file and use the unversioned one
+        return self.folder / metadata.get("vectors", f"{doc_id}.npy")
+
+    def _vector_files(self, doc_id: str) -> list:
+        """Every .npy version stored for a document, including superseded ones"""
+        return [self.folder / f"{doc_id}.npy"] + list(self.folder.glob(f"{doc_id}.*.npy"))
+
+    def _remove_stale_vectors(self, doc_id: str, keep: str = None):
+        for path in self._vector_files(doc_id):
+            if path.name == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                # Missing, or still memory-mapped somewhere (Windows); retried on the next save
+                pass
+
+    def load(self, doc_id: str):
+        """Return (metadata, memory-mapped embeddings) for a stored document, or (None, None)"""
+        try:
+            metadata = json.loads(self._sidecar_path(doc_id).read_text(encoding="utf-8"))
+            embeddings = np.load(self._vectors_path(doc_id, metadata), mmap_mode="r")
+        except (OSError, ValueError):
+            return None, None
+        if metadata.get("model") != self.model_name or len(metadata.get("hashes", [])) != len(embeddings):
+            return None, None
+        return metadata, embeddings
+
+    def load_indexed(self, doc_id: str, file_digest: str, chunking: str):
+        """
+        Return (chunks, embeddings) stored for a document whose file content and chunking
+        settings are unchanged, so it needs neither extraction nor encoding; else (None, None).
+        """
+        metadata, stored = self.load(doc_id)
+        if metadata is None or metadata.get("file_digest") != file_digest or metadata.get("chunking") != chunking:
+            return None, None
+        return metadata["chunks"], stored
+
+    def lookup(self, doc_id: str, chunks: list):
+        """
+        Find stored embeddings for the chunks.
+        Returns (embeddings, missing) where missing lists the indices still to be encoded;
+        embeddings is None when nothing usable is stored.
+        """
+        metadata, stored = self.load(doc_id)
+        if metadata is None:
+            return None, list(range(len(chunks)))
+
+        hashes = [chunk_hash(chunk) for chunk in chunks]
+        if hashes == metadata["hashes"]:
+            # Unchanged document: hand out the memory-mapped matrix as is
+            return stored, []
+
+        rows = {stored_hash: row for row, stored_hash in enumerate(metadata["hashes"])}
+        embeddings = np.zeros((len(chunks), stored.shape[1]), dtype=np.float32)
+        missing = []
+        for i, hash_value in enumerate(hashes):
+            row = rows.get(hash_value)
+            if row is None:
+                missing.append(i)
+            else:
+                embeddings[i] = stored[row]
+        del stored
+        return embeddings, missing
+
+    def save(self, doc_id: str, chunks: list, embeddings: np.ndarray, source: str = None,
+             file_digest: str = None, chunking: str = None, pages: list = None, path: str = None):
+        """Replace the stored embeddings of a document, with the page each chunk starts on if known"""
+        sidecar_path = self._sidecar_path(doc_id)
+        try:
+            version = json.loads(sidecar_path.read_text(encoding="utf-8")).get("version", 0) + 1
+        except (OSError, ValueError, AttributeError, TypeError):
+            version = 1
+        vectors_name = f"{doc_id}.{version}.npy"
+        tmp_path = self.folder / f"{doc_id}.{version}.tmp.npy"
+        try:
+            np.save(tmp_path, np.ascontiguousarray(embeddings, dtype=np.float32))
+            # A fresh name, so this never replaces a file that is memory-mapped
+            os.replace(tmp_path, self.folder / vectors_name)
+            write_json_atomic(sidecar_path, {
+                "model": self.model_name,
+                "version": version,
+                "vectors": vectors_name,
+                "source": source,
+                "path": path,
+                "file_digest": file_digest,
+                "chunking": chunking,
+                "hashes": [chunk_hash(chunk) for chunk in chunks],
+                "chunks": chunks,
+                "pages": pages,
+            })
+        except OSError as e:
+            print(f"Warning: Could not store embeddings for {source or doc_id}: {e}")
+            return
+        self._remove_stale_vectors(doc_id, keep=vectors_name)
+
+    def document_ids(self) -> list:
+        """Ids of every stored document"""
+        return sorted(path.stem for path in self.folder.glob("*.json"))
+
+    def signature(self, doc_id: str):
+        """(size, mtime_ns) of a document's sidecar, which changes whenever it is saved; None if missing"""
+        try:
+            stat = self._sidecar_path(doc_id).stat()
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def remove(self, doc_id: str):
+        try:
+            self._sidecar_path(doc_id).unlink()
+        except FileNotFoundError:
+            pass
+        self._remove_stale_vectors(doc_id)
@@ -0,0 +1,412 @@
+import itertools
+import multiprocessing
+import os
+import time
+from collections import deque
+from pathlib import Path
+import PyPDF2
+from config.settings import Settings
+from .chunking import chunking_options, chunk_document_pages
+from .cancellation import RunCancelled, check
+
+TEXT_BLOCK_SIZE = 64 * 1024  # characters per piece when streaming a .txt file
+CANCEL_POLL_SECONDS = 0.2  # how often a wait on a worker checks for cancellation
+READY_POLL_SECONDS = 0.05  # how often an unordered extract() looks for the next finished file
+
+
+def _iter_reader_pages(reader, file_name: str, start: int, stop: int):
+    """
+    Lazily extract the text of pages [start, stop) from an open PdfReader.
+    Empty or unreadable pages yield "" so consumers can count page numbers.
+    """
+    for page_num in range(start, stop):
+        try:
+            yield reader.pages[page_num].extract_text() or ""
+        except Exception as e:
+            print(f"Warning: Could not extract text from page {page_num + 1} of {file_name}: {e}")
+            yield ""
+
+
+def iter_pdf_pages(file_path: Path, start: int = 0, stop: int = None):
+    """Yield the text of each page in a page range of a PDF as it is parsed"""
+    with Path(file_path).open("rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = len(reader.pages)
+        stop = page_count if stop is None else min(stop, page_count)
+        yield from _iter_reader_pages(reader, Path(file_path).name, start, stop)
+
+
+def read_pdf_pages(file_path: Path, start: int = 0, stop: int = None) -> list:
+    """Read the text of a page range of a PDF"""
+    return list(iter_pdf_pages(file_path, start, stop))
+
+
+def iter_text_blocks(file_path: Path, block_size: int = TEXT_BLOCK_SIZE):
+    """Yield a text file in blocks of roughly block_size characters, split at line ends"""
+    block = []
+    block_length = 0
+    with Path(file_path).open("r", encoding="utf-8") as f:
+        for line in f:
+            block.append(line)
+            block_length += len(line)
+            if block_length >= block_size:
+                yield "".join(block)
+                block = []
+                block_length = 0
+    if block:
+        yield "".join(block)
+
+
+def iter_pages(file_path: Path):
+    """Yield the text of a PDF page by page, or of a TXT file block by block"""
+    suffix = file_path.suffix.lower()
+    if suffix == ".txt":
+        return iter_text_blocks(file_path)
+    elif suffix == ".pdf":
+        return iter_pdf_pages(file_path)
+    raise ValueError(f"Unsupported file type: {file_path.suffix}. Supported types: .pdf, .txt")
+
+
+def count_pdf_pages(file_path: Path) -> int:
+    """Number of pages in a PDF"""
+    with Path(file_path).open("rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def _join_pdf_pages(file_path: Path, page_texts) -> str:
+    text = "".join(page_text + "\n" for page_text in page_texts if page_text)
+    if not text.strip():
+        raise ValueError(f"No text could be extracted from PDF: {file_path.name}")
+    return text
+
+
+def read_file(file_path: Path) -> str:
+    """Read text content from PDF or TXT files with better error handling"""
+    try:
+        if file_path.suffix.lower() == ".txt":
+            return file_path.read_text(encoding="utf-8")
+        elif file_path.suffix.lower() == ".pdf":
+            return _join_pdf_pages(file_path, iter_pdf_pages(file_path))
+        else:
+            raise ValueError(f"Unsupported file type: {file_path.suffix}. Supported types: .pdf, .txt")
+    except Exception as e:
+        raise Exception(f"Error reading file {file_path.name}: {str(e)}")
+
+
+def chunk_page_stream(file_path: Path, pages, options: dict, timings: dict = None) -> tuple:
+    """
+    Clean and chunk pages as they are read, so only the current page and the chunk being
+    built are held in memory. Returns (chunks, page number of each chunk). Reading problems raise Exception("Error reading file ...");
+    documents with nothing usable raise ValueError, as prepare_chunks does.
+    A timings dict receives the seconds spent reading and chunking and the page count.
+    """
+    has_text = False
+    read_seconds = 0.0
+    page_count = 0
+    started = time.perf_counter()
+
+    def checked_pages():
+        nonlocal has_text, read_seconds, page_count
+        page_iterator = iter(pages)
+        try:
+            while True:
+                read_started = time.perf_counter()
+                page = next(page_iterator, None)
+                read_seconds += time.perf_counter() - read_started
+                if page is None:
+                    return
+                page_count += 1
+                has_text = has_text or bool(page.strip())
+                yield page
+        except multiprocessing.TimeoutError:
+            raise
+        except Exception as e:
+            # Not a ValueError, so it is not mistaken for an empty document
+            raise Exception(f"Error reading file {file_path.name}: {str(e)}")
+
+    try:
+        # Text files are streamed in blocks, so only PDF pages carry meaningful numbers
+        numbered = file_path.suffix.lower() == ".pdf"
+        return chunk_document_pages(checked_pages(), options, numbered, with_pages=True)
+    except ValueError:
+        if file_path.suffix.lower() == ".pdf" and not has_text:
+            raise Exception(f"Error reading file {file_path.name}: No text could be extracted from PDF: {file_path.name}")
+        raise
+    finally:
+        if timings is not None:
+            timings["read"] = read_seconds
+            timings["chunk"] = time.perf_counter() - started - read_seconds
+            timings["pages"] = page_count if numbered else 0
+
+
+def read_chunks(file_path: Path, options: dict, timings: dict = None) -> tuple:
+    """Stream a file page by page straight into chunks; returns (chunks, page numbers)"""
+    try:
+        pages = iter_pages(file_path)
+    except ValueError as e:
+        raise Exception(f"Error reading file {file_path.name}: {str(e)}")
+    return chunk_page_stream(file_path, pages, options, timings)
+
+
+def _read_chunks_task(file_path: str, options: dict) -> tuple:
+    # Worker-side entry point; paths travel between processes as strings
+    timings = {}
+    chunks, pages = read_chunks(Path(file_path), options, timings)
+    return chunks, pages, timings
+
+
+def _read_pages_task(file_path: str, start: int, stop: int) -> tuple:
+    started = time.perf_counter()
+    try:
+        return read_pdf_pages(Path(file_path), start, stop), time.perf_counter() - started
+    except Exception as e:
+        raise Exception(f"Error reading file {Path(file_path).name}: {str(e)}")
+
+
+class ExtractedDocument:
+    """
+    One file coming out of the extractor: its chunks and the page each starts on, a read
+    error (the file is skipped), or a notice when the file was read but held nothing usable.
+    timings holds the seconds spent reading and chunking it and its page count.
+    """
+
+    def __init__(self, file_path: Path, chunks: list = None, error: str = None, notice: str = None,
+                 pages: list = None, timings: dict = None):
+        self.file_path = file_path
+        self.chunks = chunks
+        self.pages = pages
+        self.timings = timings or {}
+        self.error = error
+        self.notice = notice
+
+
+class QueuedFile:
+    """
+    A file handed to the worker pool: its tasks (None when skipped), whether it was split
+    into page ranges, and the time its first task reached a worker, which its timeout
+    counts from.
+    """
+
+    def __init__(self, file_path: Path, tasks: list = None, split: bool = False):
+        self.file_path = file_path
+        self.tasks = tasks
+        self.split = split
+        self.started = None
+
+    def deadline(self, timeout: float):
+        return None if self.started is None else self.started + timeout
+
+
+class TextExtractor:
+    """
+    Read and chunk files in a process pool, yielding an ExtractedDocument per file in input
+    order, or in the order the files finish.
+    Workers stream each file page by page into chunks, so only chunks cross the process
+    boundary. Large PDFs are split into page ranges so a single manual uses several workers,
+    and a file that exceeds the timeout is reported as failed without stalling the rest.
+    The pool stays alive between extract() calls until close() is called.
+    """
+
+    def __init__(self, workers: int = None, timeout: float = None, settings: Settings = None):
+        settings = settings or Settings()
+        self.workers = settings.get_extraction_workers() if workers is None else workers
+        self.timeout = settings.get_extraction_timeout() if timeout is None else timeout
+        self.pages_per_task = max(1, settings.get_pdf_pages_per_task())
+        self.split_min_bytes = settings.get_pdf_split_min_bytes()
+        self.chunking = chunking_options(settings)
+        self._pool = None
+        self._cancel_token = None
+
+    def extract(self, files, skip=None, cancel_token=None, ordered: bool = True):
+        """
+        Yield an ExtractedDocument for each file, in the order given or, if not ordered, as
+        soon as any queued file is finished, so a slow file does not hold up the ones after it.
+        Files for which skip(file_path) is true pass through without chunks.
+        With a cancel_token, no new file is queued while it is paused, and cancelling raises
+        RunCancelled and terminates the workers instead of waiting for them.
+        """
+        skip = skip or (lambda file_path: False)
+        self._cancel_token = cancel_token
+        if self.workers <= 0:
+            yield from self._extract_in_process(files, skip)
+            return
+
+        files = iter(files)
+        pending = deque()
+        lookahead = self.workers * 2
+        try:
+            self._fill(pending, files, lookahead, skip)
+            while pending:
+                check(cancel_token)
+                self._mark_started(pending)
+                index = 0 if ordered else self._next_ready(pending)
+                queued = pending[index]
+                del pending[index]
+                file_path = queued.file_path
+                if queued.tasks is None:
+                    document = ExtractedDocument(file_path)
+                else:
+                    try:
+                        chunks, pages, timings = self._collect(queued)
+                        document = ExtractedDocument(file_path, chunks=chunks, pages=pages, timings=timings)
+                    except multiprocessing.TimeoutError:
+                        # The stuck worker cannot be interrupted; replace the pool and requeue the rest
+                        self._restart_pool()
+                        for requeued in pending:
+                            if requeued.tasks is not None:
+                                requeued.tasks, requeued.split = self._submit(requeued.file_path)
+                                requeued.started = None
+                        document = ExtractedDocument(
+                            file_path, error=f"Error reading file {file_path.name}: Timed out after {self.timeout} seconds"
+                        )
+                    except ValueError as e:
+                        document = ExtractedDocument(file_path, notice=f"Error: {str(e)}")
+                    except Exception as e:
+                        document = ExtractedDocument(file_path, error=str(e))
+                yield document
+                check(cancel_token)
+                self._fill(pending, files, lookahead, skip)
+        finally:
+            if pending:
+                # Abandoned early: do not wait for queued work
+                self._restart_pool()
+
+    def _extract_in_process(self, files, skip):
+        for file_path in files:
+            check(self._cancel_token)
+            if skip(file_path):
+                document = ExtractedDocument(file_path)
+            else:
+                try:
+                    timings = {}
+                    chunks, pages = read_chunks(file_path, self.chunking, timings)
+                    document = ExtractedDocument(file_path, chunks=chunks, pages=pages, timings=timings)
+                except ValueError as e:
+                    document = ExtractedDocument(file_path, notice=f"Error: {str(e)}")
+                except Exception as e:
+                    document = ExtractedDocument(file_path, error=str(e))
+            yield document
+
+    def _fill(self, pending: deque, files, lookahead: int, skip):
+        while len(pending) < lookahead:
+            file_path = next(files, None)
+            if file_path is None:
+                return
+            if skip(file_path):
+                pending.append(QueuedFile(file_path))
+            else:
+                pending.append(QueuedFile(file_path, *self._submit(file_path)))
+
+    def _submit(self, file_path: Path) -> tuple:
+        """Queue a file as one task, or as page-range tasks for a large PDF; returns (tasks, split)"""
+        pool = self._get_pool()
+        if file_path.suffix.lower() == ".pdf":
+            try:
+                if os.path.getsize(file_path) >= self.split_min_bytes:
+                    page_count = count_pdf_pages(file_path)
+                    if page_count > self.pages_per_task:
+                        tasks = [
+                            pool.apply_async(_read_pages_task, (str(file_path), start, start + self.pages_per_task))
+                            for start in range(0, page_count, self.pages_per_task)
+                        ]
+                        return tasks, True
+            except Exception:
+                # Let the worker report the real error for unreadable files
+                pass
+        return [pool.apply_async(_read_chunks_task, (str(file_path), self.chunking))], False
+
+    def _mark_started(self, pending: deque):
+        """
+        Stamp the files whose tasks have reached a worker. The pool runs tasks in the order
+        they were queued, so the first self.workers unfinished tasks are the running ones.
+        """
+        now = time.monotonic()
+        running = 0
+        for queued in pending:
+            if running >= self.workers:
+                return
+            if queued.tasks is None:
+                continue
+            unfinished = sum(not task.ready() for task in queued.tasks)
+            if unfinished and queued.started is None:
+                queued.started = now
+            running += unfinished
+
+    def _next_ready(self, pending: deque) -> int:
+        """
+        Position of the first queued file whose tasks have all finished, or of a file that
+        has been running for more than self.timeout seconds, so _collect reports it as timed
+        out. Each file's deadline counts from when it reached a worker, however many other
+        files finish meanwhile.
+        """
+        while True:
+            self._mark_started(pending)
+            now = time.monotonic()
+            for index, queued in enumerate(pending):
+                if queued.tasks is None or all(task.ready() for task in queued.tasks):
+                    return index
+                deadline = queued.deadline(self.timeout)
+                if deadline is not None and deadline <= now:
+                    return index
+            if self._cancel_token is not None and self._cancel_token.cancelled:
+                raise RunCancelled("Processing cancelled")
+            oldest = next((task for task in pending[0].tasks if not task.ready()), None)
+            if oldest is not None:
+                oldest.wait(READY_POLL_SECONDS)
+
+    def _collect(self, queued: QueuedFile) -> tuple:
+        """Wait for a file's tasks, giving the whole file at most self.timeout seconds from its start"""
+        if queued.started is None:
+            # Nothing queued before it is left, so it is running now at the latest
+            queued.started = time.monotonic()
+        deadline = queued.deadline(self.timeout)
+        tasks = queued.tasks
+        if not queued.split:
+            return self._wait(tasks[0], deadline)
+
+        # Chunk each page range as soon as it arrives instead of joining the whole document
+        worker_read_seconds = []
+
+        def page_ranges():
+            for task in tasks:
+                range_pages, seconds = self._wait(task, deadline)
+                worker_read_seconds.append(seconds)
+                yield range_pages
+
+        timings = {}
+        chunks, pages = chunk_page_stream(
+            queued.file_path, itertools.chain.from_iterable(page_ranges()), self.chunking, timings
+        )
+        # Reading happened in parallel in the workers; report their total instead of our wait
+        timings["read"] = sum(worker_read_seconds)
+        return chunks, pages, timings
+
+    def _wait(self, task, deadline: float):
+        """task.get() until the deadline, waking regularly so a cancellation is seen promptly"""
+        while not task.ready():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise multiprocessing.TimeoutError()
+            if self._cancel_token is not None and self._cancel_token.cancelled:
+                raise RunCancelled("Processing cancelled")
+            task.wait(min(remaining, CANCEL_POLL_SECONDS))
+        return task.get(timeout=0)
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn avoids forking a process that already holds torch and GUI threads
+            context = multiprocessing.get_context("spawn")
+            self._pool = context.Pool(processes=self.workers)
+        return self._pool
+
+    def _restart_pool(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def close(self):
+        """Shut the worker processes down"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
@@ -1,63 +1,164 @@
+import itertools
 from pathlib import Path
-import pandas as pd
-from .summarizer import read_file, rag_summarize
+from config.settings import Settings
+from .embedder import get_embedder, sync_embedders
+from .pipeline import SummaryPipeline
+from .corpus_index import CorpusIndex
+from .journal import JobJournal
+from .discovery import FileDiscovery
+from .output_sink import SummarySink
+from .cancellation import RunCancelled
+from .profiling import RunProfiler, run_with_cprofile
 
 
-def process_files(folder_path: str) -> bool:
+def pending_files(files, journal: JobJournal, sink: SummarySink):
     """
-    Process all supported files in the specified folder and generate summaries.
-    This is the main function called from the GUI.
+    The files still to process. Files finished before an interruption are left out and
+    their journalled rows go straight to the outputs.
     """
+    for file_path in files:
+        if journal is not None and journal.is_done(file_path):
+            row = journal.take_row(file_path)
+            if row is not None:
+                sink.write(*row)
+            continue
+        yield file_path
+
+
+def describe_duplicates(discovery: FileDiscovery, limit: int = 5) -> str:
+    """Progress line naming the files skipped because another file has the same contents"""
+    names = [path.relative_to(discovery.folder).as_posix() for path, _ in discovery.duplicates[:limit]]
+    more = len(discovery.duplicates) - len(names)
+    return (f"Skipped {len(discovery.duplicates)} files with the same contents as another file: "
+            f"{', '.join(names)}{f' and {more} more' if more else ''}")
+
+
+def update_corpus_index(output_folder: Path, settings: Settings, progress_callback):
+    """Fold newly stored embeddings into the folder-wide index; failures only warn"""
     try:
-        input_folder = Path(folder_path)
-        output_folder = input_folder / "output_rag"
-        output_folder.mkdir(exist_ok=True)
-        
-        query = "Summarize the key points of this document or the main argument."
-        
-        files = list(input_folder.glob("*.txt")) + list(input_folder.glob("*.pdf")) + list(input_folder.glob("*.PDF"))
-        
-        if not files:
-            print("No supported files found in the input folder.")
-            return False
-        
-        results = []
-        for file in files:
-            print(f"\nProcessing file: {file.name} with RAG.")
-            result = process_file(file, output_folder, query)
-            if result:
-                results.append(result)
-        
-        if results:
-            df = pd.DataFrame(results, columns=["Filename", "Summary"])
-            excel_path = output_folder / "summaries.xlsx"
-            df.to_excel(excel_path, index=False)
-            print(f"\nAll summaries saved to {excel_path}")
-            return True
-        
-        return False
+        added, removed = CorpusIndex(output_folder, settings).sync()
+        if added or removed:
+            progress_callback(97, f"Corpus index updated: {added} added, {removed} removed")
     except Exception as e:
-        print(f"Error processing files: {e}")
-        return False
+        print(f"Warning: Could not update corpus index: {e}")
+
 
+def write_run_report(profiler: RunProfiler, output_folder: Path, settings: Settings,
+                     progress_callback):
+    """Log the stage totals and, if enabled, save run_report.json/.csv"""
+    progress_callback(98, profiler.summary_text())
+    if not settings.get_write_run_report():
+        return
+    try:
+        profiler.write_reports(output_folder)
+    except Exception as e:
+        print(f"Warning: Could not write run report: {e}")
 
-def process_file(file_path: Path, output_folder: Path, query: str):
+
+def process_folder(folder_path: str, settings: Settings = None, recursive: bool = None,
+                   progress_callback=None, file_callback=None, token_callback=None,
+                   stats_callback=None, cancel_token=None) -> tuple:
     """
-    Process a file using RAG: read the file, summarize it,
-    save the summary as a .txt file, and return (filename, summary).
+    Summarize every supported file in a folder through the shared pipeline.
+    Used by the GUI thread, the command line and process_files; returns (success, message).
+    Files are processed while the folder is still being walked; recursive None follows the
+    recursive_discovery setting.
+    Rows are streamed to summaries.xlsx (and any other configured output) as files finish,
+    so a cancelled run still leaves the outputs for the files that finished.
     """
+    settings = settings or Settings()
+    progress_callback = progress_callback or (lambda percentage, message: print(f"[{percentage:3d}%] {message}"))
+
+    input_folder = Path(folder_path)
+    output_folder = input_folder / "output_rag"
+    output_folder.mkdir(exist_ok=True)
+
+    discovery = FileDiscovery(input_folder, settings, recursive)
+    files = iter(discovery)
+    first = next(files, None)
+    if first is None:
+        return False, "No supported files (PDF or TXT) found in the selected folder."
+    files = itertools.chain([first], files)
+
+    progress_callback(0, f"Processing files in {input_folder} as they are found...")
+
+    # Reuse one embedder for the whole batch, dropping any model no longer configured
+    sync_embedders(settings)
     try:
-        text = read_file(file_path)
+        embedder = get_embedder(settings=settings)
     except Exception as e:
-        print(f"Error reading {file_path.name}: {e}")
-        return None
+        return False, str(e)
 
+    journal = None
+    if settings.get_use_job_journal():
+        # Finished files are journalled as they complete, so an interrupted run picks up here
+        journal = JobJournal(output_folder, settings)
+        done = journal.open()
+        if done:
+            progress_callback(0, f"Resuming interrupted run: {done} files already done")
+
+    pipeline = SummaryPipeline(
+        output_folder, settings=settings, embedder=embedder, queries=settings.get_queries(),
+        progress_callback=progress_callback, file_callback=file_callback,
+        base_folder=input_folder, token_callback=token_callback, stats_callback=stats_callback,
+        journal=journal, cancel_token=cancel_token
+    )
+    sink = SummarySink(output_folder, pipeline.result_columns(), settings)
+    pipeline.sink = sink
+    pending = pending_files(files, journal, sink)
+    cancelled = False
     try:
-        answer = rag_summarize(text, query)
-        output_file = output_folder / f"{file_path.stem}_rag_answer.txt"
-        output_file.write_text(answer, encoding="utf-8")
-        print(f"RAG answer for {file_path.name} saved to {output_file}")
-        return file_path.name, answer
+        try:
+            if settings.get_profile_run():
+                run_with_cprofile(output_folder, pipeline.run, pending)
+            else:
+                pipeline.run(pending)
+        except RunCancelled:
+            cancelled = True
+        finally:
+            if discovery.duplicates:
+                progress_callback(95, describe_duplicates(discovery))
+                # Every discovered file gets a row, skipped copies included
+                for duplicate, original in discovery.duplicates:
+                    pipeline.record_duplicate(duplicate, original)
+            if sink.successful_rows:
+                progress_callback(95, "Saving summary spreadsheet...")
+            with pipeline.profiler.timed(None, "spreadsheet"):
+                sink.close()
+        finished = sink.successful_rows
+
+        if cancelled:
+            write_run_report(pipeline.profiler, output_folder, settings, progress_callback)
+            message = f"Processing cancelled: {finished} of {discovery.found} files finished."
+            if journal is not None:
+                message += "\nProcess the folder again to continue where it stopped."
+            return False, message
+
+        if journal is not None:
+            journal.complete()
+        if not finished:
+            write_run_report(pipeline.profiler, output_folder, settings, progress_callback)
+            return False, "No files could be processed successfully."
+    finally:
+        if journal is not None:
+            journal.close()
+
+    if settings.get_use_embedding_store() and settings.get_update_corpus_index():
+        with pipeline.profiler.timed(None, "corpus_index"):
+            update_corpus_index(output_folder, settings, progress_callback)
+    write_run_report(pipeline.profiler, output_folder, settings, progress_callback)
+    progress_callback(100, "Processing complete!")
+    return True, f"Successfully processed {finished} files.\nResults saved to: {output_folder}"
+
+
+def process_files(folder_path: str) -> bool:
+    """
+    Process all supported files in the specified folder and generate summaries.
+    """
+    try:
+        success, message = process_folder(folder_path)
+        print(f"\n{message}")
+        return success
     except Exception as e:
-        print(f"Error summarizing {file_path.name}: {e}")
-        return None
\ No newline at end of file
+        print(f"Error processing files: {e}")
+        return False
@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import Settings
+from .cancellation import RunCancelled, check
+
+
+class GenerationStats:
+    """Latency and speed of one generate call"""
+
+    def __init__(self, time_to_first_token: float = None, tokens: int = 0, seconds: float = 0.0,
+                 elapsed: float = 0.0):
+        self.time_to_first_token = time_to_first_token
+        self.tokens = tokens
+        self.seconds = seconds  # time spent producing tokens after the first one arrived
+        self.elapsed = elapsed  # wall time of the whole call
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.seconds if self.seconds > 0 else 0.0
+
+    def describe(self) -> str:
+        if self.time_to_first_token is None:
+            return "no tokens"
+        return f"first token {self.time_to_first_token:.2f}s, {self.tokens_per_second:.1f} tok/s"
+
+
+class OllamaGenerator:
+    """
+    Shared Ollama client that runs up to max_in_flight generate calls at once.
+    The underlying HTTP client keeps its connections alive between requests.
+    """
+
+    def __init__(self, host: str = None, model: str = None, max_in_flight: int = None,
+                 settings: Settings = None, num_ctx: int = None):
+        settings = settings or Settings()
+        self.host = host or settings.get_ollama_host()
+        self.model = model or settings.get_llm_model()
+        self.max_in_flight = max(1, max_in_flight or settings.get_max_inflight_generations())
+        # Context window the prompts were packed for; the server default may be smaller
+        self.num_ctx = num_ctx or settings.get_context_window()
+        import ollama  # its HTTP stack is slow to import; only load it once a generator is needed
+        self.client = ollama.Client(host=self.host)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="ollama-generate"
+        )
+
+    def generate(self, prompt: str, options: dict = None, cancel_token=None) -> str:
+        """
+        Generate a completion, returning an "Error: ..." message instead of raising.
+        A cancel_token holds the request back while paused and drops it once cancelled.
+        """
+        check(cancel_token)
+        try:
+            response = self.client.generate(
+                model=self.model, prompt=prompt, options={"num_ctx": self.num_ctx, **(options or {})}
+            )
+            summary = response.get("response", "").strip()
+
+            if not summary:
+                return "Error: AI model returned empty response. Please check Ollama is running."
+
+            return summary
+
+        except Exception as e:
+            return f"Error: Could not generate summary using AI model: {str(e)}. Please ensure Ollama is running and the '{self.model}' model is installed."
+
+    def stream(self, prompt: str, on_token=None, options: dict = None, cancel_token=None) -> tuple:
+        """
+        Generate a completion with streaming, passing each piece of text to on_token as it
+        arrives. Returns (summary, GenerationStats); failures return an "Error: ..." summary.
+        A cancel_token holds the request back while paused; cancelling closes the stream at
+        the next piece and raises RunCancelled.
+        """
+        check(cancel_token)
+        stats = GenerationStats()
+        pieces = []
+        start = time.perf_counter()
+        first_token_at = None
+        try:
+            parts = self.client.generate(
+                model=self.model, prompt=prompt, options={"num_ctx": self.num_ctx, **(options or {})},
+                stream=True
+            )
+            for part in parts:
+                if cancel_token is not None and cancel_token.cancelled:
+                    # Closing the stream drops the HTTP connection, which stops Ollama generating
+                    parts.close()
+                    raise RunCancelled("Processing cancelled")
+                piece = part.get("response", "")
+                if piece:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        stats.time_to_first_token = first_token_at - start
+                    pieces.append(piece)
+                    stats.tokens += 1
+                    if on_token is not None:
+                        try:
+                            on_token(piece)
+                        except Exception as e:
+                            print(f"Warning: Token callback failed: {e}")
+                            on_token = None
+                if part.get("done"):
+                    # The server's own counts are exact; chunk counts are the fallback
+                    if part.get("eval_count") and part.get("eval_duration"):
+                        stats.tokens = part["eval_count"]
+                        stats.seconds = part["eval_duration"] / 1e9
+            if first_token_at is not None and not stats.seconds:
+                stats.seconds = time.perf_counter() - first_token_at
+        except Exception as e:
+            stats.elapsed = time.perf_counter() - start
+            return f"Error: Could not generate summary using AI model: {str(e)}. Please ensure Ollama is running and the '{self.model}' model is installed.", stats
+
+        stats.elapsed = time.perf_counter() - start
+        summary = "".join(pieces).strip()
+        if not summary:
+            return "Error: AI model returned empty response. Please check Ollama is running.", stats
+        return summary, stats
+
+    def submit_stream(self, prompt: str, on_token=None, options: dict = None, cancel_token=None):
+        """Queue a streaming generate call; returns a Future resolving to (summary, GenerationStats)"""
+        return self._executor.submit(self.stream, prompt, on_token, options, cancel_token)
+
+    def submit(self, prompt: str, options: dict = None, cancel_token=None):
+        """Queue a generate call; returns a Future resolving to the summary text"""
+        return self._executor.submit(self.generate, prompt, options, cancel_token)
+
+    def close(self):
+        """Wait for queued requests and release the worker threads"""
+        self._executor.shutdown(wait=True)
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_generator(settings: Settings = None) -> OllamaGenerator:
+    """Return the process-wide generator, recreating it if the Ollama settings changed"""
+    global _generator
+    settings = settings or Settings()
+    config = (settings.get_ollama_host(), settings.get_llm_model(),
+              max(1, settings.get_max_inflight_generations()), settings.get_context_window())
+
+    with _generator_lock:
+        if _generator is None or (
+            _generator.host, _generator.model, _generator.max_in_flight, _generator.num_ctx
+        ) != config:
+            if _generator is not None:
+                _generator.close()
+            _generator = OllamaGenerator(settings=settings)
+        return _generator
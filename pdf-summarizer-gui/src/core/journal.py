@@ -0,0 +1,149 @@
+"""
+Crash-safe job journal for batch runs. Every finished file is appended to
+output_rag/.run_journal.jsonl as one JSON line and fsynced, so a run that is closed,
+killed or crashes mid-way can resume with only the files it had not finished. The rows of
+files finished before the interruption are read back from the journal into the outputs.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from config.settings import Settings
+from .cache import settings_fingerprint
+
+JOURNAL_NAME = ".run_journal.jsonl"
+
+
+def run_fingerprint(settings: Settings, queries: list) -> str:
+    """Hash of the queries and every setting that shapes their answers"""
+    parts = [[query, settings_fingerprint(settings, query)] for query in queries]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def file_signature(file_path: Path) -> list:
+    """[size, mtime_ns]: a journalled file that no longer matches is processed again"""
+    stat = Path(file_path).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class JobJournal:
+    """
+    Append-only log of one batch run. The first line describes the run; each file then gets
+    a "done" line with its answers or an "error" line, and a finished run ends with
+    "complete". Opening the journal of an unfinished run with the same queries and settings
+    resumes it; anything else starts a new journal.
+    """
+
+    def __init__(self, output_folder: Path, settings: Settings = None, queries: list = None):
+        self.settings = settings or Settings()
+        self.queries = list(queries) if queries else self.settings.get_queries()
+        self.path = Path(output_folder) / JOURNAL_NAME
+        self.fingerprint = run_fingerprint(self.settings, self.queries)
+        # resolved path -> latest record for that file; answers are only kept for records
+        # loaded from an interrupted run, until take_row() hands them to the outputs
+        self.entries = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self) -> int:
+        """Load an unfinished matching run, or start a new one; returns the files already done"""
+        records = self._read()
+        header = records[0] if records else {}
+        resumable = (
+            header.get("type") == "run"
+            and header.get("fingerprint") == self.fingerprint
+            and not any(record.get("type") == "complete" for record in records)
+        )
+        if resumable:
+            for record in records[1:]:
+                if record.get("type") in ("done", "error"):
+                    self.entries[record["path"]] = record
+            self._file = self.path.open("a", encoding="utf-8")
+            if not self._ends_with_newline():
+                # Start after a line cut short by a crash instead of running into it
+                self._file.write("\n")
+        else:
+            self.entries = {}
+            self._file = self.path.open("w", encoding="utf-8")
+            self._append({"type": "run", "fingerprint": self.fingerprint, "queries": self.queries,
+                          "started": time.time()})
+        return sum(1 for record in self.entries.values() if record["type"] == "done")
+
+    def _read(self) -> list:
+        if not self.path.exists():
+            return []
+        records = []
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A line cut short by a crash; everything before it is intact
+                    print(f"Warning: Ignoring damaged line in {self.path.name}")
+        return records
+
+    def _ends_with_newline(self) -> bool:
+        with self.path.open("rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _append(self, record: dict):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def is_done(self, file_path: Path) -> bool:
+        """True when the file finished in this run and has not changed since"""
+        record = self.entries.get(str(Path(file_path).resolve()))
+        if record is None or record["type"] != "done":
+            return False
+        try:
+            return record["signature"] == file_signature(file_path)
+        except OSError:
+            return False
+
+    def record(self, file_path: Path, name: str, answers: list = None, error: str = None,
+               metadata: dict = None):
+        """Durably record a finished file: its answers (and output metadata), or the error that stopped it"""
+        path = str(Path(file_path).resolve())
+        try:
+            signature = file_signature(file_path)
+        except OSError:
+            signature = None
+        record = {"type": "error" if error else "done", "path": path, "name": name,
+                  "signature": signature, "time": time.time()}
+        if error:
+            record["error"] = error
+        else:
+            record["answers"] = list(answers)
+            record["metadata"] = metadata or {}
+        self._append(record)
+        # The answers are on disk now; memory only needs what is_done() checks
+        self.entries[path] = {key: record[key] for key in ("type", "name", "signature")}
+
+    def take_row(self, file_path: Path):
+        """
+        (name, answers, metadata) of a file finished before an interruption, or None. The
+        answers are released from memory once taken.
+        """
+        record = self.entries.get(str(Path(file_path).resolve()))
+        if record is None or record["type"] != "done" or "answers" not in record:
+            return None
+        return record["name"], record.pop("answers"), record.pop("metadata", {})
+
+    def complete(self):
+        """Mark the run finished, so the next run over the folder starts a new journal"""
+        self._append({"type": "complete", "time": time.time()})
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
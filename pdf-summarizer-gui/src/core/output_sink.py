@@ -0,0 +1,245 @@
+"""
+Streaming output for batch runs. Each finished file is appended as one row to every
+configured output (summaries.xlsx, .csv, .jsonl, .parquet) instead of collecting all
+summaries and writing them at the end, so memory stays flat however many files there are.
+CSV and JSONL rows are flushed as they are written and can be followed during the run;
+the Excel and Parquet files are complete once the run ends. When neither CSV nor JSONL is
+written, the rows also go to summaries.partial.csv until then.
+"""
+
+import csv
+import json
+import os
+import re
+from pathlib import Path
+from config.settings import Settings
+
+OUTPUT_STEM = "summaries"
+PARTIAL_STEM = "summaries.partial"
+EXCEL_SHEET = "Summaries"
+OUTPUT_FORMATS = ("xlsx", "csv", "jsonl", "parquet")
+PARQUET_BATCH_ROWS = 500
+
+# (column, metadata key, type) appended after the answer columns
+METADATA_COLUMNS = [
+    ("Status", "status", str),
+    ("Pages", "pages", int),
+    ("Chunks", "chunks", int),
+    ("Generated Tokens", "generated_tokens", int),
+    ("Read (s)", "read", float),
+    ("Chunk (s)", "chunk", float),
+    ("Embed (s)", "embed", float),
+    ("Retrieve (s)", "retrieve", float),
+    ("Generate (s)", "generate", float),
+    ("Error", "error", str),
+]
+
+# Control characters that are not allowed in XLSX cell text
+ILLEGAL_XLSX_CHARACTERS = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
+
+
+def _temporary_path(path: Path) -> Path:
+    """Sibling path written first and moved into place on close, keeping the real suffix"""
+    return path.with_name(f"{path.stem}.tmp{path.suffix}")
+
+
+class FormatWriter:
+    """One output file; rows are lists matching the sink's columns"""
+
+    streams_rows = False  # rows are on disk as soon as write() returns
+
+    def __init__(self, path: Path, columns: list, types: list):
+        self.path = path
+        self.columns = columns
+        self.types = types
+
+    def write(self, row: list):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ExcelWriter(FormatWriter):
+    """openpyxl write-only workbook: rows are streamed to disk, not kept as cell objects"""
+
+    def __init__(self, path: Path, columns: list, types: list):
+        super().__init__(path, columns, types)
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(EXCEL_SHEET)
+        self._sheet.append(columns)
+
+    def write(self, row: list):
+        self._sheet.append([
+            ILLEGAL_XLSX_CHARACTERS.sub("", value) if isinstance(value, str) else value for value in row
+        ])
+
+    def close(self):
+        tmp_path = _temporary_path(self.path)
+        self._workbook.save(tmp_path)
+        os.replace(tmp_path, self.path)
+
+
+class CsvWriter(FormatWriter):
+    streams_rows = True
+
+    def __init__(self, path: Path, columns: list, types: list):
+        super().__init__(path, columns, types)
+        # utf-8-sig so Excel detects the encoding when the CSV is opened directly
+        self._file = path.open("w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+        self._file.flush()
+
+    def write(self, row: list):
+        self._writer.writerow(["" if value is None else value for value in row])
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlWriter(FormatWriter):
+    streams_rows = True
+
+    def __init__(self, path: Path, columns: list, types: list):
+        super().__init__(path, columns, types)
+        self._file = path.open("w", encoding="utf-8")
+
+    def write(self, row: list):
+        self._file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter(FormatWriter):
+    """pyarrow row groups of PARQUET_BATCH_ROWS rows; needs the optional pyarrow package"""
+
+    def __init__(self, path: Path, columns: list, types: list):
+        super().__init__(path, columns, types)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        arrow_types = {str: pa.string(), int: pa.int64(), float: pa.float64()}
+        self._pa = pa
+        self._schema = pa.schema([(column, arrow_types[kind]) for column, kind in zip(columns, types)])
+        self._tmp_path = _temporary_path(path)
+        self._writer = pq.ParquetWriter(str(self._tmp_path), self._schema)
+        self._rows = []
+
+    def write(self, row: list):
+        self._rows.append(row)
+        if len(self._rows) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            columns = list(zip(*self._rows))
+            self._writer.write_table(self._pa.Table.from_arrays(
+                [self._pa.array(values, type=field.type) for values, field in zip(columns, self._schema)],
+                schema=self._schema
+            ))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+
+
+FORMAT_WRITERS = {
+    "xlsx": ExcelWriter,
+    "csv": CsvWriter,
+    "jsonl": JsonlWriter,
+    "parquet": ParquetWriter,
+}
+
+
+class SummarySink:
+    """
+    Rows of a batch run streamed to every configured output format as files finish.
+    Each row is the filename, one answer per query and, if enabled, the metadata columns.
+    formats overrides the output_formats setting. A format that cannot be opened (e.g.
+    parquet without pyarrow) is skipped with a warning.
+    """
+
+    def __init__(self, output_folder: Path, answer_columns: list, settings: Settings = None,
+                 formats: list = None):
+        settings = settings or Settings()
+        self.output_folder = Path(output_folder)
+        self.include_metadata = settings.get_output_metadata_columns()
+        self.columns = list(answer_columns)
+        self.types = [str] * len(self.columns)
+        if self.include_metadata:
+            self.columns += [column for column, _, _ in METADATA_COLUMNS]
+            self.types += [kind for _, _, kind in METADATA_COLUMNS]
+        self.rows_written = 0
+        self.successful_rows = 0
+        self.writers = []
+        for name in settings.get_output_formats() if formats is None else formats:
+            if name not in FORMAT_WRITERS:
+                print(f"Warning: Unknown output format '{name}', expected one of {', '.join(OUTPUT_FORMATS)}")
+                continue
+            path = self.output_folder / f"{OUTPUT_STEM}.{name}"
+            try:
+                self.writers.append(FORMAT_WRITERS[name](path, self.columns, self.types))
+            except Exception as e:
+                print(f"Warning: Could not write {path.name}: {e}")
+        # CSV copy of the rows that can be read while the run goes on, deleted by close()
+        self.partial = None
+        if (self.writers and not any(writer.streams_rows for writer in self.writers)
+                and settings.get_output_partial_csv()):
+            path = self.output_folder / f"{PARTIAL_STEM}.csv"
+            try:
+                self.partial = CsvWriter(path, self.columns, self.types)
+                self.writers.append(self.partial)
+            except Exception as e:
+                print(f"Warning: Could not write {path.name}: {e}")
+
+    @property
+    def paths(self) -> list:
+        return [writer.path for writer in self.writers if writer is not self.partial]
+
+    def write(self, name: str, answers: list, metadata: dict = None):
+        """
+        Append the row of a finished file. Files that could not be processed (metadata
+        status "error") are only written when the metadata columns are included. Rows of
+        skipped duplicates (status "duplicate") are not counted as successful.
+        """
+        metadata = metadata or {}
+        failed = metadata.get("status") == "error"
+        if failed and not self.include_metadata:
+            return
+        row = [name] + [answer if answer is not None else "" for answer in answers]
+        if self.include_metadata:
+            for _, key, kind in METADATA_COLUMNS:
+                value = metadata.get(key)
+                row.append(round(value, 3) if kind is float and value is not None else value)
+        for writer in self.writers:
+            try:
+                writer.write(row)
+            except Exception as e:
+                print(f"Warning: Could not add {name} to {writer.path.name}: {e}")
+        self.rows_written += 1
+        if not failed and metadata.get("status") != "duplicate":
+            self.successful_rows += 1
+
+    def close(self):
+        """
+        Finish every output; Excel and Parquet files appear (atomically) at this point.
+        The partial CSV is removed unless another output could not be saved.
+        """
+        saved = True
+        for writer in self.writers:
+            try:
+                writer.close()
+            except Exception as e:
+                saved = saved and writer is self.partial
+                print(f"Warning: Could not save {writer.path.name}: {e}")
+        if self.partial is not None and saved:
+            try:
+                self.partial.path.unlink()
+            except OSError as e:
+                print(f"Warning: Could not remove {self.partial.path.name}: {e}")
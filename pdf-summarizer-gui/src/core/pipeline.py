@@ -0,0 +1,539 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+import numpy as np
+from config.settings import Settings
+from .summarizer import embed_documents, build_summary_prompts, choose_summary_mode, map_reduce_stream
+from .extraction import TextExtractor
+from .cache import SummaryCache, file_digest, chunking_fingerprint
+from .embedding_store import EmbeddingStore
+from .embedder import get_embedder, sync_embedders
+from .generation import get_generator
+from .profiling import RunProfiler
+from .scheduler import WorkSchedule
+from .cancellation import RunCancelled, check
+
+CANCEL_POLL_SECONDS = 0.2  # how often a wait on generation checks for cancellation
+
+
+class DocumentJob:
+    """State of one file as it moves through the pipeline stages"""
+
+    def __init__(self, file_path: Path, name: str, query_count: int):
+        self.file_path = file_path
+        self.name = name
+        self.chunks = []
+        self.pages = None
+        self.embeddings = None
+        self.answers = [None] * query_count
+        self.futures = [None] * query_count
+        self.cached = [False] * query_count
+        self.stats = []
+        self.error = None
+        self.doc_id = None
+        self.digest = None
+
+    def fail_all(self, message: str):
+        """Use the same error text as the answer to every query"""
+        self.answers = [message] * len(self.answers)
+
+    def is_done(self) -> bool:
+        return all(future is None or future.done() for future in self.futures)
+
+
+def _print_progress(percentage: int, message: str):
+    print(f"[{percentage:3d}%] {message}")
+
+
+class SummaryPipeline:
+    """
+    Staged summarization of many files: read/clean/chunk a window of files, embed all of
+    their chunks together in large batches, then scatter the embeddings back per document
+    for retrieval. Generation runs on the shared Ollama generator in the background, so the
+    next window is read and embedded while earlier prompts are still being answered.
+    Several queries can be answered per document from the same chunks and embeddings.
+    """
+
+    def __init__(self, output_folder: Path, query: str = None, settings: Settings = None,
+                 embedder=None, progress_callback=None, file_callback=None, generator=None,
+                 extractor=None, queries: list = None, base_folder: Path = None,
+                 token_callback=None, stats_callback=None, journal=None, cancel_token=None,
+                 sink=None):
+        self.settings = settings or Settings()
+        self.output_folder = Path(output_folder)
+        # Files below base_folder are reported by their relative path (recursive runs)
+        self.base_folder = Path(base_folder) if base_folder else None
+        if queries:
+            self.queries = list(queries)
+        elif query:
+            self.queries = [query]
+        else:
+            self.queries = self.settings.get_queries()
+        self.embedder = embedder
+        self.generator = generator
+        self.extractor = extractor
+        self.progress_callback = progress_callback or _print_progress
+        self.file_callback = file_callback or (lambda filename: None)
+        # Live output: token_callback(filename, text) per generated piece and
+        # stats_callback(filename, seconds to first token, tokens per second) per answer
+        self.token_callback = token_callback
+        self.stats_callback = stats_callback
+        self.generation_stats = {}  # filename -> GenerationStats of each generated answer
+        self.profiler = RunProfiler()
+        self.journal = journal  # JobJournal recording each finished file, if resuming is enabled
+        # SummarySink the rows are streamed to as files finish; run() then returns no rows
+        self.sink = sink
+        # CancellationToken checked between files, embedding batches and streamed tokens
+        self.cancel_token = cancel_token
+        self.completed_files = 0
+        self.schedule = None  # WorkSchedule of the current run; progress follows its estimated costs
+        self._progress = 0
+        self._ordered = True
+        self._pending = deque()
+        self._results = []
+        self.cache = None
+        self.embedding_store = None
+        self._chunking = None
+        self._digests = {}
+        self._cache_hits = {}
+        self._indexed = {}
+        self._coordinator = None
+        self._query_embeddings = None
+
+    @property
+    def results(self) -> list:
+        """Rows collected so far by run(), including those of a cancelled run (none with a sink)"""
+        return list(self._results)
+
+    def result_columns(self) -> list:
+        """Spreadsheet columns matching the tuples returned by run()"""
+        if len(self.queries) == 1:
+            return ["Filename", "Summary"]
+        return ["Filename"] + self.queries
+
+    def run(self, files) -> list:
+        """
+        Process the files (a list or a stream of paths) and return (filename, answer, ...)
+        tuples, one answer per query, for those that succeeded. With a sink the rows are
+        written there instead of returned.
+        """
+        self.completed_files = 0
+        # Longest-first runs start the most expensive files first and take each file on as soon
+        # as it is read or answered, instead of in input order. files may be a stream that is
+        # still being discovered; the schedule pulls from it as the extractor asks for more.
+        self._ordered = not self.settings.get_schedule_longest_first()
+        self.schedule = WorkSchedule(longest_first=not self._ordered)
+        self._progress = 0
+        files = self.schedule.order(files)
+        self._pending = deque()
+        self._results = []
+
+        if self.embedder is None:
+            # Reuse one embedder for the whole batch, dropping any model no longer configured
+            sync_embedders(self.settings)
+            self.embedder = get_embedder(settings=self.settings)
+        if self.generator is None:
+            self.generator = get_generator(self.settings)
+        owns_extractor = self.extractor is None
+        if owns_extractor:
+            self.extractor = TextExtractor(settings=self.settings)
+        if self.settings.get_use_summary_cache():
+            self.cache = SummaryCache(self.output_folder, self.settings)
+        if self.settings.get_use_embedding_store():
+            self.embedding_store = EmbeddingStore(self.output_folder, self.settings.get_embedder_model())
+            self._chunking = chunking_fingerprint(self.settings)
+
+        cancelled = False
+        extracted = self.extractor.extract(
+            files, skip=self._can_skip_extraction, cancel_token=self.cancel_token, ordered=self._ordered
+        )
+        try:
+            for window in self._windows(extracted):
+                jobs = [self._prepare(document) for document in window]
+                self._embed([job for job in jobs if job.chunks])
+                for job in jobs:
+                    # Waits here while paused; requests already sent to Ollama run to completion
+                    check(self.cancel_token)
+                    self._submit(job)
+                    self._drain(self._max_pending())
+            self._drain(0)
+        except RunCancelled:
+            cancelled = True
+            self._cancel_outstanding()
+            raise
+        finally:
+            # Closing the generator stops the extraction workers if files were still queued
+            extracted.close()
+            if self._coordinator is not None:
+                # Queued map-reduce jobs were cancelled above; running ones stop at their next request
+                self._coordinator.shutdown(wait=not cancelled)
+                self._coordinator = None
+            if owns_extractor:
+                self.extractor.close()
+                self.extractor = None
+        return self._results
+
+    def _cancel_outstanding(self):
+        """Drop queued generate calls; running streams stop at their next token"""
+        for job in self._pending:
+            for future in job.futures:
+                if future is not None:
+                    future.cancel()
+
+    def _max_pending(self) -> int:
+        """Jobs allowed to wait on generation before the pipeline stops reading ahead"""
+        return max(self.generator.max_in_flight * 2, self.settings.get_pipeline_batch_files())
+
+    def _windows(self, items):
+        """Group files so each embedding stage sees many documents without holding the whole folder"""
+        window_size = max(1, self.settings.get_pipeline_batch_files())
+        window = []
+        for item in items:
+            window.append(item)
+            if len(window) >= window_size:
+                yield window
+                window = []
+        if window:
+            yield window
+
+    def _can_skip_extraction(self, file_path: Path) -> bool:
+        """
+        Check an unchanged file against the summary cache and the embedding store.
+        Returns True when its summary, or its chunks and embeddings, are already on disk.
+        """
+        if self.cache is None and self.embedding_store is None:
+            return False
+        try:
+            digest = file_digest(file_path)
+        except OSError:
+            # Unreadable files go on to extraction, which reports the error
+            return False
+        self._digests[file_path] = digest
+
+        if self.cache is not None:
+            answers = [self.cache.get(self.cache.key_for(file_path, query, digest)) for query in self.queries]
+            if any(answer is not None for answer in answers):
+                self._cache_hits[file_path] = answers
+            if all(answer is not None for answer in answers):
+                return True
+
+        if self.embedding_store is not None:
+            chunks, embeddings = self.embedding_store.load_indexed(
+                self._document_id(file_path), digest, self._chunking
+            )
+            if chunks is not None:
+                self._indexed[file_path] = (chunks, embeddings)
+                return True
+        return False
+
+    def _document_id(self, file_path: Path) -> str:
+        return self.embedding_store.document_id(str(file_path.resolve()))
+
+    def _display_name(self, file_path: Path) -> str:
+        if self.base_folder is not None:
+            try:
+                return file_path.relative_to(self.base_folder).as_posix()
+            except ValueError:
+                pass
+        return file_path.name
+
+    @property
+    def total_files(self) -> int:
+        """Files queued so far in the current run"""
+        return self.schedule.count if self.schedule is not None else 0
+
+    def _percentage(self) -> int:
+        if self.schedule is None:
+            return 0
+        # Files still being discovered add work, which must not move the bar backwards
+        self._progress = max(self._progress, int(self.schedule.fraction() * 90))
+        return self._progress
+
+    def _prepare(self, document) -> DocumentJob:
+        """Turn one extracted document into a job"""
+        file_path = document.file_path
+        job = DocumentJob(file_path, self._display_name(file_path), len(self.queries))
+        job.digest = self._digests.pop(file_path, None)
+        if self.embedding_store is not None:
+            job.doc_id = self._document_id(file_path)
+        self.file_callback(job.name)
+
+        if file_path in self._cache_hits:
+            job.answers = self._cache_hits.pop(file_path)
+            job.cached = [answer is not None for answer in job.answers]
+            if all(job.cached):
+                self.progress_callback(self._percentage(), f"Unchanged, using cached summary: {job.name}")
+                return job
+
+        if file_path in self._indexed:
+            job.chunks, job.embeddings = self._indexed.pop(file_path)
+            self.progress_callback(self._percentage(), f"Unchanged, using stored embeddings: {job.name}")
+            return job
+
+        self.progress_callback(self._percentage(), f"Read: {job.name}")
+
+        if document.error:
+            job.error = document.error
+        elif document.notice:
+            job.fail_all(document.notice)
+        else:
+            job.chunks = document.chunks
+            job.pages = document.pages
+        self._record_extraction(job, document)
+        return job
+
+    def _record_extraction(self, job: DocumentJob, document):
+        timings = document.timings
+        for stage in ("read", "chunk"):
+            if stage in timings:
+                self.profiler.add_time(job.name, stage, timings[stage])
+        if timings.get("pages"):
+            self.profiler.add_count(job.name, "pages", timings["pages"])
+        if job.chunks:
+            self.profiler.add_count(job.name, "chunks", len(job.chunks))
+
+    def _embed(self, jobs: list):
+        """
+        Embed the chunks of every job in shared batches and hand each job its own rows.
+        Chunks already in the embedding store are reused and left out of the batches.
+        """
+        if not jobs:
+            return
+
+        to_encode = []  # (job, indices of the job's chunks that still need vectors)
+        for job in jobs:
+            if job.embeddings is not None:
+                continue
+            if self.embedding_store is None:
+                to_encode.append((job, list(range(len(job.chunks)))))
+                continue
+            job.embeddings, missing = self.embedding_store.lookup(job.doc_id, job.chunks)
+            if missing:
+                to_encode.append((job, missing))
+
+        chunk_count = sum(len(missing) for _, missing in to_encode)
+        if not chunk_count:
+            return
+        self.progress_callback(
+            self._percentage(), f"Embedding {chunk_count} chunks from {len(to_encode)} files..."
+        )
+        start = time.perf_counter()
+        try:
+            per_document = embed_documents(
+                [[job.chunks[i] for i in missing] for job, missing in to_encode],
+                self.embedder, self.settings.get_embedding_batch_size(), self.cancel_token
+            )
+        except Exception as e:
+            for job, _ in to_encode:
+                job.error = str(e)
+            return
+        finally:
+            # Batches mix documents, so each one is charged its share of the chunks
+            elapsed = time.perf_counter() - start
+            for job, missing in to_encode:
+                self.profiler.add_time(job.name, "embed", elapsed * len(missing) / chunk_count)
+
+        for (job, missing), rows in zip(to_encode, per_document):
+            if job.embeddings is None:
+                job.embeddings = rows
+            else:
+                job.embeddings[missing] = rows
+            if self.embedding_store is not None:
+                self.embedding_store.save(
+                    job.doc_id, job.chunks, job.embeddings, job.name, job.digest, self._chunking,
+                    pages=job.pages, path=str(job.file_path.resolve())
+                )
+
+    def _submit(self, job: DocumentJob):
+        """Retrieve the relevant chunks for every open query of an embedded job and queue the prompts"""
+        self._pending.append(job)
+        open_queries = [i for i, answer in enumerate(job.answers) if answer is None]
+        if job.error or not open_queries:
+            return
+
+        try:
+            if choose_summary_mode(len(job.chunks), self.settings) == "map_reduce":
+                self._submit_map_reduce(job, open_queries)
+                return
+            with self.profiler.timed(job.name, "retrieve"):
+                if self._query_embeddings is None:
+                    # The queries are the same for every file: encode them once per run
+                    self._query_embeddings = np.asarray(self.embedder.encode(self.queries), dtype=np.float32)
+                prompts = build_summary_prompts(
+                    job.chunks, job.embeddings, self.embedder,
+                    [self.queries[i] for i in open_queries], self.settings,
+                    self._query_embeddings[open_queries], normalized=True
+                )
+            packed = [prompt for prompt in prompts if prompt is not None]
+            self.profiler.add_count(job.name, "prompt_tokens", sum(prompt.tokens_used for prompt in packed))
+            usage = f" ({packed[0].describe()})" if len(packed) == 1 else (
+                f" ({sum(prompt.tokens_used for prompt in packed)} prompt tokens)" if packed else ""
+            )
+            self.progress_callback(self._percentage(), f"Summarizing: {job.name}{usage}")
+            for i, prompt in zip(open_queries, prompts):
+                if prompt is None:
+                    job.answers[i] = "Error: No relevant content found in the document."
+                else:
+                    job.futures[i] = self.generator.submit_stream(
+                        prompt.prompt, self._token_forwarder(job.name), cancel_token=self.cancel_token
+                    )
+        except Exception as e:
+            for i in open_queries:
+                if job.futures[i] is None:
+                    job.answers[i] = f"Error during summarization: {str(e)}"
+        finally:
+            # Retrieval is done; only the prompts are needed from here on
+            job.chunks = []
+            job.pages = None
+            job.embeddings = None
+
+    def _submit_map_reduce(self, job: DocumentJob, open_queries: list):
+        """Queue a full-document map-reduce summary per open query"""
+        if self._coordinator is None:
+            # Coordinators only wait on generator futures, so they never hold an Ollama slot
+            self._coordinator = ThreadPoolExecutor(
+                max_workers=self.generator.max_in_flight, thread_name_prefix="map-reduce"
+            )
+        self.progress_callback(
+            self._percentage(), f"Summarizing: {job.name} (map-reduce over {len(job.chunks)} chunks)"
+        )
+        for i in open_queries:
+            job.futures[i] = self._coordinator.submit(
+                map_reduce_stream, job.chunks, self.queries[i], self.settings, self.generator,
+                self._token_forwarder(job.name), self.cancel_token
+            )
+
+    def _token_forwarder(self, name: str):
+        if self.token_callback is None:
+            return None
+        return lambda text: self.token_callback(name, text)
+
+    def _drain(self, max_pending: int):
+        """
+        Collect finished jobs, blocking on the oldest job while more than max_pending
+        are outstanding.
+        """
+        while self._pending:
+            job = self._next_finished()
+            if job is None:
+                if len(self._pending) <= max_pending:
+                    return
+                job = self._pending[0]
+            self._pending.remove(job)
+            result = self._finish(job)
+            if result and self.sink is None:
+                self._results.append(result)
+
+    def _next_finished(self):
+        """A pending job whose answers are all in: the oldest one, or any one when not ordered"""
+        if self._ordered:
+            return self._pending[0] if self._pending[0].is_done() else None
+        return next((job for job in self._pending if job.is_done()), None)
+
+    def _finish(self, job: DocumentJob):
+        """Wait for a job's answers and save them"""
+        name = job.name
+        self.completed_files += 1
+        self.schedule.finish(job.file_path)
+
+        if job.error:
+            self.progress_callback(self._percentage(), f"Error processing {name}: {job.error}")
+            self._record(job, error=job.error)
+            return None
+
+        try:
+            for i, future in enumerate(job.futures):
+                if future is None:
+                    continue
+                job.answers[i], stats = self._result(future)
+                job.futures[i] = None
+                job.stats.append(stats)
+                self.profiler.add_time(name, "generate", stats.elapsed)
+                self.profiler.add_count(name, "generated_tokens", stats.tokens)
+                if self.stats_callback is not None and stats.time_to_first_token is not None:
+                    self.stats_callback(name, stats.time_to_first_token, stats.tokens_per_second)
+                if self.cache is not None and job.digest and not job.answers[i].startswith("Error"):
+                    self.cache.put(self.cache.key_for(job.file_path, self.queries[i], job.digest), name, job.answers[i])
+
+            # Save individual summary
+            stem = os.path.splitext(name)[0].replace("/", "__")
+            output_file = self.output_folder / f"{stem}_rag_answer.txt"
+            if not (all(job.cached) and output_file.exists()):
+                with self.profiler.timed(name, "write"):
+                    output_file.write_text(self._answer_text(job.answers), encoding="utf-8")
+            self._record(job)
+            if job.stats:
+                self.generation_stats[name] = job.stats
+                self.progress_callback(
+                    self._percentage(), f"Finished: {name} ({'; '.join(stats.describe() for stats in job.stats)})"
+                )
+            else:
+                self.progress_callback(self._percentage(), f"Finished: {name}")
+            return (name, *job.answers)
+        except Exception as e:
+            self.progress_callback(self._percentage(), f"Error processing {name}: {str(e)}")
+            self._record(job, error=str(e))
+            return None
+
+    def _record(self, job: DocumentJob, error: str = None):
+        """Journal a finished file and append its row to the sink"""
+        metadata = self._row_metadata(job, error)
+        if self.journal is not None:
+            try:
+                self.journal.record(job.file_path, job.name, job.answers, error, metadata)
+            except Exception as e:
+                print(f"Warning: Could not update run journal: {e}")
+        if self.sink is not None:
+            answers = [""] * len(job.answers) if error else job.answers
+            self.sink.write(job.name, answers, metadata)
+
+    def record_duplicate(self, file_path: Path, original: Path):
+        """Output row for a file skipped because original has the same contents"""
+        if self.sink is not None:
+            note = f"Duplicate of {self._display_name(original)}"
+            self.sink.write(self._display_name(file_path), [note] * len(self.queries), {"status": "duplicate"})
+
+    def _row_metadata(self, job: DocumentJob, error: str = None) -> dict:
+        """Status, counts and stage seconds of a finished file for the output metadata columns"""
+        if error:
+            status = "error"
+        elif any(answer is not None and answer.startswith("Error") for answer in job.answers):
+            status = "failed"
+        elif all(job.cached):
+            status = "cached"
+        else:
+            status = "ok"
+        entry = self.profiler.file_entry(job.name)
+        counts = entry["counts"]
+        metadata = {
+            "status": status,
+            # Files answered entirely from the cache are not read, so they have no counts
+            "pages": counts.get("pages") or None,
+            "chunks": counts.get("chunks") or None,
+            "generated_tokens": counts.get("generated_tokens") or None,
+            "error": error,
+        }
+        for stage in ("read", "chunk", "embed", "retrieve", "generate"):
+            metadata[stage] = entry["stages"].get(stage)
+        return metadata
+
+    def _result(self, future):
+        """future.result(), giving up promptly when the run is cancelled"""
+        if self.cancel_token is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(timeout=CANCEL_POLL_SECONDS)
+            except FutureTimeoutError:
+                if self.cancel_token.cancelled:
+                    raise RunCancelled("Processing cancelled")
+
+    def _answer_text(self, answers: list) -> str:
+        """Contents of <stem>_rag_answer.txt: the summary, or one section per query"""
+        if len(self.queries) == 1:
+            return answers[0]
+        return "\n\n".join(
+            f"## {query}\n\n{answer}" for query, answer in zip(self.queries, answers)
+        )
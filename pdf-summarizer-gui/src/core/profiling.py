@@ -0,0 +1,135 @@
+"""
+Per-stage timing of a run. Every file gets the seconds spent in each stage (PDF read,
+clean/chunk, embed, retrieve, generate, write) and counts of its pages, chunks and tokens;
+the run report is written as JSON and CSV next to summaries.xlsx. A run can also be wrapped
+in cProfile for a function-level view.
+"""
+
+import cProfile
+import csv
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Cleaning is part of "chunk": pages are cleaned and chunked together as they stream in
+STAGES = ["read", "chunk", "embed", "retrieve", "generate", "write"]
+COUNTS = ["pages", "chunks", "prompt_tokens", "generated_tokens"]
+REPORT_NAME = "run_report"
+PROFILE_NAME = "run_profile"
+PROFILE_LINES = 40
+
+
+class RunProfiler:
+    """Collects stage timings and counts per file, plus run-wide stages such as the spreadsheet"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.files = {}  # filename -> {"stages": {...}, "counts": {...}}, in first-seen order
+        self.run_stages = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> dict:
+        if name not in self.files:
+            self.files[name] = {"stages": dict.fromkeys(STAGES, 0.0), "counts": dict.fromkeys(COUNTS, 0)}
+        return self.files[name]
+
+    def add_time(self, name: str, stage: str, seconds: float):
+        """Add seconds to a file's stage; name None records a run-wide stage"""
+        with self._lock:
+            stages = self.run_stages if name is None else self._entry(name)["stages"]
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def add_count(self, name: str, counter: str, value: int):
+        with self._lock:
+            counts = self._entry(name)["counts"]
+            counts[counter] = counts.get(counter, 0) + value
+
+    def file_entry(self, name: str) -> dict:
+        """Copy of one file's {"stages": ..., "counts": ...}, empty if nothing was recorded"""
+        with self._lock:
+            entry = self.files.get(name)
+            if entry is None:
+                return {"stages": {}, "counts": {}}
+            return {"stages": dict(entry["stages"]), "counts": dict(entry["counts"])}
+
+    @contextmanager
+    def timed(self, name: str, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, stage, time.perf_counter() - start)
+
+    def totals(self) -> dict:
+        """Stage seconds and counts summed over every file"""
+        with self._lock:
+            stages = dict.fromkeys(STAGES, 0.0)
+            counts = dict.fromkeys(COUNTS, 0)
+            for entry in self.files.values():
+                for stage, seconds in entry["stages"].items():
+                    stages[stage] = stages.get(stage, 0.0) + seconds
+                for counter, value in entry["counts"].items():
+                    counts[counter] = counts.get(counter, 0) + value
+            return {"stages": stages, "counts": counts}
+
+    def summary_text(self) -> str:
+        """One line of stage totals for the progress log"""
+        totals = self.totals()
+        stages = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in totals["stages"].items())
+        return f"Stage times: {stages} (wall {time.perf_counter() - self.started:.1f}s)"
+
+    def report(self) -> dict:
+        totals = self.totals()
+        with self._lock:
+            return {
+                "wall_seconds": time.perf_counter() - self.started,
+                "totals": totals,
+                "run_stages": dict(self.run_stages),
+                "files": [{"file": name, **entry} for name, entry in self.files.items()],
+            }
+
+    def write_reports(self, output_folder: Path) -> tuple:
+        """Write run_report.json and run_report.csv (one row per file plus a total row)"""
+        output_folder = Path(output_folder)
+        report = self.report()
+        json_path = output_folder / f"{REPORT_NAME}.json"
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+        stage_names = list(report["totals"]["stages"])
+        count_names = list(report["totals"]["counts"])
+        csv_path = output_folder / f"{REPORT_NAME}.csv"
+        with csv_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["file"] + [f"{stage}_s" for stage in stage_names] + count_names)
+            rows = [(entry["file"], entry) for entry in report["files"]] + [("TOTAL", report["totals"])]
+            for name, entry in rows:
+                writer.writerow(
+                    [name]
+                    + [f"{entry['stages'].get(stage, 0.0):.4f}" for stage in stage_names]
+                    + [entry["counts"].get(counter, 0) for counter in count_names]
+                )
+        return json_path, csv_path
+
+
+def run_with_cprofile(output_folder: Path, function, *args, **kwargs):
+    """
+    Call function under cProfile and write run_profile.prof (for snakeviz/pstats) and
+    run_profile.txt (top functions by cumulative time). Only the calling thread is profiled;
+    extraction workers and generation threads show up as time spent waiting on them.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        output_folder = Path(output_folder)
+        try:
+            profiler.dump_stats(str(output_folder / f"{PROFILE_NAME}.prof"))
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            (output_folder / f"{PROFILE_NAME}.txt").write_text(stream.getvalue(), encoding="utf-8")
+        except Exception as e:
+            print(f"Warning: Could not write profile: {e}")
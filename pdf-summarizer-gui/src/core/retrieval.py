@@ -0,0 +1,117 @@
+"""
+Chunk retrieval over L2-normalized float32 embeddings. Vectors are normalized once, so
+cosine similarity is a plain matrix product for any number of queries, and only the
+top candidates are selected (argpartition) and sorted instead of every chunk.
+"""
+
+import numpy as np
+
+NORM_TOLERANCE = 1e-3
+
+
+def normalize_embeddings(embeddings) -> np.ndarray:
+    """
+    Return float32 rows scaled to unit length. Already normalized float32 input (including
+    a memory-mapped store entry) is returned as is; zero rows stay zero.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings[None, :]
+    norms = np.linalg.norm(embeddings, axis=1)
+    if np.all((np.abs(norms - 1) < NORM_TOLERANCE) | (norms == 0)):
+        return embeddings
+    norms[norms == 0] = 1
+    return embeddings / norms[:, None]
+
+
+def normalize_in_place(embeddings: np.ndarray) -> np.ndarray:
+    """Scale the rows of a writable float32 matrix to unit length without a copy"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    embeddings /= norms
+    return embeddings
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, in O(n + k log k)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def mmr_select(query_vector: np.ndarray, candidates: np.ndarray, embeddings: np.ndarray,
+               k: int, diversity_weight: float) -> list:
+    """
+    Maximal marginal relevance: pick k of the candidate rows, each time taking the one most
+    similar to the query and least similar to those already picked.
+    relevance_weight = 1 - diversity_weight; 0 gives plain top-k.
+    """
+    vectors = embeddings[candidates]
+    relevance = vectors @ query_vector
+    pairwise = vectors @ vectors.T
+    selected = []
+    # Highest similarity of each candidate to anything already selected
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    for _ in range(min(k, len(candidates))):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0)
+        scores = (1 - diversity_weight) * relevance - diversity_weight * penalty
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return [int(candidates[i]) for i in selected]
+
+
+class ChunkIndex:
+    """
+    Normalized embeddings of one document's chunks, searchable by query vectors.
+    assume_normalized skips the norm check for callers whose rows are already unit-length
+    float32, such as embed_chunks output or an EmbeddingStore entry.
+    """
+
+    def __init__(self, embeddings, assume_normalized: bool = False):
+        if assume_normalized:
+            self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        else:
+            self.embeddings = normalize_embeddings(embeddings)
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    def scores(self, query_embeddings) -> np.ndarray:
+        """Cosine similarity of every chunk to every query: shape (queries, chunks)"""
+        return normalize_embeddings(query_embeddings) @ self.embeddings.T
+
+    def search(self, query_embeddings, top_k: int, min_similarity: float = None,
+               mmr_weight: float = 0.0, mmr_candidates: int = None) -> list:
+        """
+        Top chunks per query as lists of (index, score), best first.
+        Chunks at or below min_similarity are left out, but every query keeps at least its
+        best chunk. With mmr_weight > 0 the final top_k are reranked for diversity from the
+        best mmr_candidates chunks.
+        """
+        if len(self) == 0:
+            return [[] for _ in range(len(np.atleast_2d(query_embeddings)))]
+        queries = normalize_embeddings(query_embeddings)
+        similarities = queries @ self.embeddings.T
+
+        results = []
+        for q, scores in enumerate(similarities):
+            if mmr_weight > 0:
+                candidates = top_k_indices(scores, max(top_k, mmr_candidates or top_k * 4))
+                indices = mmr_select(queries[q], candidates, self.embeddings, top_k, mmr_weight)
+            else:
+                indices = top_k_indices(scores, top_k)
+            hits = [(int(i), float(scores[i])) for i in indices]
+            if min_similarity is not None:
+                kept = [hit for hit in hits if hit[1] > min_similarity]
+                hits = kept or hits[:1]
+            results.append(hits)
+        return results
@@ -0,0 +1,118 @@
+"""
+Cost-based scheduling of a batch. Each file's cost is estimated as it is queued, from its size and,
+for PDFs, the page count stored in the page tree, without parsing the document. The most
+expensive files are started first, so a large manual at the end of the folder no longer
+leaves every other worker idle while it finishes, and progress advances by estimated work
+instead of by file count.
+"""
+
+import heapq
+import os
+import re
+from pathlib import Path
+
+PDF_SCAN_BYTES = 64 * 1024  # read from each end of a PDF when looking for its page count
+CHARS_PER_PDF_PAGE = 2500
+PDF_BYTES_PER_CHAR = 8  # PDFs without a readable page count: text is roughly 1/8 of the file
+# Retrieval and generation take about as long per file as chunking and embedding this much text
+FILE_OVERHEAD_CHARS = 20000
+SCHEDULE_LOOKAHEAD = 1000  # discovered files ranked against each other when ordering a stream
+# Files ranked before the first one is started; the window doubles with every file started
+# until it reaches SCHEDULE_LOOKAHEAD, so work begins before much of the folder has been walked
+SCHEDULE_INITIAL_LOOKAHEAD = 8
+
+_PAGES_DICTIONARY = re.compile(rb"<<[^<>]*?/Type\s*/Pages\b[^<>]*?>>")
+_COUNT = re.compile(rb"/Count\s+(\d+)")
+
+
+def pdf_page_count_hint(file_path: Path):
+    """
+    Page count from the /Count of the page tree when it is within PDF_SCAN_BYTES of either
+    end of the file, otherwise None (for example when it sits in a compressed object stream)
+    """
+    try:
+        with Path(file_path).open("rb") as f:
+            head = f.read(PDF_SCAN_BYTES)
+            size = f.seek(0, os.SEEK_END)
+            tail = b""
+            if size > PDF_SCAN_BYTES:
+                f.seek(max(PDF_SCAN_BYTES, size - PDF_SCAN_BYTES))
+                tail = f.read()
+    except OSError:
+        return None
+    counts = []
+    for data in (head, tail):
+        for dictionary in _PAGES_DICTIONARY.finditer(data):
+            match = _COUNT.search(dictionary.group())
+            if match:
+                counts.append(int(match.group(1)))
+    # Intermediate page tree nodes count only their own subtree; the root has the largest count
+    return max(counts) if counts else None
+
+
+def estimate_cost(file_path: Path) -> float:
+    """Estimated work for a file, in characters of text plus a fixed per-file overhead"""
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return FILE_OVERHEAD_CHARS
+    if Path(file_path).suffix.lower() == ".pdf":
+        pages = pdf_page_count_hint(file_path)
+        chars = pages * CHARS_PER_PDF_PAGE if pages else size / PDF_BYTES_PER_CHAR
+    else:
+        chars = size
+    return FILE_OVERHEAD_CHARS + chars
+
+
+class WorkSchedule:
+    """
+    Orders the files of a run as they are discovered and keeps their estimated costs.
+    Longest-first ordering picks the most expensive of the files found but not yet started.
+    The first file is picked from initial_lookahead files, and the window grows towards
+    lookahead as files are started, so the order keeps improving while the first workers are
+    already busy. finish() is called as each file completes; fraction() is the share of the
+    estimated work found so far that is done.
+    """
+
+    def __init__(self, longest_first: bool = True, lookahead: int = SCHEDULE_LOOKAHEAD,
+                 initial_lookahead: int = SCHEDULE_INITIAL_LOOKAHEAD):
+        self.longest_first = longest_first
+        self.lookahead = max(1, lookahead)
+        self.initial_lookahead = max(1, min(initial_lookahead, self.lookahead))
+        self.costs = {}
+        self.count = 0
+        self.total = 0.0
+        self.done = 0.0
+
+    def add(self, file_path: Path) -> float:
+        cost = estimate_cost(file_path)
+        self.costs[file_path] = cost
+        self.count += 1
+        self.total += cost
+        return cost
+
+    def order(self, files):
+        """Yield the files in the order to start them"""
+        if not self.longest_first:
+            for file_path in files:
+                self.add(file_path)
+                yield file_path
+            return
+        heap = []
+        lookahead = self.initial_lookahead
+        for index, file_path in enumerate(files):
+            # The index keeps files of equal cost in discovery order
+            heapq.heappush(heap, (-self.add(file_path), index, file_path))
+            if len(heap) > lookahead:
+                yield heapq.heappop(heap)[2]
+                lookahead = min(self.lookahead, lookahead * 2)
+        while heap:
+            yield heapq.heappop(heap)[2]
+
+    def finish(self, file_path: Path):
+        self.done += self.costs.pop(file_path, 0.0)
+
+    def fraction(self) -> float:
+        if not self.total:
+            return 0.0
+        return min(1.0, self.done / self.total)
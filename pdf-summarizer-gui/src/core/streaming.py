@@ -0,0 +1,125 @@
+"""
+Incremental versions of clean_text and chunk_text that work on a stream of pages, so a
+document never has to be held as one big string and chunks are available before the last
+page has been parsed. Joining the pieces with whitespace and running clean_text/chunk_text
+gives the same chunks.
+"""
+
+import re
+
+BIBLIOGRAPHY_PATTERN = re.compile(r"(Bibliography|References|Works Cited)", re.IGNORECASE)
+SENTENCE_END_PATTERN = re.compile(r"[.!?]+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+MIN_CHUNK_LENGTH = 50
+
+
+def iter_clean_text(pages):
+    """
+    Yield cleaned pieces of text, one per input page, stopping at the first
+    bibliography/references heading. Pieces have whitespace collapsed and stripped;
+    consumers join them with a single space.
+    """
+    for page in pages:
+        match = BIBLIOGRAPHY_PATTERN.search(page)
+        if match:
+            page = page[:match.start()]
+        piece = WHITESPACE_PATTERN.sub(" ", page).strip()
+        if piece:
+            yield piece
+        if match:
+            return
+
+
+class _SentencePacker:
+    """Packs sentences into chunks of at most max_chunk_length characters, like chunk_text"""
+
+    def __init__(self, max_chunk_length: int):
+        self.max_chunk_length = max_chunk_length
+        self.current_chunk = ""
+
+    def add(self, sentence: str):
+        """Add a sentence; returns a finished chunk or None"""
+        sentence = sentence.strip()
+        if not sentence:
+            return None
+        finished = None
+        if len(self.current_chunk) + len(sentence) + 1 > self.max_chunk_length:
+            if self.current_chunk:
+                finished = self.current_chunk.strip()
+            self.current_chunk = sentence + ". "
+        else:
+            self.current_chunk += sentence + ". "
+        return finished
+
+    def flush(self):
+        finished = self.current_chunk.strip()
+        self.current_chunk = ""
+        return finished or None
+
+
+def iter_chunks(pieces, max_chunk_length: int):
+    """
+    Yield chunks from cleaned pieces as soon as they are complete.
+    Text that fits in a single chunk is kept whole; longer text is packed sentence by
+    sentence, holding back only the unfinished sentence between pieces.
+    """
+    pieces = iter(pieces)
+    buffered = []
+    buffered_length = 0
+
+    # A short document stays one chunk, so wait until the text is known to be too long
+    for piece in pieces:
+        buffered.append(piece)
+        buffered_length += len(piece) + (1 if len(buffered) > 1 else 0)
+        if buffered_length + 2 > max_chunk_length:
+            break
+    else:
+        text = " ".join(buffered)
+        if len(text) > MIN_CHUNK_LENGTH:
+            yield text
+        return
+
+    packer = _SentencePacker(max_chunk_length)
+    tail = ""
+
+    def split(text):
+        nonlocal tail
+        sentences = SENTENCE_END_PATTERN.split(tail + text)
+        tail = sentences.pop()
+        for sentence in sentences:
+            chunk = packer.add(sentence)
+            if chunk and len(chunk) > MIN_CHUNK_LENGTH:
+                yield chunk
+
+    yield from split(" ".join(buffered))
+    buffered = None
+    for piece in pieces:
+        yield from split(" " + piece)
+
+    chunk = packer.add(tail)
+    if chunk and len(chunk) > MIN_CHUNK_LENGTH:
+        yield chunk
+    chunk = packer.flush()
+    if chunk and len(chunk) > MIN_CHUNK_LENGTH:
+        yield chunk
+
+
+def chunk_pages(pages, max_chunk_length: int) -> list:
+    """
+    Clean and chunk a stream of pages.
+    Raises ValueError when no readable text or no usable chunk remains.
+    """
+    seen_text = False
+
+    def cleaned():
+        nonlocal seen_text
+        for piece in iter_clean_text(pages):
+            seen_text = True
+            yield piece
+
+    chunks = list(iter_chunks(cleaned(), max_chunk_length))
+    if not seen_text:
+        raise ValueError("No readable text found in the document.")
+    if not chunks:
+        raise ValueError("Document could not be processed into chunks.")
+    return chunks
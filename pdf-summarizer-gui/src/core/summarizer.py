@@ -1,38 +1,17 @@
+import hashlib
 import os
 from pathlib import Path
 import re
+import time
 import numpy as np
-import ollama
-from sentence_transformers import SentenceTransformer
-import PyPDF2
 from config.settings import Settings
-
-
-def read_file(file_path: Path) -> str:
-    """Read text content from PDF or TXT files with better error handling"""
-    try:
-        if file_path.suffix.lower() == ".txt":
-            return file_path.read_text(encoding="utf-8")
-        elif file_path.suffix.lower() == ".pdf":
-            text = ""
-            with file_path.open("rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                for page_num, page in enumerate(reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                    except Exception as e:
-                        print(f"Warning: Could not extract text from page {page_num + 1} of {file_path.name}: {e}")
-                        continue
-            
-            if not text.strip():
-                raise ValueError(f"No text could be extracted from PDF: {file_path.name}")
-            return text
-        else:
-            raise ValueError(f"Unsupported file type: {file_path.suffix}. Supported types: .pdf, .txt")
-    except Exception as e:
-        raise Exception(f"Error reading file {file_path.name}: {str(e)}")
+from .extraction import read_file
+from .chunking import chunking_options, chunk_document_pages
+from .embedder import get_embedder
+from .generation import GenerationStats, get_generator
+from .retrieval import ChunkIndex, normalize_in_place
+from .cancellation import RunCancelled, check
+from .context import CONTEXT_SEPARATOR, get_token_counter, pack_prompt, prompt_budget
 
 
 def clean_text(text: str) -> str:
@@ -93,63 +72,302 @@ def chunk_text(text: str, max_chunk_length: int = None) -> list:
     return [chunk for chunk in chunks if len(chunk.strip()) > 50]  # Filter out very short chunks
 
 
-def embed_chunks(chunks: list, embedder) -> np.ndarray:
-    """Create embeddings for text chunks with error handling"""
+def get_embedding_dimension(embedder) -> int:
+    """Ask the model for its embedding size, encoding a probe string if it cannot say"""
     try:
-        embeddings = []
-        for i, chunk in enumerate(chunks):
+        dimension = embedder.get_sentence_embedding_dimension()
+        if dimension:
+            return int(dimension)
+    except Exception:
+        pass
+    return int(np.asarray(embedder.encode("dimension probe")).shape[-1])
+
+
+def embed_chunks(chunks: list, embedder, batch_size: int = None, cancel_token=None) -> np.ndarray:
+    """
+    Create float32 embeddings for text chunks in batches.
+    If a batch fails, its chunks are retried one by one and only the failing ones become zero vectors.
+    A cancel_token is checked before every batch.
+    """
+    if batch_size is None:
+        settings = Settings()
+        batch_size = settings.get_embedding_batch_size()
+    batch_size = max(1, batch_size)
+    
+    try:
+        dimension = get_embedding_dimension(embedder)
+        embeddings = np.zeros((len(chunks), dimension), dtype=np.float32)
+        
+        for start in range(0, len(chunks), batch_size):
+            check(cancel_token)
+            batch = chunks[start:start + batch_size]
             try:
-                embedding = embedder.encode(chunk)
-                embeddings.append(embedding)
+                embeddings[start:start + len(batch)] = embedder.encode(
+                    batch, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False
+                )
+                continue
             except Exception as e:
-                print(f"Warning: Could not embed chunk {i + 1}: {e}")
-                # Use zero vector as fallback
-                embedding_size = 384  # Standard size for all-MiniLM-L6-v2
-                embeddings.append(np.zeros(embedding_size))
+                print(f"Warning: Batch embedding failed for chunks {start + 1}-{start + len(batch)}, retrying individually: {e}")
+            
+            for i, chunk in enumerate(batch, start):
+                try:
+                    embeddings[i] = embedder.encode(chunk, convert_to_numpy=True, show_progress_bar=False)
+                except Exception as e:
+                    # Row stays as the zero vector fallback
+                    print(f"Warning: Could not embed chunk {i + 1}: {e}")
         
-        return np.array(embeddings)
+        # Unit-length rows make every later similarity a plain dot product
+        return normalize_in_place(embeddings)
     except Exception as e:
         raise Exception(f"Error creating embeddings: {str(e)}")
 
 
+def embed_documents(chunk_lists: list, embedder, batch_size: int = None, cancel_token=None) -> list:
+    """
+    Embed the chunks of several documents in shared batches.
+    Returns one embedding matrix per document (views into a single float32 matrix).
+    """
+    all_chunks = [chunk for chunks in chunk_lists for chunk in chunks]
+    embeddings = embed_chunks(all_chunks, embedder, batch_size, cancel_token)
+    
+    per_document = []
+    offset = 0
+    for chunks in chunk_lists:
+        per_document.append(embeddings[offset:offset + len(chunks)])
+        offset += len(chunks)
+    return per_document
+
+
+def embed_chunks_with_store(chunks: list, embedder, store, doc_id: str,
+                            batch_size: int = None, source: str = None) -> np.ndarray:
+    """Embed chunks, reusing vectors from an EmbeddingStore and saving any newly computed ones"""
+    embeddings, missing = store.lookup(doc_id, chunks)
+    if embeddings is None:
+        embeddings = embed_chunks(chunks, embedder, batch_size)
+    elif missing:
+        embeddings[missing] = embed_chunks([chunks[i] for i in missing], embedder, batch_size)
+    else:
+        return embeddings
+    
+    store.save(doc_id, chunks, embeddings, source)
+    return embeddings
+
+
 def retrieve_relevant_chunks(query: str, chunks: list, chunk_embeddings: np.ndarray,
                               embedder, top_k: int = None) -> list:
     """Retrieve the most relevant chunks for the query"""
-    if top_k is None:
-        settings = Settings()
-        top_k = settings.get_top_k_retrieval()
+    return retrieve_relevant_chunks_multi([query], chunks, chunk_embeddings, embedder, top_k)[0]
+
+
+def prepare_chunks(document_text: str, settings: Settings = None) -> list:
+    """Clean and chunk document text, raising ValueError when nothing usable remains"""
+    settings = settings or Settings()
+    return chunk_document_pages([document_text], chunking_options(settings), numbered=False)
+
+
+def build_prompt(query: str, relevant_chunks: list, settings: Settings = None) -> str:
+    """Build the Ollama prompt from the retrieved chunks, packed within the model's token budget"""
+    return pack_prompt(query, relevant_chunks, settings).prompt
+
+
+def generate_summary(prompt: str, settings: Settings = None) -> str:
+    """Call Ollama for summarization through the shared generator"""
+    return get_generator(settings).generate(prompt)
+
+
+def build_summary_prompt(chunks: list, embeddings: np.ndarray, embedder, query: str,
+                         settings: Settings = None) -> str:
+    """Retrieve the chunks relevant to the query and build the prompt, raising ValueError if none are found"""
+    settings = settings or Settings()
     
+    relevant_chunks = retrieve_relevant_chunks(
+        query, chunks, embeddings, embedder, settings.get_top_k_retrieval()
+    )
+    
+    if not relevant_chunks:
+        raise ValueError("No relevant content found in the document.")
+    
+    return build_prompt(query, relevant_chunks, settings)
+
+
+def choose_summary_mode(chunk_count: int, settings: Settings = None) -> str:
+    """Resolve the configured summary mode to "rag" or "map_reduce" for a document"""
+    settings = settings or Settings()
+    mode = settings.get_summary_mode()
+    if mode == "auto":
+        return "map_reduce" if chunk_count >= settings.get_map_reduce_min_chunks() else "rag"
+    return mode
+
+
+def group_chunks(chunks: list, budget: int, count, max_items: int = None) -> list:
+    """
+    Split consecutive chunks into groups whose joined text fits in budget tokens, with at
+    most max_items chunks per group. A chunk too large on its own forms its own group.
+    """
+    separator_tokens = count(CONTEXT_SEPARATOR)
+    groups = []
+    group = []
+    used = 0
+    for chunk in chunks:
+        cost = count(chunk) + (separator_tokens if group else 0)
+        if group and (used + cost > budget or (max_items and len(group) >= max_items)):
+            groups.append(group)
+            group = []
+            cost = count(chunk)
+            used = 0
+        group.append(chunk)
+        used += cost
+    if group:
+        groups.append(group)
+    return groups
+
+
+def _generate_all(prompts: list, generator, options: dict = None, cancel_token=None) -> list:
+    """Run prompts concurrently on the generator and keep the successful answers, in order"""
+    futures = [generator.submit(prompt, options, cancel_token) for prompt in prompts]
     try:
-        query_embedding = embedder.encode(query)
-        
-        # Calculate cosine similarity
-        norms = np.linalg.norm(chunk_embeddings, axis=1) * np.linalg.norm(query_embedding)
-        # Add small epsilon to avoid division by zero
-        similarities = np.dot(chunk_embeddings, query_embedding) / (norms + 1e-10)
-        
-        # Get top-k most similar chunks
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        
-        # Filter out chunks with very low similarity (< 0.1)
-        relevant_chunks = []
-        for idx in top_indices:
-            if similarities[idx] > 0.1:  # Minimum similarity threshold
-                relevant_chunks.append(chunks[idx])
+        answers = [future.result() for future in futures]
+    except RunCancelled:
+        # Requests still queued behind the cancelled ones never reach Ollama
+        for future in futures:
+            future.cancel()
+        raise
+    successful = [answer for answer in answers if not answer.startswith("Error")]
+    if not successful and answers:
+        raise RuntimeError(answers[0])
+    return successful
+
+
+def map_reduce_stream(chunks: list, query: str, settings: Settings = None, generator=None,
+                      on_token=None, cancel_token=None) -> tuple:
+    """
+    Summarize a whole document: every group of consecutive chunks is summarized concurrently
+    (map), then the partial summaries are combined map_reduce_fan_out at a time for up to
+    map_reduce_depth levels (reduce) before the final answer is written with the summary
+    prompt template. Wall time grows with len(chunks) / max_in_flight plus one round per level.
+    The final answer is streamed to on_token. Returns (summary, GenerationStats) where the
+    stats describe the final answer but elapsed covers every round.
+    A cancel_token stops the run between requests and during the final stream.
+    """
+    started = time.perf_counter()
+    settings = settings or Settings()
+    generator = generator or get_generator(settings)
+    count = get_token_counter(settings)
+    partial_options = {"num_predict": settings.get_map_summary_tokens()}
+    fan_out = max(2, settings.get_map_reduce_fan_out())
+    
+    try:
+        map_template = settings.get_map_prompt_template()
+        groups = group_chunks(chunks, prompt_budget(settings, map_template, query, count), count)
+        partials = _generate_all(
+            [pack_prompt(query, group, settings, count, map_template).prompt for group in groups],
+            generator, partial_options, cancel_token
+        )
         
-        # Ensure we have at least one chunk
-        if not relevant_chunks and chunks:
-            relevant_chunks = [chunks[top_indices[0]]]
+        reduce_template = settings.get_reduce_prompt_template()
+        reduce_budget = prompt_budget(settings, reduce_template, query, count)
+        for _ in range(settings.get_map_reduce_depth()):
+            if len(partials) <= fan_out:
+                break
+            groups = group_chunks(partials, reduce_budget, count, fan_out)
+            partials = _generate_all(
+                [pack_prompt(query, group, settings, count, reduce_template).prompt for group in groups],
+                generator, partial_options, cancel_token
+            )
         
-        return relevant_chunks
+        # The final prompt keeps as many partial summaries as fit, in document order. It goes
+        # through the generator's executor like every other request, so callers running several
+        # map-reduce summaries at once still send at most max_in_flight requests to Ollama
+        summary, stats = generator.submit_stream(
+            pack_prompt(query, partials, settings, count).prompt, on_token, cancel_token=cancel_token
+        ).result()
+        stats.elapsed = time.perf_counter() - started
+        return summary, stats
+    except RuntimeError as e:
+        return str(e), GenerationStats(elapsed=time.perf_counter() - started)
+    except Exception as e:
+        return f"Error during summarization: {str(e)}", GenerationStats(elapsed=time.perf_counter() - started)
+
+
+def map_reduce_summarize(chunks: list, query: str, settings: Settings = None, generator=None) -> str:
+    """Full-document map-reduce summary; see map_reduce_stream"""
+    return map_reduce_stream(chunks, query, settings, generator)[0]
+
+
+def summarize_chunks(chunks: list, embeddings: np.ndarray, embedder, query: str,
+                     settings: Settings = None) -> str:
+    """
+    Summarize already embedded chunks: from the chunks relevant to the query, or from all
+    of them with map-reduce when the document is long enough
+    """
+    settings = settings or Settings()
+    
+    if choose_summary_mode(len(chunks), settings) == "map_reduce":
+        return map_reduce_summarize(chunks, query, settings)
+    
+    try:
+        prompt = build_summary_prompt(chunks, embeddings, embedder, query, settings)
+        return generate_summary(prompt, settings)
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Error during summarization: {str(e)}"
+
+
+def retrieve_relevant_chunks_multi(queries: list, chunks: list, chunk_embeddings: np.ndarray,
+                                   embedder, top_k: int = None, query_embeddings: np.ndarray = None,
+                                   settings: Settings = None, normalized: bool = False) -> list:
+    """
+    Retrieve the most relevant chunks for several queries at once: the queries are encoded
+    in one batch (unless query_embeddings are given) and scored against every chunk with a
+    single matrix multiply. Returns one list of chunks per query.
+    Pass normalized=True when chunk_embeddings come from embed_chunks or an EmbeddingStore,
+    which already hold unit-length float32 rows.
+    """
+    settings = settings or Settings()
+    if top_k is None:
+        top_k = settings.get_top_k_retrieval()
+    
+    try:
+        if query_embeddings is None:
+            query_embeddings = embedder.encode(list(queries))
+        hits = ChunkIndex(chunk_embeddings, assume_normalized=normalized).search(
+            query_embeddings, top_k,
+            min_similarity=settings.get_retrieval_min_similarity(),
+            mmr_weight=settings.get_mmr_diversity(),
+            mmr_candidates=settings.get_mmr_candidates(),
+        )
+        return [[chunks[i] for i, _ in query_hits] for query_hits in hits]
     except Exception as e:
         print(f"Warning: Error in chunk retrieval: {e}")
         # Fallback: return first few chunks
-        return chunks[:min(top_k, len(chunks))]
+        return [chunks[:min(top_k, len(chunks))] for _ in queries]
 
 
-def rag_summarize(document_text: str, query: str = None) -> str:
+def build_summary_prompts(chunks: list, embeddings: np.ndarray, embedder, queries: list,
+                          settings: Settings = None, query_embeddings: np.ndarray = None,
+                          normalized: bool = False) -> list:
     """
-    Perform RAG-based summarization of document text
+    Build one PackedPrompt per query from a single retrieval pass.
+    Entries are None for queries with no relevant content.
+    """
+    settings = settings or Settings()
+    
+    relevant = retrieve_relevant_chunks_multi(
+        queries, chunks, embeddings, embedder, settings.get_top_k_retrieval(), query_embeddings, settings,
+        normalized
+    )
+    return [
+        pack_prompt(query, relevant_chunks, settings) if relevant_chunks else None
+        for query, relevant_chunks in zip(queries, relevant)
+    ]
+
+
+def rag_summarize(document_text: str, query: str = None, embedder=None, embedding_store=None) -> str:
+    """
+    Perform RAG-based summarization of document text.
+    Pass a shared embedder when summarizing many documents; otherwise the cached one is used.
+    With an EmbeddingStore, chunks indexed by an earlier call are not encoded again.
     """
     try:
         settings = Settings()
@@ -157,66 +375,27 @@ def rag_summarize(document_text: str, query: str = None) -> str:
         if query is None:
             query = settings.get_default_query()
         
-        # Clean and chunk the text
-        cleaned_text = clean_text(document_text)
-        if not cleaned_text.strip():
-            return "Error: No readable text found in the document."
-        
-        chunks = chunk_text(cleaned_text, settings.get_max_chunk_length())
-        if not chunks:
-            return "Error: Document could not be processed into chunks."
-        
-        # Create embeddings
-        embedder_model = settings.get_embedder_model()
         try:
-            embedder = SentenceTransformer(embedder_model)
-        except Exception as e:
-            return f"Error: Could not load embedding model {embedder_model}: {str(e)}"
-        
-        embeddings = embed_chunks(chunks, embedder)
-        
-        # Retrieve relevant chunks
-        relevant_chunks = retrieve_relevant_chunks(
-            query, chunks, embeddings, embedder, settings.get_top_k_retrieval()
-        )
-        
-        if not relevant_chunks:
-            return "Error: No relevant content found in the document."
+            chunks = prepare_chunks(document_text, settings)
+        except ValueError as e:
+            return f"Error: {str(e)}"
         
-        # Prepare context for the AI model
-        context = "\n\n---\n\n".join(relevant_chunks)
+        # Create embeddings
+        if embedder is None:
+            try:
+                embedder = get_embedder(settings=settings)
+            except Exception as e:
+                return f"Error: {str(e)}"
         
-        # Limit context length to avoid token limits
-        max_context_length = 4000  # Conservative limit for Gemma
-        if len(context) > max_context_length:
-            context = context[:max_context_length] + "..."
+        if embedding_store is not None:
+            doc_id = embedding_store.document_id(hashlib.sha256(document_text.encode("utf-8")).hexdigest())
+            embeddings = embed_chunks_with_store(
+                chunks, embedder, embedding_store, doc_id, settings.get_embedding_batch_size()
+            )
+        else:
+            embeddings = embed_chunks(chunks, embedder, settings.get_embedding_batch_size())
         
-        # Create prompt for Ollama
-        prompt = f"""Based on the following document content, please provide a comprehensive summary that addresses this question: {query}
-
-Document Content:
-{context}
-
-Please provide a clear, structured summary that:
-1. Captures the main points and key insights
-2. Is well-organized and easy to understand
-3. Focuses on the most important information
-4. Is concise but comprehensive
-
-Summary:"""
-
-        # Call Ollama for summarization
-        try:
-            response = ollama.generate(model="gemma3:1b", prompt=prompt)
-            summary = response.get("response", "").strip()
-            
-            if not summary:
-                return "Error: AI model returned empty response. Please check Ollama is running."
-            
-            return summary
-            
-        except Exception as e:
-            return f"Error: Could not generate summary using AI model: {str(e)}. Please ensure Ollama is running and the 'gemma3:1b' model is installed."
+        return summarize_chunks(chunks, embeddings, embedder, query, settings)
     
     except Exception as e:
-        return f"Error during summarization: {str(e)}"
\ No newline at end of file
+        return f"Error during summarization: {str(e)}"
@@ -0,0 +1,51 @@
+"""
+Background warm-up for the GUI. The window itself imports none of the heavy libraries;
+they are imported here, off the UI thread, in the order the first run needs them, and the
+embedding model is loaded last so the first document does not wait for any of it.
+"""
+
+import importlib
+import threading
+import time
+from config.settings import Settings
+from .embedder import warm_up_embedder
+
+# (module, description shown while it loads); imported by name, so build_exe.py lists them
+WARMUP_MODULES = [
+    ("numpy", "numerical libraries"),
+    ("PyPDF2", "PDF reader"),
+    ("ollama", "Ollama client"),
+    ("core.file_processor", "summarization pipeline"),
+    ("sentence_transformers", "embedding library"),
+]
+
+
+def warm_up(settings: Settings = None, status_callback=None, stop_event: threading.Event = None) -> bool:
+    """
+    Import the heavy modules and load the configured embedder, reporting each step to
+    status_callback(message). Failures only warn: anything missing loads on first use.
+    Setting stop_event skips the steps not yet started (a running import cannot be stopped).
+    Returns True when the embedder is ready.
+    """
+    status_callback = status_callback or (lambda message: None)
+    stop_event = stop_event or threading.Event()
+    started = time.perf_counter()
+    for module, description in WARMUP_MODULES:
+        if stop_event.is_set():
+            return False
+        status_callback(f"Loading {description}...")
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f"Warning: Could not preload {module}: {e}")
+
+    if stop_event.is_set():
+        return False
+    status_callback("Loading embedding model...")
+    ready = warm_up_embedder(settings)
+    elapsed = time.perf_counter() - started
+    if ready:
+        status_callback(f"Models loaded in {elapsed:.1f}s")
+    else:
+        status_callback("Embedding model will load on first use")
+    return ready
@@ -0,0 +1,191 @@
+import os
+import threading
+from pathlib import Path
+from config.settings import Settings
+from .pipeline import SummaryPipeline
+from .extraction import TextExtractor
+from .discovery import FileDiscovery
+from .cancellation import RunCancelled
+from .output_sink import EXCEL_SHEET, ILLEGAL_XLSX_CHARACTERS, FormatWriter, SummarySink
+
+
+class FolderWatcher:
+    """
+    Poll a folder for new or modified PDF/TXT files.
+    A file is only reported once its size and modification time are the same on two
+    consecutive polls, so documents still being copied in are not picked up half-written.
+    Each poll walks the folder with FileDiscovery, so recursion, include/exclude patterns,
+    symlinks and duplicates are handled exactly as in a batch run.
+    """
+
+    def __init__(self, folder: Path, settings: Settings = None):
+        self.folder = Path(folder)
+        self.settings = settings or Settings()
+        self.duplicates = []  # (duplicate, file kept) pairs found by the latest poll
+        self._seen = {}     # path -> (size, mtime_ns) already reported
+        self._pending = {}  # path -> (size, mtime_ns) observed but not yet stable
+        self._digests = {}  # content digests kept between polls for duplicate detection
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        discovery = FileDiscovery(self.folder, self.settings, digests=self._digests)
+        for file_path in discovery:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            snapshot[file_path] = (stat.st_size, stat.st_mtime_ns)
+        self.duplicates = discovery.duplicates
+        # Forget digests of files that changed or went away
+        for key in list(self._digests):
+            try:
+                stat = os.stat(key[0])
+                current = (stat.st_size, stat.st_mtime_ns) == key[1:]
+            except OSError:
+                current = False
+            if not current:
+                del self._digests[key]
+        return snapshot
+
+    def poll(self) -> list:
+        """Return files that are new or changed since they were last reported and have stopped changing"""
+        snapshot = self._scan()
+        ready = []
+        for path, signature in snapshot.items():
+            if self._seen.get(path) == signature:
+                continue
+            if self._pending.get(path) == signature:
+                ready.append(path)
+                self._seen[path] = signature
+                del self._pending[path]
+            else:
+                self._pending[path] = signature
+
+        # Forget deleted files so they are processed again if they come back
+        for path in list(self._seen):
+            if path not in snapshot:
+                del self._seen[path]
+        for path in list(self._pending):
+            if path not in snapshot:
+                del self._pending[path]
+        return sorted(ready)
+
+
+class BatchRows(FormatWriter):
+    """Output of a SummarySink that keeps the rows of one watch batch for update_summary_workbook"""
+
+    def __init__(self, path: Path, columns: list, types: list):
+        super().__init__(path, columns, types)
+        self.rows = []
+
+    def write(self, row: list):
+        self.rows.append(row)
+
+
+def _new_workbook(columns: list):
+    from openpyxl import Workbook
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = EXCEL_SHEET
+    sheet.append(columns)
+    return workbook, sheet
+
+
+def update_summary_workbook(excel_path: Path, columns: list, rows: list):
+    """
+    Insert or replace rows in an existing summaries.xlsx, matched on the Filename column,
+    instead of rebuilding the whole spreadsheet. columns is the full SummarySink header,
+    so a workbook written by a batch run keeps its metadata columns and rows.
+    """
+    from openpyxl import load_workbook
+
+    excel_path = Path(excel_path)
+    if excel_path.exists():
+        workbook = load_workbook(excel_path)
+        sheet = workbook[EXCEL_SHEET] if EXCEL_SHEET in workbook.sheetnames else workbook.active
+        header = [cell.value for cell in sheet[1]]
+        if header != columns:
+            # Different query or metadata columns: start the sheet over with the new layout
+            workbook, sheet = _new_workbook(columns)
+    else:
+        workbook, sheet = _new_workbook(columns)
+
+    row_numbers = {
+        sheet.cell(row=row, column=1).value: row for row in range(2, sheet.max_row + 1)
+    }
+    for values in rows:
+        values = [ILLEGAL_XLSX_CHARACTERS.sub("", value) if isinstance(value, str) else value
+                  for value in values]
+        row = row_numbers.get(values[0])
+        if row is None:
+            sheet.append(values)
+            row_numbers[values[0]] = sheet.max_row
+        else:
+            for column, value in enumerate(values, start=1):
+                sheet.cell(row=row, column=column, value=value)
+
+    tmp_path = excel_path.with_name(excel_path.stem + ".tmp.xlsx")
+    workbook.save(tmp_path)
+    os.replace(tmp_path, excel_path)
+
+
+def watch_folder(folder_path: str, stop_event: threading.Event = None, settings: Settings = None,
+                 progress_callback=None, file_callback=None, rows_callback=None, cancel_token=None):
+    """
+    Summarize files as they arrive in folder_path until stop_event is set.
+    summaries.xlsx in output_rag/ is updated after every batch of arrivals.
+    Cancelling cancel_token stops a batch in progress; the files it finished are still saved.
+    """
+    settings = settings or Settings()
+    stop_event = stop_event or threading.Event()
+    progress_callback = progress_callback or (lambda percentage, message: print(message))
+
+    input_folder = Path(folder_path)
+    output_folder = input_folder / "output_rag"
+    output_folder.mkdir(exist_ok=True)
+    excel_path = output_folder / "summaries.xlsx"
+
+    watcher = FolderWatcher(input_folder, settings)
+    reported_duplicates = set()  # (duplicate, file kept) pairs already in the workbook
+    # One extractor for the whole session so the worker processes stay warm between arrivals
+    extractor = TextExtractor(settings=settings)
+    progress_callback(0, f"Watching {input_folder} for new files...")
+    try:
+        while not stop_event.is_set():
+            files = watcher.poll()
+            duplicates = [pair for pair in watcher.duplicates if pair not in reported_duplicates]
+            reported_duplicates = set(watcher.duplicates)
+            if files or duplicates:
+                if files:
+                    progress_callback(0, f"Detected {len(files)} new or modified files")
+                pipeline = SummaryPipeline(
+                    output_folder, settings=settings, progress_callback=progress_callback,
+                    file_callback=file_callback, extractor=extractor, base_folder=input_folder,
+                    cancel_token=cancel_token
+                )
+                # Rows are laid out exactly as a batch run writes them, metadata columns included
+                pipeline.sink = SummarySink(output_folder, pipeline.result_columns(), settings, formats=[])
+                batch = BatchRows(excel_path, pipeline.sink.columns, pipeline.sink.types)
+                pipeline.sink.writers.append(batch)
+                cancelled = False
+                try:
+                    if files:
+                        pipeline.run(files)
+                except RunCancelled:
+                    cancelled = True
+                    progress_callback(100, "Watching cancelled during a batch")
+                for duplicate, original in duplicates:
+                    pipeline.record_duplicate(duplicate, original)
+                if batch.rows:
+                    try:
+                        update_summary_workbook(excel_path, batch.columns, batch.rows)
+                        progress_callback(100, f"Updated {excel_path.name} with {len(batch.rows)} files")
+                    except Exception as e:
+                        progress_callback(100, f"Error updating {excel_path.name}: {e}")
+                    if rows_callback:
+                        rows_callback(len(batch.rows))
+                if cancelled:
+                    break
+            stop_event.wait(settings.get_watch_poll_interval())
+    finally:
+        extractor.close()
@@ -1,98 +1,103 @@
 import sys
 import os
+import threading
 from PyQt5.QtWidgets import (QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, 
                              QWidget, QFileDialog, QMessageBox, QLabel, QTextEdit, 
                              QProgressBar, QFrame)
 from PyQt5.QtCore import QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QIcon
-from core.file_processor import process_files
 from config.settings import Settings
-import requests
+from core.cancellation import CancellationToken
 
 
 class FileProcessingThread(QThread):
     progress_update = pyqtSignal(int, str)  # progress percentage, status message
     file_processed = pyqtSignal(str)  # filename processed
+    token_received = pyqtSignal(str, str)  # filename, generated text piece
+    generation_stats = pyqtSignal(str, float, float)  # filename, seconds to first token, tokens/sec
     finished_processing = pyqtSignal(bool, str)  # success, message
     
     def __init__(self, folder_path):
         super().__init__()
         self.folder_path = folder_path
+        self.cancel_token = CancellationToken()  # pause/resume/cancel from the UI thread
         
     def run(self):
         try:
-            from pathlib import Path
-            import pandas as pd
-            from core.summarizer import read_file, rag_summarize
+            from core.file_processor import process_folder
             
-            input_folder = Path(self.folder_path)
-            output_folder = input_folder / "output_rag"
-            output_folder.mkdir(exist_ok=True)
-            
-            settings = Settings()
-            query = settings.get_default_query()
-            
-            # Find all supported files
-            files = (list(input_folder.glob("*.txt")) + 
-                    list(input_folder.glob("*.pdf")) + 
-                    list(input_folder.glob("*.PDF")))
-            
-            if not files:
-                self.finished_processing.emit(False, "No supported files (PDF or TXT) found in the selected folder.")
-                return
-            
-            self.progress_update.emit(0, f"Found {len(files)} files to process...")
-            
-            results = []
-            for i, file in enumerate(files):
-                try:
-                    self.progress_update.emit(
-                        int((i / len(files)) * 90), 
-                        f"Processing: {file.name}"
-                    )
-                    self.file_processed.emit(file.name)
-                    
-                    # Read and process file
-                    text = read_file(file)
-                    answer = rag_summarize(text, query)
-                    
-                    # Save individual summary
-                    output_file = output_folder / f"{file.stem}_rag_answer.txt"
-                    output_file.write_text(answer, encoding="utf-8")
-                    
-                    results.append((file.name, answer))
-                    
-                except Exception as e:
-                    error_msg = f"Error processing {file.name}: {str(e)}"
-                    self.progress_update.emit(
-                        int((i / len(files)) * 90), 
-                        error_msg
-                    )
-                    
-            # Create Excel summary
-            if results:
-                self.progress_update.emit(95, "Creating summary spreadsheet...")
-                df = pd.DataFrame(results, columns=["Filename", "Summary"])
-                excel_path = output_folder / "summaries.xlsx"
-                df.to_excel(excel_path, index=False)
-                
-                self.progress_update.emit(100, "Processing complete!")
-                self.finished_processing.emit(
-                    True, 
-                    f"Successfully processed {len(results)} files.\nResults saved to: {output_folder}"
-                )
-            else:
-                self.finished_processing.emit(False, "No files could be processed successfully.")
+            success, message = process_folder(
+                self.folder_path,
+                progress_callback=self.progress_update.emit,
+                file_callback=self.file_processed.emit,
+                token_callback=self.token_received.emit,
+                stats_callback=self.generation_stats.emit,
+                cancel_token=self.cancel_token
+            )
+            self.finished_processing.emit(success, message)
                 
         except Exception as e:
             self.finished_processing.emit(False, f"Unexpected error: {str(e)}")
 
 
+class FolderWatchThread(QThread):
+    progress_update = pyqtSignal(int, str)  # progress percentage, status message
+    file_processed = pyqtSignal(str)  # filename processed
+    rows_updated = pyqtSignal(int)  # number of spreadsheet rows added or updated
+    finished_processing = pyqtSignal(bool, str)  # success, message
+    
+    def __init__(self, folder_path):
+        super().__init__()
+        self.folder_path = folder_path
+        self.stop_event = threading.Event()
+        self.cancel_token = CancellationToken()  # stops a batch that is being summarized
+        
+    def run(self):
+        try:
+            from core.watcher import watch_folder
+            watch_folder(
+                self.folder_path, self.stop_event,
+                progress_callback=self.progress_update.emit,
+                file_callback=self.file_processed.emit,
+                rows_callback=self.rows_updated.emit,
+                cancel_token=self.cancel_token
+            )
+            self.finished_processing.emit(True, "Stopped watching folder.")
+        except Exception as e:
+            self.finished_processing.emit(False, f"Unexpected error: {str(e)}")
+    
+    def stop(self):
+        self.stop_event.set()
+        self.cancel_token.cancel()
+
+
+class WarmupThread(QThread):
+    status_update = pyqtSignal(str)  # warm-up step being loaded
+    warmup_finished = pyqtSignal(bool)  # embedder loaded successfully
+    
+    def __init__(self):
+        super().__init__()
+        self.stop_event = threading.Event()
+    
+    def run(self):
+        # Even core.warmup is imported here, so none of the heavy libraries load before the window shows
+        from core.warmup import warm_up
+        self.warmup_finished.emit(
+            warm_up(status_callback=self.status_update.emit, stop_event=self.stop_event)
+        )
+    
+    def stop(self):
+        """Skip the remaining warm-up steps; the step being loaded still finishes"""
+        self.stop_event.set()
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.settings = Settings()
         self.processing_thread = None
+        self.watch_thread = None
+        self.warmup_thread = None
         self.setWindowTitle("PDF Summarizer - AI Document Analysis")
         self.setGeometry(100, 100, 700, 500)
         self.setMinimumSize(600, 400)
@@ -135,6 +140,11 @@ class MainWindow(QMainWindow):
         self.status_label.setStyleSheet("font-weight: bold; color: #27ae60;")
         status_layout.addWidget(self.status_label)
         
+        # Background warm-up progress; hidden once the models are loaded
+        self.warmup_label = QLabel("Starting up...")
+        self.warmup_label.setStyleSheet("color: #7f8c8d; font-size: 11px;")
+        status_layout.addWidget(self.warmup_label)
+        
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -189,6 +199,57 @@ class MainWindow(QMainWindow):
         self.select_folder_button.clicked.connect(self.select_folder)
         button_layout.addWidget(self.select_folder_button)
         
+        # Watch folder button
+        self.watch_folder_button = QPushButton("👁 Watch Folder")
+        self.watch_folder_button.setMinimumHeight(50)
+        self.watch_folder_button.setStyleSheet("""
+            QPushButton {
+                background-color: #16a085;
+                color: white;
+                border: none;
+                border-radius: 5px;
+                font-size: 16px;
+                font-weight: bold;
+                padding: 10px;
+            }
+            QPushButton:hover {
+                background-color: #138d75;
+            }
+            QPushButton:disabled {
+                background-color: #bdc3c7;
+            }
+        """)
+        self.watch_folder_button.clicked.connect(self.toggle_watch)
+        button_layout.addWidget(self.watch_folder_button)
+        
+        # Pause and cancel buttons, shown while a folder is being processed
+        self.pause_button = QPushButton("⏸ Pause")
+        self.cancel_button = QPushButton("⏹ Cancel")
+        for button, color, hover in ((self.pause_button, "#f39c12", "#d68910"),
+                                     (self.cancel_button, "#e74c3c", "#cb4335")):
+            button.setMinimumHeight(50)
+            button.setStyleSheet(f"""
+                QPushButton {{
+                    background-color: {color};
+                    color: white;
+                    border: none;
+                    border-radius: 5px;
+                    font-size: 16px;
+                    font-weight: bold;
+                    padding: 10px;
+                }}
+                QPushButton:hover {{
+                    background-color: {hover};
+                }}
+                QPushButton:disabled {{
+                    background-color: #bdc3c7;
+                }}
+            """)
+            button.setVisible(False)
+            button_layout.addWidget(button)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.cancel_button.clicked.connect(self.cancel_processing)
+        
         # Help button
         help_button = QPushButton("❓ Help")
         help_button.setMinimumHeight(50)
@@ -230,14 +291,52 @@ class MainWindow(QMainWindow):
         """)
         self.results_text.setPlaceholderText("Processing details will appear here...")
         main_layout.addWidget(self.results_text)
+        
+        # Live preview of the summary being generated
+        preview_label = QLabel("Live Preview:")
+        preview_label.setStyleSheet("font-weight: bold; margin-top: 10px;")
+        main_layout.addWidget(preview_label)
+        
+        self.preview_text = QTextEdit()
+        self.preview_text.setReadOnly(True)
+        self.preview_text.setMaximumHeight(150)
+        self.preview_text.setStyleSheet("""
+            QTextEdit {
+                border: 1px solid #bdc3c7;
+                border-radius: 5px;
+                padding: 10px;
+                background-color: #ffffff;
+                font-size: 12px;
+            }
+        """)
+        self.preview_text.setPlaceholderText("Summaries appear here as the AI model writes them...")
+        main_layout.addWidget(self.preview_text)
+        self.preview_file = None  # file whose summary the preview is showing
 
     def check_dependencies_on_startup(self):
         """Check if Ollama is available when the app starts"""
         QTimer.singleShot(1000, self.validate_ollama)  # Check after 1 second delay
+        self.start_embedder_warmup()
+
+    def start_embedder_warmup(self):
+        """Import the heavy libraries and load the embedding model in the background"""
+        self.warmup_thread = WarmupThread()
+        self.warmup_thread.status_update.connect(self.warmup_label.setText)
+        self.warmup_thread.warmup_finished.connect(self.embedder_warmup_finished)
+        self.warmup_thread.start()
+
+    def embedder_warmup_finished(self, success):
+        """Log the outcome of the embedder warm-up"""
+        QTimer.singleShot(3000, lambda: self.warmup_label.setVisible(False))
+        if success:
+            self.results_text.append("Embedding model loaded.")
+        else:
+            self.results_text.append("Warning: Embedding model could not be preloaded; it will load on first use.")
 
     def validate_ollama(self):
         """Check if Ollama is running and accessible"""
         try:
+            import requests  # only needed for this check; keeps it off the start-up path
             response = requests.get("http://localhost:11434/api/tags", timeout=5)
             if response.status_code == 200:
                 self.status_label.setText("✅ Ready to process files (Ollama connected)")
@@ -287,26 +386,59 @@ class MainWindow(QMainWindow):
 
     def start_processing(self, folder_path):
         """Start file processing in a separate thread"""
-        # Disable button during processing
+        # Disable buttons during processing
         self.select_folder_button.setEnabled(False)
         self.select_folder_button.setText("🔄 Processing...")
+        self.watch_folder_button.setEnabled(False)
         
         # Show progress bar
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.current_file_label.setVisible(True)
         
+        self.pause_button.setText("⏸ Pause")
+        self.pause_button.setEnabled(True)
+        self.pause_button.setVisible(True)
+        self.cancel_button.setText("⏹ Cancel")
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.setVisible(True)
+        
         # Clear previous results
         self.results_text.clear()
+        self.preview_text.clear()
+        self.preview_file = None
         self.results_text.append(f"Starting processing of folder: {folder_path}\n")
         
         # Start processing thread
         self.processing_thread = FileProcessingThread(folder_path)
         self.processing_thread.progress_update.connect(self.update_progress)
         self.processing_thread.file_processed.connect(self.file_processed)
+        self.processing_thread.token_received.connect(self.preview_token)
+        self.processing_thread.generation_stats.connect(self.preview_stats)
         self.processing_thread.finished_processing.connect(self.processing_finished)
         self.processing_thread.start()
 
+    def toggle_pause(self):
+        """Pause before the next file or request, or resume a paused run"""
+        token = self.processing_thread.cancel_token
+        if token.paused:
+            token.resume()
+            self.pause_button.setText("⏸ Pause")
+            self.results_text.append("Resumed.")
+        else:
+            token.pause()
+            self.pause_button.setText("▶ Resume")
+            self.status_label.setText("⏸ Paused - requests already sent will finish first")
+            self.results_text.append("Paused.")
+
+    def cancel_processing(self):
+        """Stop the run at the next safe point; finished files are kept"""
+        self.processing_thread.cancel_token.cancel()
+        self.pause_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.setText("⏳ Cancelling...")
+        self.status_label.setText("⏳ Cancelling - finishing the current step...")
+
     def update_progress(self, percentage, message):
         """Update progress bar and status"""
         self.progress_bar.setValue(percentage)
@@ -322,21 +454,49 @@ class MainWindow(QMainWindow):
         """Update current file being processed"""
         self.current_file_label.setText(f"Currently processing: {filename}")
 
+    def preview_token(self, filename, text):
+        """Append generated text to the live preview; a new file takes over once the last one is done"""
+        if self.preview_file is None:
+            self.preview_file = filename
+            self.preview_text.clear()
+            self.preview_text.append(f"▶ {filename}\n")
+        if filename != self.preview_file:
+            return
+        cursor = self.preview_text.textCursor()
+        cursor.movePosition(cursor.End)
+        cursor.insertText(text)
+        self.preview_text.setTextCursor(cursor)
+
+    def preview_stats(self, filename, time_to_first_token, tokens_per_second):
+        """Show the generation speed under a finished summary in the live preview"""
+        if filename == self.preview_file:
+            self.preview_text.append(
+                f"\n\n⏱ First token {time_to_first_token:.2f}s · {tokens_per_second:.1f} tokens/sec"
+            )
+            self.preview_file = None
+
     def processing_finished(self, success, message):
         """Handle completion of processing"""
-        # Re-enable button
+        # Re-enable buttons
         self.select_folder_button.setEnabled(True)
         self.select_folder_button.setText("📁 Select Folder")
+        self.watch_folder_button.setEnabled(True)
         
         # Hide progress elements
         self.progress_bar.setVisible(False)
         self.current_file_label.setVisible(False)
+        self.pause_button.setVisible(False)
+        self.cancel_button.setVisible(False)
         
         # Update status
         if success:
             self.status_label.setText("✅ Processing completed successfully!")
             self.status_label.setStyleSheet("font-weight: bold; color: #27ae60;")
             QMessageBox.information(self, "Success", message)
+        elif self.processing_thread.cancel_token.cancelled:
+            self.status_label.setText("⏹ Processing cancelled")
+            self.status_label.setStyleSheet("font-weight: bold; color: #e67e22;")
+            QMessageBox.information(self, "Cancelled", message)
         else:
             self.status_label.setText("❌ Processing failed")
             self.status_label.setStyleSheet("font-weight: bold; color: #e74c3c;")
@@ -345,6 +505,66 @@ class MainWindow(QMainWindow):
         self.results_text.append(f"\n{'='*50}")
         self.results_text.append(f"FINAL RESULT: {message}")
 
+    def toggle_watch(self):
+        """Start watching a folder, or stop the running watch"""
+        if self.watch_thread and self.watch_thread.isRunning():
+            self.watch_folder_button.setEnabled(False)
+            self.watch_folder_button.setText("⏳ Stopping...")
+            self.watch_thread.stop()
+            return
+        
+        if not self.validate_ollama():
+            return
+        
+        folder_path = QFileDialog.getExistingDirectory(
+            self, 
+            "Select Folder to Watch",
+            "",
+            QFileDialog.ShowDirsOnly | QFileDialog.DontResolveSymlinks
+        )
+        
+        if folder_path:
+            self.start_watching(folder_path)
+
+    def start_watching(self, folder_path):
+        """Summarize files as they arrive in folder_path"""
+        self.select_folder_button.setEnabled(False)
+        self.watch_folder_button.setText("⏹ Stop Watching")
+        self.current_file_label.setVisible(True)
+        
+        self.results_text.clear()
+        self.results_text.append(f"Watching folder: {folder_path}\n")
+        
+        self.watch_thread = FolderWatchThread(folder_path)
+        self.watch_thread.progress_update.connect(self.update_progress)
+        self.watch_thread.file_processed.connect(self.file_processed)
+        self.watch_thread.rows_updated.connect(self.watch_rows_updated)
+        self.watch_thread.finished_processing.connect(self.watching_finished)
+        self.watch_thread.start()
+
+    def watch_rows_updated(self, count):
+        """Report a spreadsheet update from the watch thread"""
+        self.status_label.setText(f"👁 Watching - summaries.xlsx updated ({count} files)")
+        self.status_label.setStyleSheet("font-weight: bold; color: #16a085;")
+
+    def watching_finished(self, success, message):
+        """Restore the buttons once the watch thread has stopped"""
+        self.select_folder_button.setEnabled(True)
+        self.watch_folder_button.setEnabled(True)
+        self.watch_folder_button.setText("👁 Watch Folder")
+        self.current_file_label.setVisible(False)
+        
+        if success:
+            self.status_label.setText("✅ Ready to process files")
+            self.status_label.setStyleSheet("font-weight: bold; color: #27ae60;")
+        else:
+            self.status_label.setText("❌ Watching failed")
+            self.status_label.setStyleSheet("font-weight: bold; color: #e74c3c;")
+            QMessageBox.critical(self, "Error", message)
+        
+        self.results_text.append(f"\n{'='*50}")
+        self.results_text.append(message)
+
     def show_help(self):
         """Show help dialog"""
         help_text = """
@@ -356,6 +576,11 @@ HOW TO USE:
 3. Wait for processing to complete
 4. Find summaries in the "output_rag" folder
 
+WATCH MODE:
+• Click "Watch Folder" to keep summarizing files as they are added
+• New or changed files are added to summaries.xlsx within seconds
+• Click "Stop Watching" to end
+
 SUPPORTED FILES:
 • PDF files (.pdf)
 • Text files (.txt)
@@ -383,8 +608,22 @@ OUTPUT:
         msg.setStandardButtons(QMessageBox.Ok)
         msg.exec_()
 
+    def stop_embedder_warmup(self):
+        """Stop the warm-up and wait for it; destroying a running QThread aborts the app"""
+        if self.warmup_thread and self.warmup_thread.isRunning():
+            # The window is going away, so nothing may reach its widgets any more
+            self.warmup_thread.status_update.disconnect()
+            self.warmup_thread.warmup_finished.disconnect()
+            self.warmup_thread.stop()
+            self.warmup_thread.wait()
+
     def closeEvent(self, event):
         """Handle application closing"""
+        if self.watch_thread and self.watch_thread.isRunning():
+            # Cancels a running batch; its finished files are still written
+            self.watch_thread.stop()
+            self.watch_thread.wait()
+        
         if self.processing_thread and self.processing_thread.isRunning():
             reply = QMessageBox.question(
                 self, 
@@ -395,10 +634,14 @@ OUTPUT:
             )
             
             if reply == QMessageBox.Yes:
-                self.processing_thread.terminate()
+                # Stop at the next safe point so no file is left half-written
+                self.processing_thread.cancel_token.cancel()
+                self.status_label.setText("⏳ Cancelling - finishing the current step...")
                 self.processing_thread.wait()
+                self.stop_embedder_warmup()
                 event.accept()
             else:
                 event.ignore()
         else:
+            self.stop_embedder_warmup()
             event.accept()
\ No newline at end of file
@@ -1,8 +1,11 @@
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from gui.main_window import MainWindow
 
 def main():
+    # Needed by the extraction process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
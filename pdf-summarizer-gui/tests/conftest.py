@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app runs from src/; the offline fixtures (fake embedder, stub Ollama) live next to the tests
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config.settings import Settings  # noqa: E402
+from fixtures import FakeEmbedder, StubOllama, make_pages, write_txt  # noqa: E402
+
+
+@pytest.fixture
+def stub_ollama():
+    with StubOllama(latency=0.05, tokens=8) as stub:
+        yield stub
+
+
+@pytest.fixture
+def settings(stub_ollama):
+    """Settings for a quick offline run against the stub server"""
+    settings = Settings()
+    settings.ollama_host = stub_ollama.host
+    settings.max_inflight_generations = 1
+    settings.extraction_workers = 0
+    settings.use_summary_cache = False
+    settings.use_embedding_store = False
+    settings.write_run_report = False
+    settings.output_formats = ["csv"]
+    return settings
+
+
+@pytest.fixture
+def document_folder(tmp_path):
+    """Six small text documents with different contents"""
+    folder = tmp_path / "documents"
+    folder.mkdir()
+    for index in range(6):
+        write_txt(folder / f"doc{index}.txt", make_pages(2, seed=index))
+    return folder
+
+
+@pytest.fixture
+def fake_embedder(monkeypatch):
+    """Batch and watch runs get a hashing embedder instead of loading a sentence-transformers model"""
+    import core.file_processor
+    import core.pipeline
+    embedder = FakeEmbedder()
+    for module in (core.file_processor, core.pipeline):
+        monkeypatch.setattr(module, "get_embedder", lambda settings=None: embedder)
+    return embedder
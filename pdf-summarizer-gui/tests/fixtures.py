@@ -0,0 +1,203 @@
+"""
+Offline stand-ins for the tests and benchmarks: synthetic PDF and TXT documents, a hashing
+embedder that needs no model download, and a stub Ollama server speaking the /api/generate
+protocol with a configurable latency and token rate.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+PDF_LINES_PER_PAGE = 60
+
+WORDS = (
+    "the model results data analysis method system performance design process value study "
+    "section table figure energy cost network memory signal control sample error rate"
+).split()
+
+
+def make_page(rng: random.Random, page_number: int) -> str:
+    """One page of PDF-like text: headings, wrapped paragraph lines and a page number"""
+    lines = []
+    for section in range(rng.randint(1, 3)):
+        lines.append(f"{page_number}.{section + 1} {rng.choice(WORDS).title()} {rng.choice(WORDS).title()}")
+        for _ in range(rng.randint(2, 4)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + "."
+                for _ in range(rng.randint(3, 8))
+            ]
+            paragraph = " ".join(sentences)
+            # Wrap at ~80 columns like extracted PDF text
+            while paragraph:
+                cut = paragraph.rfind(" ", 0, 80) if len(paragraph) > 80 else len(paragraph)
+                lines.append(paragraph[:cut])
+                paragraph = paragraph[cut:].lstrip()
+            lines.append("")
+    lines.append(str(page_number))
+    return "\n".join(lines)
+
+
+def make_pages(page_count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [make_page(rng, number) for number in range(1, page_count + 1)]
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: list):
+    """Write a minimal text PDF (Helvetica, one Tj per line) that PyPDF2 can extract"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in pages:
+        lines = text.splitlines()[:PDF_LINES_PER_PAGE]
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td\n" + "".join(
+            f"({_pdf_escape(line)}) Tj T*\n" for line in lines
+        ) + "ET"
+        data = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(data), data))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(output))
+
+
+def write_txt(path: Path, pages: list):
+    Path(path).write_text("\n\n".join(pages), encoding="utf-8")
+
+
+class FakeEmbedder:
+    """
+    Deterministic bag-of-words hashing embedder with the SentenceTransformer encode() API.
+    Cheap enough that benchmark numbers measure the pipeline rather than a model.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True,
+               show_progress_bar: bool = False, **kwargs):
+        single = isinstance(texts, str)
+        rows = np.zeros((1 if single else len(texts), self.dimension), dtype=np.float32)
+        for row, text in zip(rows, [texts] if single else texts):
+            for word in text.lower().split():
+                row[int.from_bytes(hashlib.blake2b(word.encode(), digest_size=4).digest(), "little") % self.dimension] += 1
+        return rows[0] if single else rows
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; Nagle plus delayed ACKs would add ~40 ms
+    disable_nagle_algorithm = True
+    latency = 0.0
+    tokens = 32
+    token_delay = 0.0
+    stub = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json({"models": []})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.stub.started(request.get("prompt", ""))
+        try:
+            self._respond(request)
+        finally:
+            self.stub.finished()
+
+    def _respond(self, request: dict):
+        time.sleep(self.latency)
+        words = [f"word{i}" for i in range(self.tokens)]
+        done = {"model": request.get("model", ""), "done": True, "eval_count": self.tokens,
+                "prompt_eval_count": len(request.get("prompt", "").split())}
+        if not request.get("stream"):
+            self._send_json({**done, "response": " ".join(words)})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        parts = [{"model": done["model"], "response": word + " ", "done": False} for word in words]
+        for part in parts + [{**done, "response": ""}]:
+            line = (json.dumps(part) + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            if self.token_delay:
+                time.sleep(self.token_delay)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class StubOllama:
+    """
+    Local Ollama stand-in on a free port; use as a context manager and read .host.
+    requests counts generate calls, prompts keeps their prompts and max_active the most
+    that were answered at once.
+    """
+
+    def __init__(self, latency: float = 0.0, tokens: int = 32, token_delay: float = 0.0):
+        self.requests = 0
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        handler = type("Handler", (_StubHandler,),
+                       {"latency": latency, "tokens": tokens, "token_delay": token_delay, "stub": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def started(self, prompt: str = ""):
+        with self._lock:
+            self.requests += 1
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def finished(self):
+        with self._lock:
+            self.active -= 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
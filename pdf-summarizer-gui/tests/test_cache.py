@@ -0,0 +1,53 @@
+import csv
+
+from fixtures import make_pages, write_txt
+
+from core.cache import settings_fingerprint
+from core.file_processor import process_folder
+
+
+def test_prompt_budget_settings_change_the_fingerprint(settings):
+    before = settings_fingerprint(settings, "query")
+
+    settings.response_tokens += 256
+    assert settings_fingerprint(settings, "query") != before
+
+    settings.response_tokens -= 256
+    settings.prompt_tokenizers = {settings.llm_model: "gpt2"}
+    assert settings_fingerprint(settings, "query") != before
+
+
+def read_rows(folder):
+    with open(folder / "output_rag" / "summaries.csv", encoding="utf-8-sig", newline="") as f:
+        return {row["Filename"]: row for row in csv.DictReader(f)}
+
+
+def test_unchanged_files_are_answered_from_the_cache(settings, document_folder, fake_embedder, stub_ollama):
+    settings.use_summary_cache = True
+    assert process_folder(str(document_folder), settings)[0]
+    first = read_rows(document_folder)
+    requests = stub_ollama.requests
+
+    assert process_folder(str(document_folder), settings)[0]
+    second = read_rows(document_folder)
+    assert stub_ollama.requests == requests
+    assert {row["Status"] for row in second.values()} == {"cached"}
+    assert {name: row["Summary"] for name, row in second.items()} == \
+        {name: row["Summary"] for name, row in first.items()}
+
+
+def test_edited_file_or_changed_settings_miss_the_cache(settings, document_folder, fake_embedder, stub_ollama):
+    settings.use_summary_cache = True
+    assert process_folder(str(document_folder), settings)[0]
+
+    write_txt(document_folder / "doc0.txt", make_pages(2, seed=99))
+    requests = stub_ollama.requests
+    assert process_folder(str(document_folder), settings)[0]
+    statuses = {name: row["Status"] for name, row in read_rows(document_folder).items()}
+    assert statuses.pop("doc0.txt") == "ok"
+    assert set(statuses.values()) == {"cached"}
+    assert stub_ollama.requests == requests + 1
+
+    settings.response_tokens += 256
+    assert process_folder(str(document_folder), settings)[0]
+    assert {row["Status"] for row in read_rows(document_folder).values()} == {"ok"}
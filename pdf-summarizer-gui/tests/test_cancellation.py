@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from core.cancellation import CancellationToken, RunCancelled
+from core.file_processor import process_folder
+
+
+def test_check_blocks_while_paused():
+    token = CancellationToken()
+    token.pause()
+    passed = threading.Event()
+    worker = threading.Thread(target=lambda: (token.check(), passed.set()))
+    worker.start()
+    assert not passed.wait(0.2)
+    token.resume()
+    assert passed.wait(2)
+    worker.join()
+
+
+def test_cancel_wakes_a_paused_check():
+    token = CancellationToken()
+    token.pause()
+    errors = []
+
+    def waiter():
+        try:
+            token.check()
+        except RunCancelled as e:
+            errors.append(e)
+
+    worker = threading.Thread(target=waiter)
+    worker.start()
+    time.sleep(0.1)
+    token.cancel()
+    worker.join(2)
+    assert len(errors) == 1
+    with pytest.raises(RunCancelled):
+        token.check()
+
+
+def test_cancelled_run_stops_early_and_keeps_finished_rows(settings, document_folder, fake_embedder,
+                                                           stub_ollama):
+    token = CancellationToken()
+
+    def cancel_after_first(percentage, message):
+        if message.startswith("Finished"):
+            token.cancel()
+
+    success, message = process_folder(str(document_folder), settings,
+                                      progress_callback=cancel_after_first, cancel_token=token)
+    assert not success
+    assert message.startswith("Processing cancelled: 1 of ")
+    assert stub_ollama.requests < 6
+    lines = (document_folder / "output_rag" / "summaries.csv").read_text(encoding="utf-8-sig").splitlines()
+    assert len(lines) == 2
+
+
+def test_resume_after_cancel_finishes_the_rest(settings, document_folder, fake_embedder):
+    token = CancellationToken()
+    token.cancel()
+    success, _ = process_folder(str(document_folder), settings, progress_callback=lambda *args: None,
+                                cancel_token=token)
+    assert not success
+    success, message = process_folder(str(document_folder), settings, progress_callback=lambda *args: None)
+    assert success
+    assert message.startswith("Successfully processed 6 files")
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from core.chunking import StructuredChunker, count_tokens
+
+LONG_SENTENCE = " ".join(f"word{i}" for i in range(252)) + " end."
+
+
+def chunk(text: str, chunk_tokens: int = 256, overlap_tokens: int = 32, min_chunk_tokens: int = 8) -> list:
+    chunker = StructuredChunker(chunk_tokens, overlap_tokens, min_chunk_tokens)
+    return [text for text, _ in chunker.add_page(text, 1) + chunker.finish()]
+
+
+def assert_all_text_kept(sentences: list, chunks: list):
+    joined = " ".join(chunks)
+    for sentence in sentences:
+        assert sentence in joined, f"lost: {sentence[:60]!r}"
+
+
+def test_short_text_before_a_long_sentence_is_kept():
+    sentences = ["Revenue rose.", LONG_SENTENCE, "Next sentence ends here."]
+    chunks = chunk(f"Summary\n{sentences[0]}\n\n{sentences[1]} {sentences[2]}")
+    assert "Summary" in chunks[0]
+    assert_all_text_kept(sentences, chunks)
+
+
+def test_short_tail_after_earlier_chunks_is_kept():
+    body = " ".join(f"Sentence number {i} has a few words in it." for i in range(80))
+    chunks = chunk(f"{body}\n\nDone.", overlap_tokens=0)
+    assert len(chunks) > 1
+    assert chunks[-1].endswith("Done.")
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_every_sentence_reaches_a_chunk(seed):
+    rng = random.Random(seed)
+    sentences = []
+    paragraphs = []
+    for _ in range(rng.randint(3, 12)):
+        paragraph = []
+        for _ in range(rng.randint(1, 6)):
+            length = rng.choice([1, 2, 3, 10, 40, 60, 120, 126, 240, 254])
+            sentence = " ".join(f"w{seed}x{len(sentences)}y{i}" for i in range(length)) + "."
+            sentences.append(sentence)
+            paragraph.append(sentence)
+        heading = f"Section {len(paragraphs) + 1}" if rng.random() < 0.4 else None
+        paragraphs.append((f"{heading}\n" if heading else "") + " ".join(paragraph))
+    chunks = chunk("\n\n".join(paragraphs), chunk_tokens=rng.choice([64, 128, 256]),
+                   overlap_tokens=rng.choice([0, 16, 32]))
+    assert_all_text_kept(sentences, chunks)
+
+
+def test_chunks_stay_near_the_budget():
+    text = " ".join(f"Point {i} is short." for i in range(300))
+    for chunk_text in chunk(text, chunk_tokens=64, overlap_tokens=16, min_chunk_tokens=8):
+        assert count_tokens(chunk_text) < 64 + 8
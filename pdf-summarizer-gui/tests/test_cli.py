@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from cli import build_parser, main, settings_from_args
+from config.settings import Settings
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def parse(*argv):
+    return settings_from_args(build_parser().parse_args(["folder", *argv]))
+
+
+def test_no_options_keep_the_default_settings():
+    assert vars(parse()) == vars(Settings())
+
+
+def test_options_override_settings():
+    settings = parse("-r", "--workers", "0", "--max-inflight", "3", "-q", "first", "-q", "second",
+                     "--model", "llama3", "--no-cache", "--format", "csv", "jsonl",
+                     "--exclude", "drafts", "--index-mode", "ivf", "--quantize")
+    assert settings.recursive_discovery is True
+    assert settings.extraction_workers == 0
+    assert settings.max_inflight_generations == 3
+    assert settings.get_queries() == ["first", "second"]
+    assert settings.llm_model == "llama3"
+    assert settings.use_summary_cache is False
+    assert settings.output_formats == ["csv", "jsonl"]
+    assert settings.exclude_patterns == ["drafts"]
+    assert settings.corpus_index_mode == "ivf"
+    assert settings.corpus_index_quantize is True
+
+
+def test_headless_run(document_folder, fake_embedder, stub_ollama, monkeypatch):
+    monkeypatch.setenv("OLLAMA_HOST", stub_ollama.host)
+    exit_code = main([str(document_folder), "--workers", "0", "--format", "csv",
+                      "--no-cache", "--no-embedding-store"])
+    assert exit_code == 0
+    assert stub_ollama.requests == 6
+    assert (document_folder / "output_rag" / "summaries.csv").exists()
+
+
+def test_cli_does_not_import_qt():
+    # A fresh interpreter, since other tests may already have imported the GUI
+    code = ("import sys, cli, core.file_processor, core.watcher; "
+            "sys.exit(any(name.startswith('PyQt5') for name in sys.modules))")
+    assert subprocess.run([sys.executable, "-c", code], cwd=SRC).returncode == 0
@@ -0,0 +1,48 @@
+import numpy as np
+
+from core.corpus_index import CorpusIndex
+from core.embedding_store import EmbeddingStore
+from core.retrieval import normalize_in_place
+
+
+def store_documents(store, count, rows=20, seed=0):
+    rng = np.random.default_rng(seed)
+    for d in range(count):
+        embeddings = normalize_in_place(rng.standard_normal((rows, 16)).astype(np.float32))
+        store.save(f"doc{d}", [f"doc {d} chunk {i}" for i in range(rows)], embeddings, source=f"doc{d}.txt")
+
+
+def test_compaction_keeps_quantized_rows_unchanged(settings, tmp_path):
+    settings.corpus_index_quantize = True
+    store = EmbeddingStore(tmp_path, settings.get_embedder_model())
+    store_documents(store, 4)
+    index = CorpusIndex(tmp_path, settings).load()
+    index.sync(store, prune_missing=False)
+    before = {doc_id: index._vectors[index._row_owner == owner].copy()
+              for owner, doc_id in enumerate(index._doc_ids)}
+    scales = {doc_id: index._scales[index._row_owner == owner].copy()
+              for owner, doc_id in enumerate(index._doc_ids)}
+
+    # Dropping half the documents pushes the dead rows past the compaction threshold
+    for doc_id in ("doc0", "doc1"):
+        assert index.remove_document(doc_id)
+
+    assert len(index.manifest["segments"]) == 1
+    for owner, doc_id in enumerate(index._doc_ids):
+        assert np.array_equal(index._vectors[index._row_owner == owner], before[doc_id])
+        assert np.array_equal(index._scales[index._row_owner == owner], scales[doc_id])
+
+
+def test_search_returns_the_best_rows_with_their_scores(settings, tmp_path):
+    store = EmbeddingStore(tmp_path, settings.get_embedder_model())
+    store_documents(store, 3)
+    index = CorpusIndex(tmp_path, settings).load()
+    index.sync(store, prune_missing=False)
+    query = index._vectors[7] + 0.1
+
+    hits = index.search(query, top_k=4)
+
+    expected = np.sort(index._vectors @ (query / np.linalg.norm(query)))[::-1][:4]
+    assert np.allclose([hit.score for hit in hits], expected, atol=1e-5)
+    assert hits[0].doc_id == index._doc_ids[index._row_owner[7]]
+    assert (hits[0].source, hits[0].chunk_index, hits[0].text) == ("doc0.txt", 7, "doc 0 chunk 7")
@@ -0,0 +1,22 @@
+import csv
+import shutil
+
+from core.file_processor import process_folder
+
+
+def test_content_duplicates_get_a_row(settings, document_folder, fake_embedder):
+    settings.recursive_discovery = True
+    (document_folder / "copies").mkdir()
+    shutil.copy(document_folder / "doc1.txt", document_folder / "copies" / "doc1.txt")
+
+    success, message = process_folder(str(document_folder), settings)
+    assert success
+    assert message.startswith("Successfully processed 6 files")
+
+    with (document_folder / "output_rag" / "summaries.csv").open(encoding="utf-8-sig", newline="") as f:
+        rows = {row["Filename"]: row for row in csv.DictReader(f)}
+    assert len(rows) == 7
+    # Files of a folder are found before those of its subfolders, so the copy is the duplicate
+    assert rows["copies/doc1.txt"]["Status"] == "duplicate"
+    assert rows["copies/doc1.txt"]["Summary"] == "Duplicate of doc1.txt"
+    assert rows["doc1.txt"]["Status"] == "ok"
@@ -0,0 +1,42 @@
+import pytest
+
+from core import embedder
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Record every model load and hand back a FakeEmbedder instead"""
+    from fixtures import FakeEmbedder
+    loaded = []
+
+    def load(model_name, device):
+        loaded.append(model_name)
+        return FakeEmbedder()
+
+    monkeypatch.setattr(embedder, "_load_embedder", load)
+    embedder.unload_embedders()
+    yield loaded
+    embedder.unload_embedders()
+
+
+def test_least_recently_used_model_is_unloaded(loads, settings):
+    settings.max_cached_embedders = 2
+    first = embedder.get_embedder("a", "cpu", settings)
+    embedder.get_embedder("b", "cpu", settings)
+    assert embedder.get_embedder("a", "cpu", settings) is first
+
+    # "b" is now the least recently used one
+    embedder.get_embedder("c", "cpu", settings)
+    assert embedder.cached_embedders() == [("a", "cpu"), ("c", "cpu")]
+    embedder.get_embedder("b", "cpu", settings)
+    assert loads == ["a", "b", "c", "b"]
+
+
+def test_sync_keeps_only_the_configured_model(loads, settings):
+    settings.max_cached_embedders = 3
+    settings.embedder_model = "a"
+    settings.embedder_device = "cpu"
+    for model_name in ("a", "b", "c"):
+        embedder.get_embedder(model_name, "cpu", settings)
+    embedder.sync_embedders(settings)
+    assert embedder.cached_embedders() == [("a", "cpu")]
@@ -0,0 +1,48 @@
+import numpy as np
+
+from fixtures import FakeEmbedder
+
+from core.summarizer import embed_chunks, embed_documents, get_embedding_dimension
+
+
+class FlakyEmbedder(FakeEmbedder):
+    """Fails every batch, and every single chunk containing "broken" """
+
+    def encode(self, texts, **kwargs):
+        if not isinstance(texts, str) and len(texts) > 1:
+            raise RuntimeError("batch failed")
+        if "broken" in (texts if isinstance(texts, str) else texts[0]):
+            raise RuntimeError("chunk failed")
+        return super().encode(texts, **kwargs)
+
+
+class ProbeOnlyEmbedder(FakeEmbedder):
+    """Cannot report its dimension, like models loaded without a pooling config"""
+
+    def get_sentence_embedding_dimension(self):
+        return None
+
+
+def test_failed_batch_falls_back_per_chunk():
+    chunks = ["first good chunk", "a broken chunk", "second good chunk"]
+    embeddings = embed_chunks(chunks, FlakyEmbedder(dimension=32), batch_size=3)
+    expected = embed_chunks(chunks, FakeEmbedder(dimension=32), batch_size=3)
+
+    # Only the chunk that fails on its own becomes a zero vector
+    assert not embeddings[1].any()
+    assert np.allclose(embeddings[[0, 2]], expected[[0, 2]])
+
+
+def test_dimension_comes_from_the_model():
+    assert get_embedding_dimension(FakeEmbedder(dimension=48)) == 48
+    assert get_embedding_dimension(ProbeOnlyEmbedder(dimension=24)) == 24
+    assert embed_chunks(["some text"], ProbeOnlyEmbedder(dimension=24)).shape == (1, 24)
+
+
+def test_shared_batches_split_back_per_document():
+    embedder = FakeEmbedder(dimension=16)
+    documents = [["alpha words"], ["beta words", "gamma words"], []]
+    per_document = embed_documents(documents, embedder, batch_size=2)
+    assert [len(embeddings) for embeddings in per_document] == [1, 2, 0]
+    assert np.allclose(per_document[1], embed_chunks(documents[1], embedder))
+    assert per_document[0].dtype == np.float32
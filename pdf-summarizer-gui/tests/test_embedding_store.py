@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+
+from core.embedding_store import EmbeddingStore
+
+
+def test_save_does_not_replace_a_mapped_matrix(tmp_path, monkeypatch):
+    store = EmbeddingStore(tmp_path, "model")
+    chunks = ["alpha", "beta"]
+    store.save("doc", chunks, np.ones((2, 4), dtype=np.float32))
+    embeddings, missing = store.lookup("doc", chunks)
+    assert isinstance(embeddings, np.memmap) and missing == []
+
+    # Windows refuses to replace or delete a file that is memory-mapped
+    mapped = {embeddings.filename}
+    real_replace, real_unlink = os.replace, type(tmp_path).unlink
+
+    def replace(src, dst):
+        assert str(dst) not in mapped
+        real_replace(src, dst)
+
+    def unlink(path, missing_ok=False):
+        if str(path) in mapped:
+            raise PermissionError("file is mapped")
+        real_unlink(path, missing_ok)
+
+    monkeypatch.setattr("core.embedding_store.os.replace", replace)
+    monkeypatch.setattr(type(tmp_path), "unlink", unlink)
+    store.save("doc", chunks, np.full((2, 4), 2, dtype=np.float32))
+    assert np.array_equal(store.lookup("doc", chunks)[0], np.full((2, 4), 2))
+    assert np.array_equal(embeddings, np.ones((2, 4)))
+
+    # Once the old matrix is released, the next save removes it
+    del embeddings
+    mapped.clear()
+    store.save("doc", chunks, np.full((2, 4), 3, dtype=np.float32))
+    assert sorted(path.name for path in store.folder.glob("*.npy")) == ["doc.3.npy"]
+
+
+def test_lookup_reuses_rows_of_unchanged_chunks(tmp_path):
+    store = EmbeddingStore(tmp_path, "model")
+    stored = np.arange(12, dtype=np.float32).reshape(3, 4)
+    store.save("doc", ["one", "two", "three"], stored)
+
+    embeddings, missing = store.lookup("doc", ["three", "new", "one"])
+    assert missing == [1]
+    assert np.array_equal(embeddings[0], stored[2])
+    assert np.array_equal(embeddings[2], stored[0])
+
+
+def test_unversioned_store_still_loads(tmp_path):
+    store = EmbeddingStore(tmp_path, "model")
+    store.save("doc", ["one"], np.ones((1, 4), dtype=np.float32))
+    # Layout written before versioned files: <doc_id>.npy and no "vectors" key
+    (store.folder / "doc.1.npy").rename(store.folder / "doc.npy")
+    sidecar = store.folder / "doc.json"
+    sidecar.write_text(sidecar.read_text().replace('"vectors": "doc.1.npy", ', ""))
+    metadata, embeddings = store.load("doc")
+    assert metadata is not None and embeddings.shape == (1, 4)
+    store.remove("doc")
+    assert list(store.folder.iterdir()) == []
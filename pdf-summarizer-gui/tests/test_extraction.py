@@ -0,0 +1,73 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from core.extraction import TextExtractor
+
+
+def scripted_task(name: str) -> tuple:
+    """Worker task standing in for reading a file: 'hang' never finishes, a number sleeps that long"""
+    time.sleep(3600 if name == "hang" else float(name))
+    return [f"chunk of {name}"], [None], {}
+
+
+class ScriptedExtractor(TextExtractor):
+    """Runs scripted_task in the pool instead of reading the file named by each path"""
+
+    def _submit(self, file_path: Path) -> tuple:
+        name = file_path.name.split("-")[0]
+        return [self._get_pool().apply_async(scripted_task, (name,))], False
+
+
+@pytest.fixture
+def extractor(settings):
+    extractor = ScriptedExtractor(workers=2, timeout=2.0, settings=settings)
+    # Start the worker processes before anything is timed
+    list(extractor.extract([Path("0-warmup"), Path("0-warmup2")]))
+    yield extractor
+    extractor._restart_pool()
+
+
+def names(documents):
+    return [document.file_path.name for document in documents]
+
+
+def test_hung_file_times_out_while_other_files_keep_finishing(extractor):
+    files = [Path("hang")] + [Path(f"0.5-{index}") for index in range(10)]
+    started = time.monotonic()
+    arrivals = {}
+    for document in extractor.extract(files, ordered=False):
+        arrivals[document.file_path.name] = (time.monotonic() - started, document)
+
+    seconds, hung = arrivals["hang"]
+    assert "Timed out after 2.0 seconds" in hung.error
+    # Another file finishes every half second, which must not keep extending the deadline
+    assert seconds < 3.5
+    assert all(document.chunks for name, (_, document) in arrivals.items() if name != "hang")
+
+
+def test_ordered_extraction_keeps_input_order_through_a_timeout(extractor):
+    files = [Path("0.2-a"), Path("hang"), Path("0.1-b"), Path("0.1-c")]
+    documents = list(extractor.extract(files, ordered=True))
+    assert names(documents) == ["0.2-a", "hang", "0.1-b", "0.1-c"]
+    assert documents[1].error and "Timed out" in documents[1].error
+    assert [document.chunks for document in documents[2:]] == [["chunk of 0.1"]] * 2
+
+
+def test_unordered_extraction_yields_files_as_they_finish(extractor):
+    documents = list(extractor.extract([Path("1.0-slow"), Path("0.1-a"), Path("0.1-b")], ordered=False))
+    assert names(documents)[-1] == "1.0-slow"
+    assert all(document.error is None for document in documents)
+
+
+def test_time_spent_queued_behind_other_files_does_not_count(settings):
+    extractor = ScriptedExtractor(workers=1, timeout=1.0, settings=settings)
+    try:
+        list(extractor.extract([Path("0-warmup")]))
+        files = [Path(f"0.7-{index}") for index in range(3)]
+        for ordered in (True, False):
+            documents = list(extractor.extract(files, ordered=ordered))
+            assert [document.error for document in documents] == [None] * 3
+    finally:
+        extractor.close()
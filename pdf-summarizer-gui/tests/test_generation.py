@@ -0,0 +1,61 @@
+from core.generation import OllamaGenerator
+
+
+def test_max_in_flight_bounds_concurrent_requests():
+    from fixtures import StubOllama
+    with StubOllama(latency=0.2, tokens=4) as stub:
+        generator = OllamaGenerator(host=stub.host, model="stub", max_in_flight=2)
+        try:
+            futures = [generator.submit_stream(f"prompt {i}") for i in range(6)]
+            results = [future.result(timeout=30) for future in futures]
+        finally:
+            generator.close()
+    assert stub.requests == 6
+    assert stub.max_active == 2
+    assert all(not summary.startswith("Error") for summary, _ in results)
+
+
+def test_stream_reports_first_token_and_speed():
+    from fixtures import StubOllama
+    with StubOllama(latency=0.1, tokens=10, token_delay=0.01) as stub:
+        generator = OllamaGenerator(host=stub.host, model="stub", max_in_flight=1)
+        pieces = []
+        try:
+            summary, stats = generator.stream("prompt", on_token=pieces.append)
+        finally:
+            generator.close()
+    assert summary == "".join(pieces).strip()
+    assert stats.tokens == 10
+    assert stats.time_to_first_token >= 0.1
+    assert stats.elapsed >= stats.time_to_first_token
+    assert stats.tokens_per_second > 0
+
+
+def test_malformed_num_parallel_falls_back(monkeypatch):
+    from config.settings import Settings
+    monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "four")
+    assert Settings().get_max_inflight_generations() == 1
+    monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "0")
+    assert Settings().get_max_inflight_generations() == 1
+    monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "3")
+    assert Settings().get_max_inflight_generations() == 3
+
+
+def test_run_streams_tokens_and_stats_per_file(settings, document_folder, fake_embedder, stub_ollama):
+    from core.file_processor import process_folder
+    tokens, stats = {}, {}
+
+    def on_token(name, text):
+        tokens.setdefault(name, []).append(text)
+
+    def on_stats(name, time_to_first_token, tokens_per_second):
+        stats[name] = (time_to_first_token, tokens_per_second)
+
+    assert process_folder(str(document_folder), settings, token_callback=on_token, stats_callback=on_stats)[0]
+
+    names = {f"doc{index}.txt" for index in range(6)}
+    assert set(tokens) == names and set(stats) == names
+    # Each file streams the stub's 8 tokens, then reports when the first arrived
+    assert all(len(pieces) == 8 for pieces in tokens.values())
+    assert "".join(tokens["doc0.txt"]).strip() == " ".join(f"word{i}" for i in range(8))
+    assert all(first >= 0.05 and speed > 0 for first, speed in stats.values())
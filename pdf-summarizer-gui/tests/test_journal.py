@@ -0,0 +1,62 @@
+import csv
+
+import pytest
+
+from core.file_processor import process_folder
+from core.journal import JobJournal
+
+
+class Crash(BaseException):
+    """Stands in for the process dying; BaseException so no per-file handler absorbs it"""
+
+
+def read_rows(folder):
+    with (folder / "output_rag" / "summaries.csv").open(encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_interrupted_run_resumes_with_remaining_files(settings, document_folder, fake_embedder):
+    finished = []
+
+    def crash_after_two(percentage, message):
+        if message.startswith("Finished"):
+            finished.append(message)
+            if len(finished) == 2:
+                raise Crash()
+
+    with pytest.raises(Crash):
+        process_folder(str(document_folder), settings, progress_callback=crash_after_two)
+
+    journal = JobJournal(document_folder / "output_rag", settings)
+    assert journal.open() == 2
+    journal.close()
+
+    messages = []
+    success, _ = process_folder(str(document_folder), settings,
+                                progress_callback=lambda percentage, message: messages.append(message))
+    assert success
+    assert "Resuming interrupted run: 2 files already done" in messages
+    assert sum(message.startswith("Finished") for message in messages) == 4
+    rows = read_rows(document_folder)
+    assert sorted(row["Filename"] for row in rows) == [f"doc{index}.txt" for index in range(6)]
+    assert all(row["Status"] == "ok" for row in rows)
+
+
+def test_completed_run_starts_a_new_journal(settings, document_folder, fake_embedder):
+    assert process_folder(str(document_folder), settings, progress_callback=lambda *args: None)[0]
+    journal = JobJournal(document_folder / "output_rag", settings)
+    assert journal.open() == 0
+    journal.close()
+
+
+def test_changed_settings_start_a_new_journal(settings, document_folder, fake_embedder):
+    journal = JobJournal(document_folder / "output_rag", settings)
+    (document_folder / "output_rag").mkdir()
+    journal.open()
+    journal.record(document_folder / "doc0.txt", "doc0.txt", ["answer"])
+    journal.close()
+
+    settings.queries = ["A different question?"]
+    journal = JobJournal(document_folder / "output_rag", settings)
+    assert journal.open() == 0
+    journal.close()
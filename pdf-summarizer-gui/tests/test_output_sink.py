@@ -0,0 +1,29 @@
+import csv
+
+from core.file_processor import process_folder
+
+
+def test_xlsx_runs_show_partial_rows_until_saved(settings, document_folder, fake_embedder):
+    settings.output_formats = ["xlsx"]
+    partial = document_folder / "output_rag" / "summaries.partial.csv"
+    seen = []
+
+    def progress(percentage, message):
+        if message.startswith("Finished"):
+            with partial.open(encoding="utf-8-sig", newline="") as f:
+                seen.append(len(list(csv.DictReader(f))))
+
+    success, _ = process_folder(str(document_folder), settings, progress_callback=progress)
+
+    assert success
+    assert seen == [1, 2, 3, 4, 5, 6]
+    assert not partial.exists()
+    assert (document_folder / "output_rag" / "summaries.xlsx").exists()
+
+
+def test_no_partial_csv_next_to_a_streamed_format(settings, document_folder, fake_embedder):
+    settings.output_formats = ["xlsx", "jsonl"]
+    process_folder(str(document_folder), settings, progress_callback=lambda percentage, message: None)
+    assert not list((document_folder / "output_rag").glob("*.partial.*"))
+    lines = (document_folder / "output_rag" / "summaries.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 6
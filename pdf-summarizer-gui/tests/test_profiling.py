@@ -0,0 +1,39 @@
+import csv
+import json
+
+from core.file_processor import process_folder
+from core.profiling import COUNTS, STAGES, RunProfiler
+
+
+def test_totals_sum_every_file(tmp_path):
+    profiler = RunProfiler()
+    profiler.add_time("a.pdf", "read", 1.0)
+    profiler.add_time("b.pdf", "read", 0.5)
+    profiler.add_count("a.pdf", "pages", 3)
+    profiler.add_time(None, "spreadsheet", 0.25)
+
+    json_path, csv_path = profiler.write_reports(tmp_path)
+    report = json.loads(json_path.read_text(encoding="utf-8"))
+    assert report["totals"]["stages"]["read"] == 1.5
+    assert report["totals"]["counts"]["pages"] == 3
+    assert report["run_stages"] == {"spreadsheet": 0.25}
+    with csv_path.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["file"] + [f"{stage}_s" for stage in STAGES] + COUNTS
+    assert [row[0] for row in rows[1:]] == ["a.pdf", "b.pdf", "TOTAL"]
+    assert rows[-1][1] == "1.5000"
+
+
+def test_run_report_covers_every_file(settings, document_folder, fake_embedder, stub_ollama):
+    settings.write_run_report = True
+    assert process_folder(str(document_folder), settings)[0]
+
+    report = json.loads((document_folder / "output_rag" / "run_report.json").read_text(encoding="utf-8"))
+    files = {entry["file"]: entry for entry in report["files"]}
+    assert set(files) == {f"doc{index}.txt" for index in range(6)}
+    for entry in files.values():
+        assert entry["counts"]["chunks"] > 0
+        assert entry["counts"]["generated_tokens"] == 8
+        assert entry["stages"]["generate"] > 0
+    assert report["totals"]["counts"]["chunks"] == sum(entry["counts"]["chunks"] for entry in files.values())
+    assert (document_folder / "output_rag" / "run_report.csv").exists()
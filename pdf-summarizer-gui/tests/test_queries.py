@@ -0,0 +1,33 @@
+import csv
+
+from core.file_processor import process_folder
+
+
+def test_every_query_is_answered_per_document(settings, document_folder, fake_embedder, stub_ollama):
+    queries = ["What are the risks?", "Who is responsible?"]
+    settings.queries = queries
+    assert process_folder(str(document_folder), settings)[0]
+
+    with open(document_folder / "output_rag" / "summaries.csv", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames[:3] == ["Filename"] + queries
+        rows = list(reader)
+    assert len(rows) == 6
+    assert all(row[query] for row in rows for query in queries)
+    # One prompt per (document, query), each asking its own question
+    assert stub_ollama.requests == 6 * len(queries)
+    for query in queries:
+        assert sum(query in prompt for prompt in stub_ollama.prompts) == 6
+
+
+def test_queries_file_skips_comments_and_blank_lines(settings, tmp_path):
+    queries_file = tmp_path / "queries.txt"
+    queries_file.write_text("# risks first\nWhat are the risks?\n\n  Who is responsible?  \n", encoding="utf-8")
+    settings.queries = ["ignored"]
+    settings.queries_file = str(queries_file)
+    assert settings.get_queries() == ["What are the risks?", "Who is responsible?"]
+
+    queries_file.write_text("# nothing yet\n", encoding="utf-8")
+    assert settings.get_queries() == ["ignored"]
+    settings.queries = []
+    assert settings.get_queries() == [settings.get_default_query()]
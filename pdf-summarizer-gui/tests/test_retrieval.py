@@ -0,0 +1,13 @@
+import numpy as np
+
+from core.retrieval import ChunkIndex, normalize_in_place
+
+
+def test_assume_normalized_keeps_the_rows_and_the_results():
+    rng = np.random.default_rng(0)
+    embeddings = normalize_in_place(rng.standard_normal((50, 16)).astype(np.float32))
+    queries = rng.standard_normal((3, 16)).astype(np.float32)
+
+    trusted = ChunkIndex(embeddings, assume_normalized=True)
+    assert trusted.embeddings is embeddings
+    assert trusted.search(queries, 5) == ChunkIndex(embeddings).search(queries, 5)
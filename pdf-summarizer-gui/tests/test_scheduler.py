@@ -0,0 +1,35 @@
+from core.scheduler import WorkSchedule
+
+
+def sized_files(folder, sizes):
+    paths = []
+    for index, size in enumerate(sizes):
+        path = folder / f"file{index:04d}.txt"
+        path.write_text("x" * size, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def test_first_file_starts_before_the_folder_is_read(tmp_path):
+    paths = sized_files(tmp_path, [100 * index for index in range(200)])
+    pulled = []
+
+    def stream():
+        for path in paths:
+            pulled.append(path)
+            yield path
+
+    schedule = WorkSchedule(lookahead=1000, initial_lookahead=8)
+    order = schedule.order(stream())
+    first = next(order)
+    assert len(pulled) == 9
+    assert first == paths[8]
+    assert sorted(list(order) + [first]) == paths
+
+
+def test_small_lookahead_grows_to_the_full_window(tmp_path):
+    paths = sized_files(tmp_path, [100 * index for index in range(64)])
+    order = list(WorkSchedule(lookahead=64, initial_lookahead=2).order(paths))
+    # Once the window covers the rest of the folder the remaining files come out largest first
+    assert order[-40:] == sorted(order[-40:], key=lambda path: -path.stat().st_size)
+    assert order[0] == paths[2]
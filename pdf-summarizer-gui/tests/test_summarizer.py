@@ -0,0 +1,76 @@
+from fixtures import make_pages, write_txt
+
+from core.context import CONTEXT_SEPARATOR
+from core.file_processor import process_folder
+from core.generation import OllamaGenerator
+from core.summarizer import group_chunks, map_reduce_stream
+
+
+def test_map_reduce_run_respects_max_in_flight(settings, tmp_path, fake_embedder, stub_ollama):
+    settings.summary_mode = "map_reduce"
+    settings.max_inflight_generations = 2
+    # A small context window splits every document into several map groups
+    settings.context_window = 1024
+    settings.response_tokens = 256
+    for index in range(6):
+        write_txt(tmp_path / f"doc{index}.txt", make_pages(6, seed=index))
+
+    success, _ = process_folder(str(tmp_path), settings)
+
+    assert success
+    # Map and final requests of different documents overlap, but never past the bound
+    assert stub_ollama.requests > 6 * 3
+    assert stub_ollama.max_active <= 2
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_groups_fit_the_budget_and_keep_document_order():
+    chunks = [" ".join(["word"] * size) for size in (30, 30, 50, 120, 10, 10, 10, 10)]
+    groups = group_chunks(chunks, 100, count_words, max_items=3)
+
+    assert [chunk for group in groups for chunk in group] == chunks
+    assert all(len(group) <= 3 for group in groups)
+    separator = count_words(CONTEXT_SEPARATOR)
+    for group in groups:
+        # Only a chunk larger than the budget on its own may exceed it
+        cost = sum(map(count_words, group)) + separator * (len(group) - 1)
+        assert cost <= 100 or len(group) == 1
+    assert [len(group) for group in groups] == [2, 1, 1, 3, 1]
+
+
+def run_map_reduce(settings, stub_ollama, depth):
+    settings.map_reduce_fan_out = 2
+    settings.map_reduce_depth = depth
+    settings.context_window = 1024
+    settings.response_tokens = 256
+    chunks = [" ".join(page.split()[:250]) for page in make_pages(12)]
+    generator = OllamaGenerator(host=stub_ollama.host, model="stub", max_in_flight=2, settings=settings)
+    stub_ollama.prompts.clear()
+    try:
+        summary, _ = map_reduce_stream(chunks, "query", settings, generator)
+    finally:
+        generator.close()
+    assert not summary.startswith("Error")
+    prompts = stub_ollama.prompts
+    maps = sum(prompt.startswith("Summarize this section") for prompt in prompts)
+    reduces = sum(prompt.startswith("The following are summaries") for prompt in prompts)
+    assert maps + reduces + 1 == len(prompts)
+    return maps, reduces
+
+
+def test_reduce_levels_stop_at_the_depth_limit(settings, stub_ollama):
+    maps, reduces = run_map_reduce(settings, stub_ollama, depth=0)
+    assert maps > 4 and reduces == 0
+
+    # Pairs are combined once: maps partials become ceil(maps / 2)
+    assert run_map_reduce(settings, stub_ollama, depth=1) == (maps, -(-maps // 2))
+
+    # Without a tight limit, levels continue until at most fan_out partials are left
+    levels, partials = [], maps
+    while partials > 2:
+        partials = -(-partials // 2)
+        levels.append(partials)
+    assert run_map_reduce(settings, stub_ollama, depth=10) == (maps, sum(levels))
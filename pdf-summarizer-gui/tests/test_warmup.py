@@ -0,0 +1,47 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from core import warmup
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def test_stopped_warm_up_skips_remaining_steps(monkeypatch):
+    stop_event = threading.Event()
+    imported = []
+
+    def import_module(name):
+        imported.append(name)
+        stop_event.set()
+
+    monkeypatch.setattr(warmup.importlib, "import_module", import_module)
+    monkeypatch.setattr(warmup, "warm_up_embedder", lambda settings: imported.append("embedder"))
+    assert warmup.warm_up(stop_event=stop_event) is False
+    assert imported == [warmup.WARMUP_MODULES[0][0]]
+
+
+def test_modules_load_in_order_and_failures_only_warn(monkeypatch, capsys):
+    imported, messages = [], []
+
+    def import_module(name):
+        imported.append(name)
+        if name == "sentence_transformers":
+            raise ImportError("not installed")
+
+    monkeypatch.setattr(warmup.importlib, "import_module", import_module)
+    monkeypatch.setattr(warmup, "warm_up_embedder", lambda settings: False)
+    assert warmup.warm_up(status_callback=messages.append) is False
+
+    assert imported == [module for module, _ in warmup.WARMUP_MODULES]
+    assert messages[:len(imported)] == [f"Loading {description}..." for _, description in warmup.WARMUP_MODULES]
+    assert messages[-2:] == ["Loading embedding model...", "Embedding model will load on first use"]
+    assert "Could not preload sentence_transformers" in capsys.readouterr().out
+
+
+def test_window_module_imports_no_heavy_library():
+    # A fresh interpreter, since the other tests have already imported these
+    heavy = [module for module, _ in warmup.WARMUP_MODULES] + ["torch"]
+    code = f"import sys, gui.main_window; sys.exit(any(name in sys.modules for name in {heavy!r}))"
+    assert subprocess.run([sys.executable, "-c", code], cwd=SRC).returncode == 0
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from openpyxl import load_workbook
+
+from core.cancellation import CancellationToken
+from core.watcher import watch_folder
+
+
+def run_watch(folder, settings, **kwargs):
+    """Start watch_folder on a thread; returns (thread, stop_event)"""
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watch_folder, args=(str(folder), stop_event, settings), kwargs=kwargs)
+    thread.start()
+    return thread, stop_event
+
+
+def workbook_rows(folder):
+    sheet = load_workbook(folder / "output_rag" / "summaries.xlsx").active
+    return [[cell.value for cell in row] for row in sheet.iter_rows()]
+
+
+def test_cancelling_stops_a_batch_in_progress(settings, document_folder, fake_embedder, stub_ollama):
+    settings.watch_poll_interval = 0.05
+    token = CancellationToken()
+    finished = threading.Event()
+
+    def progress(percentage, message):
+        if message.startswith("Finished"):
+            finished.set()
+
+    thread, stop_event = run_watch(document_folder, settings, progress_callback=progress, cancel_token=token)
+    try:
+        assert finished.wait(10)
+        started = time.perf_counter()
+        stop_event.set()
+        token.cancel()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert time.perf_counter() - started < 2
+    finally:
+        stop_event.set()
+        token.cancel()
+        thread.join()
+
+    assert stub_ollama.requests < 6
+    rows = workbook_rows(document_folder)
+    assert 2 <= len(rows) < 7
+
+
+def test_watch_updates_the_batch_workbook_in_place(settings, document_folder, fake_embedder):
+    from core.file_processor import process_folder
+    from fixtures import make_pages, write_txt
+
+    settings.output_formats = ["xlsx"]
+    settings.recursive_discovery = True
+    settings.watch_poll_interval = 0.05
+    (document_folder / "sub").mkdir()
+    write_txt(document_folder / "sub" / "nested.txt", make_pages(2, seed=10))
+    success, _ = process_folder(str(document_folder), settings)
+    assert success
+    batch_rows = workbook_rows(document_folder)
+    assert "Status" in batch_rows[0]
+    assert len(batch_rows) == 8
+
+    # The first poll reports every file, so the whole folder is summarized again
+    updated = []
+    thread, stop_event = run_watch(document_folder, settings, progress_callback=lambda p, m: None,
+                                   rows_callback=updated.append)
+    try:
+        deadline = time.perf_counter() + 20
+        while sum(updated) < 7 and time.perf_counter() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop_event.set()
+        thread.join()
+
+    assert sum(updated) == 7
+    rows = workbook_rows(document_folder)
+    assert rows[0] == batch_rows[0]
+    assert sorted(row[0] for row in rows[1:]) == sorted(row[0] for row in batch_rows[1:])
+    assert "sub/nested.txt" in [row[0] for row in rows]
+    assert all(row[rows[0].index("Status")] == "ok" for row in rows[1:])
+
+
+def test_watch_writes_a_row_for_a_duplicate(settings, document_folder, fake_embedder):
+    import shutil
+
+    settings.watch_poll_interval = 0.05
+    shutil.copy(document_folder / "doc2.txt", document_folder / "doc2 copy.txt")
+    updated = []
+    thread, stop_event = run_watch(document_folder, settings, progress_callback=lambda p, m: None,
+                                   rows_callback=updated.append)
+    try:
+        deadline = time.perf_counter() + 20
+        while sum(updated) < 7 and time.perf_counter() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop_event.set()
+        thread.join()
+
+    rows = {row[0]: row for row in workbook_rows(document_folder)[1:]}
+    assert len(rows) == 7
+    assert rows["doc2.txt"][1] == "Duplicate of doc2 copy.txt"
+    assert rows["doc2.txt"][2] == "duplicate"